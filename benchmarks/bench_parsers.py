@@ -0,0 +1,124 @@
+"""Compare the composite and hstore parsers of psycopg2.extras.
+
+Time the single-pass parsers (`CompositeCaster.tokenize()`,
+`HstoreAdapter.parse()`) against the regular expression implementations
+they fall back to (`_tokenize_re()`, `_parse_re()`).
+
+By default the parsers run on synthetic values. To measure them on real
+data pass a connection string and a query returning a single column of
+records or hstore values, e.g.::
+
+    python bench_parsers.py --dsn "dbname=shop" \\
+        --query "SELECT attrs::text FROM product" --kind hstore
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+from psycopg2.extras import CompositeCaster, HstoreAdapter
+
+
+def random_text(rnd, special):
+    chars = string.ascii_letters + string.digits + special
+    return ''.join(rnd.choice(chars) for i in range(rnd.randint(0, 20)))
+
+
+def record_out(values):
+    """Return the representation of a record as output by the server."""
+    rv = []
+    for v in values:
+        if v is None:
+            rv.append('')
+        elif v == '' or any(c in '"\\(),' or c.isspace() for c in v):
+            rv.append('"%s"' % v.replace('"', '""').replace('\\', '\\\\'))
+        else:
+            rv.append(v)
+    return '(%s)' % ','.join(rv)
+
+
+def hstore_out(d):
+    """Return the representation of an hstore as output by the server."""
+    def quote(s):
+        return '"%s"' % s.replace('\\', '\\\\').replace('"', '\\"')
+
+    return ', '.join('%s=>%s' % (quote(k), 'NULL' if v is None else quote(v))
+        for k, v in d.items())
+
+
+def synthetic(kind, n, special, seed=42):
+    rnd = random.Random(seed)
+    rv = []
+    for i in range(n):
+        if kind == 'composite':
+            rv.append(record_out([
+                rnd.choice([None, random_text(rnd, special)])
+                for j in range(8)]))
+        else:
+            rv.append(hstore_out({
+                random_text(rnd, special) or 'k':
+                    rnd.choice([None, random_text(rnd, special)])
+                for j in range(8)}))
+    return rv
+
+
+def fetch(dsn, query):
+    import psycopg2
+    conn = psycopg2.connect(dsn)
+    try:
+        curs = conn.cursor()
+        curs.execute(query)
+        return [r[0] for r in curs if r[0] is not None]
+    finally:
+        conn.close()
+
+
+def bench(kind, values, repeat):
+    if kind == 'composite':
+        funcs = [
+            ('regex', CompositeCaster._tokenize_re),
+            ('single-pass', CompositeCaster.tokenize)]
+    else:
+        funcs = [
+            ('regex', HstoreAdapter._parse_re),
+            ('single-pass', lambda s: HstoreAdapter.parse(s, None))]
+
+    results = {}
+    for name, f in funcs:
+        t = min(timeit.repeat(
+            lambda: [f(v) for v in values], number=1, repeat=repeat))
+        results[name] = t
+        print(f"  {name:>12}: {t / len(values) * 1e6:8.2f} us/value")
+    print(f"  {'speedup':>12}: {results['regex'] / results['single-pass']:8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--dsn', help="database to read the values from")
+    parser.add_argument('--query',
+        help="query returning the values to parse as text")
+    parser.add_argument('--kind', choices=['composite', 'hstore'],
+        help="the type of values returned by --query")
+    parser.add_argument('-n', type=int, default=10000,
+        help="number of synthetic values [default: %(default)s]")
+    parser.add_argument('--repeat', type=int, default=5,
+        help="times to repeat every measure [default: %(default)s]")
+    opt = parser.parse_args()
+
+    if opt.dsn:
+        if not (opt.query and opt.kind):
+            parser.error("--dsn requires --query and --kind")
+        values = fetch(opt.dsn, opt.query)
+        print(f"{opt.kind}, {len(values)} values from the database")
+        bench(opt.kind, values, opt.repeat)
+        return
+
+    for kind in ('composite', 'hstore'):
+        for label, special in (('plain', ''), ('quoted', ' ,"()\\')):
+            print(f"{kind}, {label} values")
+            bench(kind, synthetic(kind, opt.n, special), opt.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,397 @@
+"""Benchmark the Python-level helpers of psycopg2 against a local Postgres.
+
+Measure the bulk insert helpers (`execute_batch()`, `execute_values()`), the
+fetch paths of the cursor subclasses (`DictCursor`, `RealDictCursor`,
+`NamedTupleCursor`), the parsing of composite and hstore values and the
+checkout overhead of the connection pools, each at a few data sizes (for
+the pools, the number of getconn()/putconn() pairs).
+
+Unless --dsn is specified, a throwaway server is created with initdb in a
+temporary directory, started on a Unix socket only and removed at the end.
+The programs are looked for in --pg-bin, in the directory reported by
+pg_config, or in the PATH.
+
+The composite and hstore workloads create a type and, if missing, the hstore
+extension: they are created in a schema "psycopg2_bench", added to the
+search_path of the session and dropped with its content at the end, so that
+running against a --dsn leaves the database as it was found.
+
+The results are emitted as JSON, with the commit of the working copy and
+the versions involved, so that runs on different commits can be compared::
+
+    python bench_psycopg2.py --rows 1k,100k -o before.json
+    python bench_psycopg2.py --rows 1k,100k -o after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+
+
+def parse_rows(s):
+    """Parse a comma-separated list of sizes such as "1k,100k,1m"."""
+    mult = {'k': 1000, 'm': 1000000}
+    rv = []
+    for item in s.split(','):
+        item = item.strip().lower()
+        if item[-1:] in mult:
+            rv.append(int(item[:-1]) * mult[item[-1]])
+        else:
+            rv.append(int(item))
+    return rv
+
+
+def find_pg_bin(pg_bin=None):
+    """Return the directory containing initdb and pg_ctl."""
+    if pg_bin:
+        return pg_bin
+    try:
+        out = subprocess.run(['pg_config', '--bindir'],
+            capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    else:
+        bindir = out.stdout.strip()
+        if os.path.exists(os.path.join(bindir, 'initdb')):
+            return bindir
+
+    initdb = shutil.which('initdb')
+    if initdb:
+        return os.path.dirname(initdb)
+    sys.exit("initdb not found: please specify --pg-bin or --dsn")
+
+
+@contextmanager
+def temp_server(pg_bin, keep=False):
+    """Run a throwaway Postgres server and return its connection string."""
+    datadir = tempfile.mkdtemp(prefix='psycopg2-bench-')
+    logfile = os.path.join(datadir, 'server.log')
+    pgdata = os.path.join(datadir, 'data')
+    subprocess.run([
+        os.path.join(pg_bin, 'initdb'), '-D', pgdata, '-U', 'postgres',
+        '-A', 'trust', '-E', 'UTF8', '--no-sync'],
+        check=True, stdout=subprocess.DEVNULL)
+
+    # Durability is of no interest here: don't let the disk dominate.
+    opts = (f"-k {datadir} -c listen_addresses='' -c fsync=off "
+        "-c synchronous_commit=off -c full_page_writes=off "
+        "-c max_connections=50")
+    subprocess.run([
+        os.path.join(pg_bin, 'pg_ctl'), '-D', pgdata, '-l', logfile,
+        '-o', opts, '-w', 'start'],
+        check=True, stdout=subprocess.DEVNULL)
+    try:
+        yield f"host={datadir} dbname=postgres user=postgres"
+    finally:
+        subprocess.run([
+            os.path.join(pg_bin, 'pg_ctl'), '-D', pgdata, '-m', 'immediate',
+            '-w', 'stop'],
+            stdout=subprocess.DEVNULL)
+        if keep:
+            print(f"server data left in {datadir}", file=sys.stderr)
+        else:
+            shutil.rmtree(datadir, ignore_errors=True)
+
+
+def timed(func, repeat, setup=None):
+    """Call 'func' 'repeat' times, after 'setup' if given; return the times."""
+    rv = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        rv.append(time.perf_counter() - start)
+    return rv
+
+
+# Workloads: every function receives a connection, the connection string used
+# to open it, a number of rows and returns the list of times of its runs.
+# They are registered in WORKLOADS.
+
+WORKLOADS = {}
+
+
+def workload(name):
+    def workload_(f):
+        WORKLOADS[name] = f
+        return f
+
+    return workload_
+
+
+def make_data(rows):
+    return [(i, f"name {i}", i * 0.5, i % 2 == 0) for i in range(rows)]
+
+
+def insert_table(conn):
+    with conn.cursor() as curs:
+        curs.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS bench_insert (
+                id int, name text, score float8, flag bool)
+            """)
+    conn.commit()
+
+    def truncate():
+        with conn.cursor() as curs:
+            curs.execute("TRUNCATE bench_insert")
+        conn.commit()
+
+    return truncate
+
+
+@workload('execute_batch')
+def bench_execute_batch(conn, dsn, rows, repeat):
+    data = make_data(rows)
+    truncate = insert_table(conn)
+
+    def run():
+        with conn.cursor() as curs:
+            psycopg2.extras.execute_batch(curs,
+                "INSERT INTO bench_insert VALUES (%s, %s, %s, %s)", data,
+                page_size=1000)
+        conn.commit()
+
+    return timed(run, repeat, truncate)
+
+
+@workload('execute_values')
+def bench_execute_values(conn, dsn, rows, repeat):
+    data = make_data(rows)
+    truncate = insert_table(conn)
+
+    def run():
+        with conn.cursor() as curs:
+            psycopg2.extras.execute_values(curs,
+                "INSERT INTO bench_insert VALUES %s", data, page_size=1000)
+        conn.commit()
+
+    return timed(run, repeat, truncate)
+
+
+FETCH_QUERY = """
+    SELECT i AS id, 'name ' || i AS name, i * 0.5 AS score, i %% 2 = 0 AS flag
+    FROM generate_series(1, %s) AS i
+    """
+
+
+def bench_fetch(conn, rows, repeat, cursor_factory):
+    def run():
+        with conn.cursor(cursor_factory=cursor_factory) as curs:
+            curs.execute(FETCH_QUERY, (rows,))
+            curs.fetchall()
+        conn.rollback()
+
+    return timed(run, repeat)
+
+
+@workload('fetch_tuple')
+def bench_fetch_tuple(conn, dsn, rows, repeat):
+    return bench_fetch(conn, rows, repeat, psycopg2.extensions.cursor)
+
+
+@workload('fetch_dict')
+def bench_fetch_dict(conn, dsn, rows, repeat):
+    return bench_fetch(conn, rows, repeat, psycopg2.extras.DictCursor)
+
+
+@workload('fetch_realdict')
+def bench_fetch_realdict(conn, dsn, rows, repeat):
+    return bench_fetch(conn, rows, repeat, psycopg2.extras.RealDictCursor)
+
+
+@workload('fetch_namedtuple')
+def bench_fetch_namedtuple(conn, dsn, rows, repeat):
+    return bench_fetch(conn, rows, repeat, psycopg2.extras.NamedTupleCursor)
+
+
+@workload('composite')
+def bench_composite(conn, dsn, rows, repeat):
+    with conn.cursor() as curs:
+        curs.execute("DROP TYPE IF EXISTS psycopg2_bench.card")
+        curs.execute("""
+            CREATE TYPE psycopg2_bench.card AS (id int, name text, note text)
+            """)
+    conn.commit()
+    psycopg2.extras.register_composite('psycopg2_bench.card', conn)
+
+    def run():
+        with conn.cursor() as curs:
+            curs.execute("""
+                SELECT (i, 'name ' || i, 'a "quoted", note')
+                    ::psycopg2_bench.card
+                FROM generate_series(1, %s) AS i
+                """, (rows,))
+            curs.fetchall()
+        conn.rollback()
+
+    return timed(run, repeat)
+
+
+@workload('hstore')
+def bench_hstore(conn, dsn, rows, repeat):
+    with conn.cursor() as curs:
+        curs.execute("SELECT 1 FROM pg_extension WHERE extname = 'hstore'")
+        if not curs.fetchone():
+            curs.execute("CREATE EXTENSION hstore SCHEMA psycopg2_bench")
+    conn.commit()
+    psycopg2.extras.register_hstore(conn)
+
+    def run():
+        with conn.cursor() as curs:
+            curs.execute("""
+                SELECT hstore(ARRAY['id', 'name', 'note', 'none'],
+                    ARRAY[i::text, 'name ' || i, 'a "quoted" note', NULL])
+                FROM generate_series(1, %s) AS i
+                """, (rows,))
+            curs.fetchall()
+        conn.rollback()
+
+    return timed(run, repeat)
+
+
+def bench_pool(dsn, rows, repeat, pool_class):
+    pool = pool_class(1, 4, dsn)
+    try:
+        def run():
+            for i in range(rows):
+                pool.putconn(pool.getconn())
+
+        return timed(run, repeat)
+    finally:
+        pool.closeall()
+
+
+@workload('pool_simple')
+def bench_pool_simple(conn, dsn, rows, repeat):
+    return bench_pool(dsn, rows, repeat,
+        psycopg2.pool.SimpleConnectionPool)
+
+
+@workload('pool_threaded')
+def bench_pool_threaded(conn, dsn, rows, repeat):
+    return bench_pool(dsn, rows, repeat,
+        psycopg2.pool.ThreadedConnectionPool)
+
+
+@workload('pool_blocking')
+def bench_pool_blocking(conn, dsn, rows, repeat):
+    return bench_pool(dsn, rows, repeat,
+        psycopg2.pool.BlockingConnectionPool)
+
+
+def git_commit():
+    """Return the commit of the working copy, None if not available."""
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_benchmarks(dsn, names, sizes, repeat):
+    conn = psycopg2.connect(dsn)
+    meta = {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'psycopg2': psycopg2.__version__,
+        'libpq': psycopg2.extensions.libpq_version(),
+        'server': conn.server_version,
+        'repeat': repeat,
+    }
+
+    with conn.cursor() as curs:
+        curs.execute("CREATE SCHEMA IF NOT EXISTS psycopg2_bench")
+        curs.execute("""
+            SELECT set_config('search_path',
+                current_setting('search_path') || ', psycopg2_bench', false)
+            """)
+    conn.commit()
+
+    results = []
+    try:
+        for name in names:
+            for rows in sizes:
+                print(f"{name} {rows} rows...", end=' ', file=sys.stderr,
+                    flush=True)
+                try:
+                    times = WORKLOADS[name](conn, dsn, rows, repeat)
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    print(f"skipped: {e}".strip(), file=sys.stderr)
+                    results.append({
+                        'workload': name, 'rows': rows, 'error': str(e)})
+                    continue
+
+                best = min(times)
+                print(f"{best:.3f} sec", file=sys.stderr)
+                results.append({
+                    'workload': name,
+                    'rows': rows,
+                    'times': times,
+                    'best': best,
+                    'rows_per_sec': rows / best if best else None,
+                })
+    finally:
+        conn.rollback()
+        with conn.cursor() as curs:
+            curs.execute("DROP SCHEMA psycopg2_bench CASCADE")
+        conn.commit()
+        conn.close()
+
+    return {'meta': meta, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--dsn',
+        help="run against this database instead of a temporary server")
+    parser.add_argument('--pg-bin',
+        help="directory of the Postgres programs (initdb, pg_ctl)")
+    parser.add_argument('--keep', action='store_true',
+        help="don't delete the temporary server data directory")
+    parser.add_argument('--rows', type=parse_rows,
+        default=parse_rows('1k,100k,1m'),
+        help="comma-separated data sizes [default: 1k,100k,1m]")
+    parser.add_argument('--workload', '-w', action='append',
+        choices=sorted(WORKLOADS), dest='workloads',
+        help="workload to run; repeat to run several [default: all]")
+    parser.add_argument('--repeat', type=int, default=3,
+        help="times to repeat every measure [default: %(default)s]")
+    parser.add_argument('--output', '-o',
+        help="file to write the JSON results to [default: stdout]")
+    opt = parser.parse_args()
+
+    names = opt.workloads or list(WORKLOADS)
+    if opt.dsn:
+        report = run_benchmarks(opt.dsn, names, opt.rows, opt.repeat)
+    else:
+        with temp_server(find_pg_bin(opt.pg_bin), keep=opt.keep) as dsn:
+            report = run_benchmarks(dsn, names, opt.rows, opt.repeat)
+
+    if opt.output:
+        with open(opt.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
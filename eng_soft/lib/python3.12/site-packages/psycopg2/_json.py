@@ -29,6 +29,7 @@ extensions importing register_json from extras.
 # License for more details.
 
 import json
+from collections import namedtuple
 
 from psycopg2._psycopg import ISQLQuote, QuotedString
 from psycopg2._psycopg import new_type, new_array_type, register_type
@@ -43,20 +44,121 @@ JSONB_OID = 3802
 JSONBARRAY_OID = 3807
 
 
+JsonCodec = namedtuple('JsonCodec', 'name loads dumps')
+
+# The codec used by default, created on first use
+_codec = None
+
+
+def get_json_codec():
+    """Return the `JsonCodec` used by default to parse and serialize JSON.
+
+    Unless a codec was chosen with `set_json_codec()`, use the standard
+    library `!json` module.
+    """
+    global _codec
+    if _codec is None:
+        _codec = _make_json_codec('json')
+    return _codec
+
+
+def set_json_codec(codec='json', loads=None, dumps=None):
+    """Choose the JSON codec used by default.
+
+    :param codec: the name of the library to use (``json``, ``orjson``,
+        ``ujson``); if `!None` use the fastest available among
+        :pypi:`orjson`, :pypi:`ujson` and `!json`
+    :param loads: a function to parse JSON to use instead of the one of the
+        library
+    :param dumps: a function to serialize JSON to use instead of the one of
+        the library; it should return a `!str`
+    :return: the `JsonCodec` chosen
+
+    The codec is used by the `Json` adapter, by the typecasters registered
+    without a *loads* function (including the default ones for :sql:`json`
+    and :sql:`jsonb`), and can be shared by the application calling
+    `get_json_codec()`.
+
+    The faster libraries don't produce the same JSON as `!json.dumps()`: they
+    use compact separators, and :pypi:`orjson` writes NaN and infinite floats
+    as ``null``. They are only used if chosen with this function.
+    """
+    global _codec
+    rv = _make_json_codec(codec)
+    if loads is not None or dumps is not None:
+        rv = rv._replace(name='custom',
+            loads=loads or rv.loads, dumps=dumps or rv.dumps)
+    _codec = rv
+    return rv
+
+
+def _make_json_codec(name=None):
+    if name is None:
+        for name in ('orjson', 'ujson'):
+            try:
+                return _make_json_codec(name)
+            except ImportError:
+                pass
+        name = 'json'
+
+    if name == 'json':
+        return JsonCodec('json', json.loads, json.dumps)
+
+    elif name == 'orjson':
+        import orjson
+
+        # orjson returns bytes and, like ujson, refuses some documents json
+        # accepts (e.g. integers larger than 64 bits, non-str keys): fall
+        # back on json in these cases.
+        def loads(s, _loads=orjson.loads):
+            try:
+                return _loads(s)
+            except ValueError:
+                return json.loads(s)
+
+        def dumps(obj, _dumps=orjson.dumps):
+            try:
+                return _dumps(obj).decode()
+            except TypeError:
+                return json.dumps(obj)
+
+        return JsonCodec('orjson', loads, dumps)
+
+    elif name == 'ujson':
+        import ujson
+
+        def loads(s, _loads=ujson.loads):
+            try:
+                return _loads(s)
+            except ValueError:
+                return json.loads(s)
+
+        def dumps(obj, _dumps=ujson.dumps):
+            try:
+                return _dumps(obj)
+            except (TypeError, OverflowError):
+                return json.dumps(obj)
+
+        return JsonCodec('ujson', loads, dumps)
+
+    else:
+        raise ValueError(f"unknown JSON codec: {name!r}")
+
+
 class Json:
     """
     An `~psycopg2.extensions.ISQLQuote` wrapper to adapt a Python object to
     :sql:`json` data type.
 
     `!Json` can be used to wrap any object supported by the provided *dumps*
-    function. If none is provided, the standard :py:func:`json.dumps()` is
-    used.
+    function. If none is provided, the function of the default codec is used
+    (see `set_json_codec()`).
 
     """
     def __init__(self, adapted, dumps=None):
         self.adapted = adapted
         self._conn = None
-        self._dumps = dumps or json.dumps
+        self._dumps = dumps
 
     def __conform__(self, proto):
         if proto is ISQLQuote:
@@ -65,11 +167,13 @@ class Json:
     def dumps(self, obj):
         """Serialize *obj* in JSON format.
 
-        The default is to call `!json.dumps()` or the *dumps* function
-        provided in the constructor. You can override this method to create a
-        customized JSON wrapper.
+        The default is to call the *dumps* function provided in the
+        constructor or the one of the default codec. You can override this
+        method to create a customized JSON wrapper.
         """
-        return self._dumps(obj)
+        if self._dumps is not None:
+            return self._dumps(obj)
+        return (_codec or get_json_codec()).dumps(obj)
 
     def prepare(self, conn):
         self._conn = conn
@@ -86,8 +190,84 @@ class Json:
         return self.getquoted().decode('ascii', 'replace')
 
 
+class LazyJson:
+    """A JSON document parsed only when its content is accessed.
+
+    Objects of this class are returned by the typecasters registered with
+    *lazy* set to `!True`. The text of the document is available in the
+    `!raw` attribute, the parsed object in the `!value` property; the object
+    also supports the read-only operations of the parsed dict or list
+    (indexing, iteration, `!len()`, `!get()`, `!keys()`...).
+
+    Passing the object as a query parameter, or in `~psycopg2.extras` copy
+    functions, uses the original text without parsing it.
+    """
+    __slots__ = ('raw', '_loads', '_value')
+
+    _unparsed = object()
+
+    def __init__(self, raw, loads=None):
+        self.raw = raw
+        self._loads = loads
+        self._value = self._unparsed
+
+    @property
+    def value(self):
+        """The document parsed into a Python object."""
+        value = self._value
+        if value is self._unparsed:
+            loads = self._loads or (_codec or get_json_codec()).loads
+            value = self._value = loads(self.raw)
+        return value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __contains__(self, item):
+        return item in self.value
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyJson):
+            other = other.value
+        return self.value == other
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        return self.value.get(key, default)
+
+    def keys(self):
+        return self.value.keys()
+
+    def values(self):
+        return self.value.values()
+
+    def items(self):
+        return self.value.items()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.raw!r})"
+
+    def __reduce__(self):
+        return self.__class__, (self.raw,)
+
+    def __conform__(self, proto):
+        if proto is ISQLQuote:
+            return Json(self.raw, dumps=str)
+
+
 def register_json(conn_or_curs=None, globally=False, loads=None,
-                  oid=None, array_oid=None, name='json'):
+                  oid=None, array_oid=None, name='json', lazy=False,
+                  type_cache=None):
     """Create and register typecasters converting :sql:`json` type to Python objects.
 
     :param conn_or_curs: a connection or cursor used to find the :sql:`json`
@@ -97,13 +277,16 @@ def register_json(conn_or_curs=None, globally=False, loads=None,
     :param globally: if `!False` register the typecasters only on
         *conn_or_curs*, otherwise register them globally
     :param loads: the function used to parse the data into a Python object. If
-        `!None` use `!json.loads()`, where `!json` is the module chosen
-        according to the Python version (see above)
+        `!None` use the one of the default codec (see `set_json_codec()`)
     :param oid: the OID of the :sql:`json` type if known; If not, it will be
         queried on *conn_or_curs*
     :param array_oid: the OID of the :sql:`json[]` array type if known;
         if not, it will be queried on *conn_or_curs*
     :param name: the name of the data type to look for in *conn_or_curs*
+    :param lazy: if `!True` return `LazyJson` objects, parsed only when
+        accessed
+    :param type_cache: a `~psycopg2.extras.TypeCache` to look up the type in,
+        instead of querying *conn_or_curs* every time
 
     The connection or cursor passed to the function will be used to query the
     database and look for the OID of the :sql:`json` type (or an alternative
@@ -112,10 +295,10 @@ def register_json(conn_or_curs=None, globally=False, loads=None,
 
     """
     if oid is None:
-        oid, array_oid = _get_json_oids(conn_or_curs, name)
+        oid, array_oid = _get_json_oids(conn_or_curs, name, type_cache)
 
     JSON, JSONARRAY = _create_json_typecasters(
-        oid, array_oid, loads=loads, name=name.upper())
+        oid, array_oid, loads=loads, name=name.upper(), lazy=lazy)
 
     register_type(JSON, not globally and conn_or_curs or None)
 
@@ -125,7 +308,8 @@ def register_json(conn_or_curs=None, globally=False, loads=None,
     return JSON, JSONARRAY
 
 
-def register_default_json(conn_or_curs=None, globally=False, loads=None):
+def register_default_json(conn_or_curs=None, globally=False, loads=None,
+                          lazy=False):
     """
     Create and register :sql:`json` typecasters for PostgreSQL 9.2 and following.
 
@@ -135,10 +319,11 @@ def register_default_json(conn_or_curs=None, globally=False, loads=None):
     All the parameters have the same meaning of `register_json()`.
     """
     return register_json(conn_or_curs=conn_or_curs, globally=globally,
-        loads=loads, oid=JSON_OID, array_oid=JSONARRAY_OID)
+        loads=loads, oid=JSON_OID, array_oid=JSONARRAY_OID, lazy=lazy)
 
 
-def register_default_jsonb(conn_or_curs=None, globally=False, loads=None):
+def register_default_jsonb(conn_or_curs=None, globally=False, loads=None,
+                           lazy=False):
     """
     Create and register :sql:`jsonb` typecasters for PostgreSQL 9.4 and following.
 
@@ -148,18 +333,31 @@ def register_default_jsonb(conn_or_curs=None, globally=False, loads=None):
     meaning of `register_json()`.
     """
     return register_json(conn_or_curs=conn_or_curs, globally=globally,
-        loads=loads, oid=JSONB_OID, array_oid=JSONBARRAY_OID, name='jsonb')
+        loads=loads, oid=JSONB_OID, array_oid=JSONBARRAY_OID, name='jsonb',
+        lazy=lazy)
 
 
-def _create_json_typecasters(oid, array_oid, loads=None, name='JSON'):
+def _create_json_typecasters(oid, array_oid, loads=None, name='JSON',
+                             lazy=False):
     """Create typecasters for json data type."""
-    if loads is None:
-        loads = json.loads
+    if lazy:
+        def typecast_json(s, cur):
+            if s is None:
+                return None
+            return LazyJson(s, loads)
+
+    elif loads is None:
+        # look up the codec at every call, to honour set_json_codec()
+        def typecast_json(s, cur):
+            if s is None:
+                return None
+            return (_codec or get_json_codec()).loads(s)
 
-    def typecast_json(s, cur):
-        if s is None:
-            return None
-        return loads(s)
+    else:
+        def typecast_json(s, cur):
+            if s is None:
+                return None
+            return loads(s)
 
     JSON = new_type((oid, ), name, typecast_json)
     if array_oid is not None:
@@ -170,11 +368,17 @@ def _create_json_typecasters(oid, array_oid, loads=None, name='JSON'):
     return JSON, JSONARRAY
 
 
-def _get_json_oids(conn_or_curs, name='json'):
+def _get_json_oids(conn_or_curs, name='json', type_cache=None):
     # lazy imports
     from psycopg2.extensions import STATUS_IN_TRANSACTION
     from psycopg2.extras import _solve_conn_curs
 
+    types = type_cache and type_cache.lookup(conn_or_curs, name)
+    if types:
+        types = [t for t in types if t.typname == name]
+    if types:
+        return types[0].oid, types[0].array_oid
+
     conn, curs = _solve_conn_curs(conn_or_curs)
 
     # Store the transaction status of the connection to revert it after use
@@ -26,6 +26,7 @@
 # License for more details.
 
 import re
+import weakref
 
 from psycopg2._psycopg import ProgrammingError, InterfaceError
 from psycopg2.extensions import ISQLQuote, adapt, register_adapter
@@ -195,15 +196,57 @@ class Range:
             return self.__gt__(other)
 
     def __getstate__(self):
+        # note: accessing the bounds parses a lazy range
         return {slot: getattr(self, slot)
-            for slot in self.__slots__ if hasattr(self, slot)}
+            for slot in ('_lower', '_upper', '_bounds') if hasattr(self, slot)}
 
     def __setstate__(self, state):
         for slot, value in state.items():
             setattr(self, slot, value)
 
 
-def register_range(pgrange, pyrange, conn_or_curs, globally=False):
+def _lazy_range(cls):
+    """Return a subclass of the `Range` subclass *cls* parsed on first access.
+
+    The instances are created with the bounds unset and the string to parse
+    in the extra `!_lazy` slot, so that only the lazy ranges pay for it.
+    """
+    class LazyRange(cls):
+        __slots__ = ('_lazy',)
+
+        def __getattr__(self, name):
+            if name not in ('_lower', '_upper', '_bounds'):
+                raise AttributeError(
+                    f"{self.__class__.__name__!r} object has no attribute "
+                    f"{name!r}")
+
+            caster, s, wcur, wconn = self._lazy
+            cur = wcur()
+            if cur is None:
+                conn = wconn()
+                if conn is None or conn.closed:
+                    raise InterfaceError(
+                        "can't parse the range: the cursor it was fetched "
+                        "from was deleted and the connection is closed")
+                cur = conn.cursor()
+            r = caster._parse(s, cur)
+            self._lower = r._lower
+            self._upper = r._upper
+            self._bounds = r._bounds
+            del self._lazy
+            return getattr(self, name)
+
+        def __reduce_ex__(self, protocol):
+            # pickled and copied as a parsed instance of the public class
+            return cls.__new__, (cls,), self.__getstate__()
+
+    LazyRange.__name__ = LazyRange.__qualname__ = cls.__name__
+    LazyRange.__module__ = cls.__module__
+    return LazyRange
+
+
+def register_range(pgrange, pyrange, conn_or_curs, globally=False, lazy=False,
+                   type_cache=None):
     """Create and register an adapter and the typecasters to convert between
     a PostgreSQL |range|_ type and a PostgreSQL `Range` subclass.
 
@@ -216,6 +259,12 @@ def register_range(pgrange, pyrange, conn_or_curs, globally=False):
         to this object, unless *globally* is set to `!True`
     :param globally: if `!False` (default) register the typecaster only on
         *conn_or_curs*, otherwise register it globally
+    :param lazy: if `!True` the ranges returned keep the string received from
+        the server and parse it only when their bounds are first accessed.
+        They are instances of a subclass of the range class: check their type
+        with `!isinstance()`
+    :param type_cache: a `~psycopg2.extras.TypeCache` to look up the type in,
+        instead of querying *conn_or_curs* every time
     :return: `RangeCaster` instance responsible for the conversion
 
     If a string is passed to *pyrange*, a new `Range` subclass is created
@@ -229,7 +278,8 @@ def register_range(pgrange, pyrange, conn_or_curs, globally=False):
     provided functions.
 
     """
-    caster = RangeCaster._from_db(pgrange, pyrange, conn_or_curs)
+    caster = RangeCaster._from_db(pgrange, pyrange, conn_or_curs, lazy=lazy,
+        type_cache=type_cache)
     caster._register(not globally and conn_or_curs or None)
     return caster
 
@@ -288,9 +338,19 @@ class RangeCaster:
     Objects of this class are usually created by `register_range()`. Manual
     creation could be useful if querying the database is not advisable: in
     this case the oids must be provided.
+
+    If *lazy* is `!True` the ranges are parsed only when their bounds are
+    first accessed, using the cursor they were fetched from or, if it was
+    deleted, a new cursor on its connection, which must still be open. The
+    ranges only keep weak references to the cursor and the connection. The
+    lazy ranges are instances of a subclass of the range class, with the
+    same name. The `!lazy` attribute can also be set on the casters of the
+    builtin range types, e.g. `!psycopg2._range.tstzrange_caster`.
     """
-    def __init__(self, pgrange, pyrange, oid, subtype_oid, array_oid=None):
+    def __init__(self, pgrange, pyrange, oid, subtype_oid, array_oid=None,
+            lazy=False):
         self.subtype_oid = subtype_oid
+        self.lazy = lazy
         self._create_ranges(pgrange, pyrange)
 
         name = self.adapter.name or self.adapter.__class__.__name__
@@ -338,20 +398,28 @@ class RangeCaster:
             raise TypeError(
                 'pyrange must be a type or a Range strict subclass')
 
+        self._lazy_range = _lazy_range(self.range)
+
     @classmethod
-    def _from_db(self, name, pyrange, conn_or_curs):
+    def _from_db(self, name, pyrange, conn_or_curs, lazy=False,
+                 type_cache=None):
         """Return a `RangeCaster` instance for the type *pgrange*.
 
         Raise `ProgrammingError` if the type is not found.
         """
         from psycopg2.extensions import STATUS_IN_TRANSACTION
-        from psycopg2.extras import _solve_conn_curs
+        from psycopg2.extras import _solve_conn_curs, _lookup_type
         conn, curs = _solve_conn_curs(conn_or_curs)
 
         if conn.info.server_version < 90200:
             raise ProgrammingError("range types not available in version %s"
                 % conn.info.server_version)
 
+        t = _lookup_type(type_cache, conn_or_curs, name, 'range')
+        if t is not None:
+            return RangeCaster(name, pyrange, oid=t.oid,
+                subtype_oid=t.subtype_oid, array_oid=t.array_oid, lazy=lazy)
+
         # Store the transaction status of the connection to revert it after use
         conn_status = conn.status
 
@@ -413,7 +481,7 @@ WHERE t.oid = %s::regtype
         type, subtype, array = rec[:3]
 
         return RangeCaster(name, pyrange,
-            oid=type, subtype_oid=subtype, array_oid=array)
+            oid=type, subtype_oid=subtype, array_oid=array, lazy=lazy)
 
     _re_range = re.compile(r"""
         ( \(|\[ )                   # lower bound flag
@@ -435,6 +503,14 @@ WHERE t.oid = %s::regtype
         if s is None:
             return None
 
+        if self.lazy and cur is not None:
+            r = self._lazy_range.__new__(self._lazy_range)
+            r._lazy = (self, s, weakref.ref(cur), weakref.ref(cur.connection))
+            return r
+
+        return self._parse(s, cur)
+
+    def _parse(self, s, cur):
         if s == 'empty':
             return self.range(empty=True)
 
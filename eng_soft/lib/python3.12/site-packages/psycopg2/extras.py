@@ -29,7 +29,14 @@ and classes until a better place in the distribution is found.
 import os as _os
 import time as _time
 import re as _re
+import datetime as _datetime
+import decimal as _decimal
+import itertools as _itertools
+import struct as _struct
+import weakref as _weakref
 from collections import namedtuple, OrderedDict
+from math import log2 as _log2
+from operator import itemgetter as _itemgetter
 
 import logging as _logging
 
@@ -49,7 +56,8 @@ from psycopg2._psycopg import (                             # noqa
 
 # expose the json adaptation stuff into the module
 from psycopg2._json import (                                # noqa
-    json, Json, register_json, register_default_json, register_default_jsonb)
+    json, Json, register_json, register_default_json, register_default_jsonb,
+    JsonCodec, LazyJson, get_json_codec, set_json_codec)
 
 
 # Expose range-related objects
@@ -386,6 +394,144 @@ def _cached_make_nt(cls, key):
 NamedTupleCursor._cached_make_nt = classmethod(_cached_make_nt)
 
 
+class CompactDictConnection(_connection):
+    """A connection that uses `CompactDictCursor` automatically."""
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', self.cursor_factory or CompactDictCursor)
+        return super().cursor(*args, **kwargs)
+
+
+class CompactDictCursor(_cursor):
+    """A cursor returning records as lightweight `CompactDictRow` objects.
+
+    The records can be used in place of the ones returned by `DictCursor`
+    (accessing the values by index or by column name, using `!keys()`,
+    `!items()` etc.), but they are immutable tuples with no per-record
+    attribute: the column name -> index mapping is shared by all the records
+    of a result set, so creating them is cheaper and they take less memory.
+    """
+    Row = None
+
+    def execute(self, query, vars=None):
+        self.Row = None
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars):
+        self.Row = None
+        return super().executemany(query, vars)
+
+    def callproc(self, procname, vars=None):
+        self.Row = None
+        return super().callproc(procname, vars)
+
+    def fetchone(self):
+        t = super().fetchone()
+        if t is not None:
+            row = self.Row
+            if row is None:
+                row = self.Row = self._make_row()
+            return _tuple_new(row, t)
+
+    def fetchmany(self, size=None):
+        ts = super().fetchmany(size)
+        row = self.Row
+        if row is None:
+            row = self.Row = self._make_row()
+        return [_tuple_new(row, t) for t in ts]
+
+    def fetchall(self):
+        ts = super().fetchall()
+        row = self.Row
+        if row is None:
+            row = self.Row = self._make_row()
+        return [_tuple_new(row, t) for t in ts]
+
+    def __iter__(self):
+        try:
+            it = super().__iter__()
+            t = next(it)
+
+            row = self.Row
+            if row is None:
+                row = self.Row = self._make_row()
+
+            yield _tuple_new(row, t)
+
+            while True:
+                yield _tuple_new(row, next(it))
+        except StopIteration:
+            return
+
+    def _make_row(self):
+        key = tuple(d[0] for d in self.description) if self.description else ()
+        return _cached_make_row(key)
+
+
+class CompactDictRow(tuple):
+    """A record allowing by-column-name access to data.
+
+    Every result set uses a different subclass, whose `!_index` maps the
+    column names to their position in the record.
+    """
+
+    __slots__ = ()
+
+    _key = ()
+    _index = {}
+
+    def __getitem__(self, x):
+        if not isinstance(x, (int, slice)):
+            x = self._index[x]
+        return tuple.__getitem__(self, x)
+
+    def items(self):
+        g = tuple.__getitem__
+        return ((n, g(self, i)) for n, i in self._index.items())
+
+    def keys(self):
+        return iter(self._index)
+
+    def values(self):
+        g = tuple.__getitem__
+        return (g(self, i) for i in self._index.values())
+
+    def get(self, x, default=None):
+        try:
+            return self[x]
+        except Exception:
+            return default
+
+    def copy(self):
+        return OrderedDict(self.items())
+
+    def __contains__(self, x):
+        return x in self._index
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def __reduce__(self):
+        # the subclasses are created on the fly: pickle the column names
+        return _make_compact_row, (self._key, tuple(self))
+
+
+_tuple_new = tuple.__new__
+
+
+@lru_cache(512)
+def _cached_make_row(key):
+    index = {}
+    for i, name in enumerate(key):
+        index[name] = i
+    return type(CompactDictRow)(
+        'CompactDictRow', (CompactDictRow,),
+        {'__slots__': (), '_key': key, '_index': index})
+
+
+def _make_compact_row(key, values):
+    return _tuple_new(_cached_make_row(key), values)
+
+
 class LoggingConnection(_connection):
     """A connection that logs all queries to a file or logger__ object.
 
@@ -493,6 +639,782 @@ class MinTimeLoggingCursor(LoggingCursor):
         return LoggingCursor.callproc(self, procname, vars)
 
 
+class QueryStats:
+    """Collect aggregate statistics about the queries executed.
+
+    Queries are grouped by *fingerprint*: the query text with the literals
+    and the placeholders replaced by ``?`` and the whitespaces normalized.
+    For every fingerprint the number of executions and errors, the time
+    spent, the rows returned or affected and the size of the queries sent
+    are accumulated, together with a histogram of the execution times from
+    which percentiles are estimated.
+
+    The object is thread-safe and can be shared among several connections.
+    """
+
+    # Histogram buckets grow by a factor of 2 ** (1 / _BUCKET_RES), up to
+    # about an hour (in microseconds)
+    _BUCKET_RES = 4
+    _NBUCKETS = 128
+
+    def __init__(self):
+        import threading
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, query, duration, rows=-1, nbytes=0, error=False):
+        """Account for an execution of *query* lasting *duration* seconds."""
+        key = _fingerprint(query)
+        us = duration * 1e6
+        bucket = int(_log2(us) * self._BUCKET_RES) if us > 1.0 else 0
+        if bucket >= self._NBUCKETS:
+            bucket = self._NBUCKETS - 1
+
+        self._lock.acquire()
+        try:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = _QueryStat(self._NBUCKETS)
+            stat.calls += 1
+            stat.total_time += duration
+            if duration < stat.min_time:
+                stat.min_time = duration
+            if duration > stat.max_time:
+                stat.max_time = duration
+            if rows > 0:
+                stat.rows += rows
+            stat.bytes += nbytes
+            if error:
+                stat.errors += 1
+            stat.buckets[bucket] += 1
+        finally:
+            self._lock.release()
+
+    def snapshot(self, reset=False):
+        """Return the statistics collected as a list of dictionaries.
+
+        The list is sorted by total execution time, the slowest first. Every
+        item has keys *query* (the fingerprint), *calls*, *errors*, *rows*,
+        *bytes*, and *total_time*, *mean_time*, *min_time*, *max_time*,
+        *p50*, *p95*, *p99* (in seconds). If *reset* is true, clear the
+        statistics collected.
+        """
+        self._lock.acquire()
+        try:
+            stats = self._stats
+            if reset:
+                self._stats = {}
+            else:
+                stats = {k: v.copy() for k, v in stats.items()}
+        finally:
+            self._lock.release()
+
+        rv = [stat.as_dict(query) for query, stat in stats.items()]
+        rv.sort(key=_itemgetter('total_time'), reverse=True)
+        return rv
+
+    def reset(self):
+        """Clear the statistics collected."""
+        self._lock.acquire()
+        try:
+            self._stats = {}
+        finally:
+            self._lock.release()
+
+
+class _QueryStat:
+    __slots__ = ('calls', 'errors', 'total_time', 'min_time', 'max_time',
+        'rows', 'bytes', 'buckets')
+
+    def __init__(self, nbuckets):
+        self.calls = self.errors = self.rows = self.bytes = 0
+        self.total_time = self.max_time = 0.0
+        self.min_time = float('inf')
+        self.buckets = [0] * nbuckets
+
+    def copy(self):
+        rv = _QueryStat(0)
+        for attr in self.__slots__:
+            setattr(rv, attr, getattr(self, attr))
+        rv.buckets = self.buckets[:]
+        return rv
+
+    def as_dict(self, query):
+        return {
+            'query': query,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'total_time': self.total_time,
+            'mean_time': self.total_time / self.calls,
+            'min_time': self.min_time,
+            'max_time': self.max_time,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+        }
+
+    def percentile(self, p):
+        """Estimate a percentile of the duration as a bucket upper bound."""
+        target = p * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                t = 2.0 ** ((i + 1) / QueryStats._BUCKET_RES) / 1e6
+                # the bucket bound can't be more precise than the extremes
+                return max(self.min_time, min(t, self.max_time))
+        return self.max_time
+
+
+_re_fp_literal = _re.compile(r"""
+    '(?:[^']|'')*'                          # string
+    | \$(?P<tag>\w*)\$.*?\$(?P=tag)\$       # dollar-quoted string
+    | %\([^)]*\)s | %s                      # placeholders
+    | \b\d+(?:\.\d*)?(?:[eE][-+]?\d+)?\b    # numbers
+    | \$\d+                                 # positional parameters
+    """, _re.X | _re.S)
+_re_fp_space = _re.compile(r'\s+')
+_re_fp_list = _re.compile(r'\?(?:\s*,\s*\?)+')
+
+
+@lru_cache(1024)
+def _fingerprint(query):
+    """Return the normalized form of a query, with the literals removed."""
+    if isinstance(query, bytes):
+        query = query.decode('utf8', 'replace')
+    elif not isinstance(query, str):
+        query = str(query)
+    query = _re_fp_literal.sub('?', query)
+    query = _re_fp_list.sub('?, ...', query)
+    return _re_fp_space.sub(' ', query).strip()
+
+
+default_query_stats = QueryStats()
+
+
+class StatsConnection(_connection):
+    """A connection collecting statistics about the queries executed.
+
+    The statistics are accumulated in `!stats`, by default the process-wide
+    `default_query_stats` collector; call `initialize()` to use a different
+    `QueryStats` instance. Query the statistics using its
+    `~QueryStats.snapshot()` method.
+    """
+    stats = default_query_stats
+
+    def initialize(self, stats):
+        """Collect the statistics of the connection in `!stats`."""
+        self.stats = stats
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', self.cursor_factory or StatsCursor)
+        return super().cursor(*args, **kwargs)
+
+
+class StatsCursor(_cursor):
+    """The cursor sub-class companion to `StatsConnection`.
+
+    The cursor can also be used on a regular connection: in this case the
+    statistics are accumulated in `default_query_stats`.
+    """
+
+    def execute(self, query, vars=None):
+        t0 = _time.perf_counter()
+        error = True
+        try:
+            rv = super().execute(query, vars)
+            error = False
+            return rv
+        finally:
+            self._record(query, _time.perf_counter() - t0, error)
+
+    def callproc(self, procname, vars=None):
+        t0 = _time.perf_counter()
+        error = True
+        try:
+            rv = super().callproc(procname, vars)
+            error = False
+            return rv
+        finally:
+            self._record(procname, _time.perf_counter() - t0, error)
+
+    def _record(self, query, duration, error):
+        stats = getattr(self.connection, 'stats', default_query_stats)
+        q = self.query
+        if not isinstance(query, (str, bytes)):
+            # e.g. sql.Composable: use the query sent instead
+            query = q or ''
+        rows = self.rowcount if not error else -1
+        stats.record(query, duration, rows, len(q) if q else 0, error)
+
+
+class ResultCache:
+    """An in-memory cache of query results, used by `CachingCursor`.
+
+    :param max_bytes: the approximate size of the results to keep; when it is
+        exceeded the least recently used results are discarded
+    :param ttl: the number of seconds a result is kept if not specified in
+        `CachingCursor.execute()`; if `!None` only the queries executed
+        specifying a *ttl* are cached
+
+    Results can be associated to *tags* (e.g. the names of the tables they
+    read) and discarded using `invalidate()`. The object is thread-safe and
+    can be shared among several connections.
+
+    The `!generation` attribute is incremented by every invalidation: a
+    result computed while an invalidation happens can be stale, so `put()`
+    discards it if passed the `!generation` read before running the query.
+    """
+
+    # estimated memory used by a record in addition to its values
+    _ROW_OVERHEAD = 64
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=None):
+        import threading
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.generation = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> _CacheEntry
+        self._tags = {}                 # tag -> set of keys
+        self._listener = None
+
+    def get(self, key):
+        """Return the `!(description, rows, rowcount, statusmessage)` cached
+        for *key*.
+
+        Return `!None` if the key is not in the cache or is expired.
+        """
+        self._lock.acquire()
+        try:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > _time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return (entry.description, entry.rows, entry.rowcount,
+                        entry.statusmessage)
+                self._remove(key)
+            self.misses += 1
+            return None
+        finally:
+            self._lock.release()
+
+    def put(self, key, description, rows, rowcount, statusmessage=None,
+            ttl=None, tags=(), generation=None):
+        """Store a query result in the cache for *ttl* seconds.
+
+        *key* is a tuple whose first item is the query. If *generation* is
+        specified and the cache was invalidated since it was read, the
+        result is not stored.
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl is None or ttl <= 0:
+            return
+
+        nbytes = (_batch_bytes(rows) if rows else 0) \
+            + len(rows) * self._ROW_OVERHEAD + len(key[0])
+        if nbytes > self.max_bytes:
+            return
+
+        entry = _CacheEntry(_time.monotonic() + ttl, nbytes,
+            description, rows, rowcount, statusmessage, tuple(tags))
+        self._lock.acquire()
+        try:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.nbytes += nbytes
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        finally:
+            self._lock.release()
+
+    def invalidate(self, *tags):
+        """Discard the results associated to any of *tags*."""
+        self._lock.acquire()
+        try:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        """Discard all the results."""
+        self._lock.acquire()
+        try:
+            self.generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self.nbytes = 0
+        finally:
+            self._lock.release()
+
+    def handle_notify(self, notify):
+        """Invalidate the tags listed in the payload of a notification.
+
+        The payload is a comma-separated list of tags; an empty payload
+        invalidates the entire cache.
+        """
+        tags = [t.strip() for t in notify.payload.split(',') if t.strip()]
+        if tags:
+            self.invalidate(*tags)
+        else:
+            self.clear()
+
+    def listen(self, conn, channel='result_cache'):
+        """Invalidate the cache when notified on *channel*.
+
+        :param conn: a connection dedicated to receive the notifications; it
+            is put in autocommit mode and used by a background thread until
+            `close()` is called
+        :param channel: the channel to :sql:`LISTEN` to
+
+        The notifications are handled by `handle_notify()`. They can be sent
+        by a trigger on the tables whose results are cached, e.g. running
+        :sql:`pg_notify('result_cache', TG_TABLE_NAME)`.
+        """
+        import threading
+        if self._listener is not None:
+            raise psycopg2.ProgrammingError("the cache is already listening")
+
+        conn.autocommit = True
+        curs = conn.cursor(cursor_factory=_cursor)
+        curs.execute("LISTEN " + quote_ident(channel, curs))
+        curs.close()
+
+        stop = threading.Event()
+        thread = threading.Thread(target=self._listen, args=(conn, stop),
+            name="psycopg2-cache-listener", daemon=True)
+        self._listener = (thread, stop)
+        thread.start()
+
+    def close(self):
+        """Stop listening to notifications started by `listen()`."""
+        if self._listener is not None:
+            thread, stop = self._listener
+            self._listener = None
+            stop.set()
+            thread.join()
+
+    def _listen(self, conn, stop):
+        import select
+        while not stop.is_set():
+            if select.select([conn], [], [], 0.5) == ([], [], []):
+                continue
+            try:
+                conn.poll()
+            except psycopg2.Error:
+                # we can't tell what changed anymore
+                self.clear()
+                return
+            while conn.notifies:
+                self.handle_notify(conn.notifies.pop(0))
+
+    def _remove(self, key):
+        """Remove an entry from the cache. Call with the lock."""
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class _CacheEntry:
+    __slots__ = ('expires', 'nbytes', 'description', 'rows', 'rowcount',
+        'statusmessage', 'tags')
+
+    def __init__(self, expires, nbytes, description, rows, rowcount,
+            statusmessage, tags):
+        self.expires = expires
+        self.nbytes = nbytes
+        self.description = description
+        self.rows = rows
+        self.rowcount = rowcount
+        self.statusmessage = statusmessage
+        self.tags = tags
+
+
+class CachingConnection(_connection):
+    """A connection that uses `CachingCursor` automatically.
+
+    Call `initialize()` to choose the `ResultCache` to use.
+    """
+
+    def initialize(self, cache):
+        """Store the results of the connection in *cache*."""
+        self._cache = cache
+
+    def cursor(self, *args, **kwargs):
+        if not hasattr(self, '_cache'):
+            raise self.ProgrammingError(
+                "CachingConnection object has not been initialize()d")
+        kwargs.setdefault('cursor_factory', self.cursor_factory or CachingCursor)
+        return super().cursor(*args, **kwargs)
+
+
+class CachingCursor(_cursor):
+    """A cursor storing the result of queries in a `ResultCache`.
+
+    The result of a query is looked up in the cache using the query with its
+    parameters merged and the connection dsn. On a cache hit `!query` and
+    `!statusmessage` are the ones of the cached result. Results are only cached for
+    queries executed specifying a *ttl*, or for :sql:`SELECT`, :sql:`VALUES`
+    and :sql:`TABLE` statements if the cache has a default *ttl*. The cache is
+    only used by queries executed outside a transaction, i.e. in autocommit
+    mode or as the first query of a transaction: the ones executed in a
+    transaction already started read from the database.
+
+    The cache is the one of the connection, see `CachingConnection`; it can
+    be also set using the `!cache` attribute of the cursor. The class can
+    be mixed with the other cursor classes to cache their records, e.g.
+    ``class CachingDictCursor(CachingCursor, DictCursor)``. Note that the
+    same records objects are returned to all the cursors reading them.
+    """
+    cache = None
+    _cached = None
+
+    def execute(self, query, vars=None, ttl=None, tags=()):
+        """Execute a query, or return its results from the cache.
+
+        :param ttl: the number of seconds to keep the results in the cache
+        :param tags: tags to associate to the results, e.g. the names of the
+            tables they read, to discard them using `ResultCache.invalidate()`
+        """
+        self._cached = None
+        cache = self.cache
+        if cache is None:
+            cache = getattr(self.connection, '_cache', None)
+        if (cache is None or self.name is not None or (ttl is None
+                and (cache.ttl is None or not _is_cacheable(query)))):
+            return super().execute(query, vars)
+
+        # in a transaction the results must reflect its snapshot and writes
+        if (self.connection.info.transaction_status
+                != _ext.TRANSACTION_STATUS_IDLE):
+            return super().execute(query, vars)
+
+        key = (self.mogrify(query, vars), self.connection.dsn)
+        rv = cache.get(key)
+        if rv is None:
+            # an invalidation while the query runs may make its result stale
+            generation = cache.generation
+            super().execute(query, vars)
+            description = super().description
+            if description is None:
+                # nothing to cache
+                return
+            rowcount = super().rowcount
+            rv = (description, super().fetchall(), rowcount,
+                super().statusmessage)
+            cache.put(key, *rv, ttl=ttl, tags=tags, generation=generation)
+
+        self._cached = rv
+        self._cached_query = key[0]
+        self._pos = 0
+
+    def executemany(self, query, vars_list):
+        self._cached = None
+        return super().executemany(query, vars_list)
+
+    def callproc(self, procname, vars=None):
+        self._cached = None
+        return super().callproc(procname, vars)
+
+    @property
+    def description(self):
+        if self._cached is not None:
+            return self._cached[0]
+        return super().description
+
+    @property
+    def rowcount(self):
+        if self._cached is not None:
+            return self._cached[2]
+        return super().rowcount
+
+    @property
+    def rownumber(self):
+        if self._cached is not None:
+            return self._pos
+        return super().rownumber
+
+    @property
+    def statusmessage(self):
+        if self._cached is not None:
+            return self._cached[3]
+        return super().statusmessage
+
+    @property
+    def query(self):
+        if self._cached is not None:
+            return self._cached_query
+        return super().query
+
+    def fetchone(self):
+        if self._cached is None:
+            return super().fetchone()
+        rows = self._cached[1]
+        if self._pos < len(rows):
+            self._pos += 1
+            return rows[self._pos - 1]
+
+    def fetchmany(self, size=None):
+        if self._cached is None:
+            return super().fetchmany(size)
+        if size is None:
+            size = self.arraysize
+        rv = self._cached[1][self._pos:self._pos + size]
+        self._pos += len(rv)
+        return rv
+
+    def fetchall(self):
+        if self._cached is None:
+            return super().fetchall()
+        rv = self._cached[1][self._pos:]
+        self._pos += len(rv)
+        return rv
+
+    def __iter__(self):
+        if self._cached is None:
+            return super().__iter__()
+        return self._iter_cached()
+
+    def _iter_cached(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def scroll(self, value, mode='relative'):
+        if self._cached is None:
+            return super().scroll(value, mode)
+        pos = self._pos + value if mode == 'relative' else value
+        if not 0 <= pos <= len(self._cached[1]):
+            raise psycopg2.ProgrammingError("scroll destination out of bounds")
+        self._pos = pos
+
+
+_re_cacheable = _re.compile(r"\s*(?:select|values|table)\b", _re.I)
+
+
+def _is_cacheable(query):
+    if isinstance(query, bytes):
+        query = query.decode('ascii', 'replace')
+    elif not isinstance(query, str):
+        # e.g. sql.Composable: only cached on request
+        return False
+    return bool(_re_cacheable.match(query))
+
+
+class PreparingConnection(_connection):
+    """A connection preparing the queries executed repeatedly.
+
+    When a query is executed `prepare_threshold` times with the same text,
+    it is prepared on the server (using :sql:`PREPARE`) and later executions
+    only send the parameters (using :sql:`EXECUTE`), saving the server the
+    parsing and planning of the query. At most `prepared_max` statements
+    are kept: the least recently used ones are released using
+    :sql:`DEALLOCATE`. Both the attributes can be changed on the connection
+    or in a subclass; set `!prepare_threshold` to `!None` to disable
+    preparation.
+
+    Prepared statements last as long as the session, so they are reused
+    when the connection is returned to a `~psycopg2.pool` and handed out
+    again: create the pool passing ``connection_factory=PreparingConnection``.
+    If the session is reset (e.g. by :sql:`DISCARD ALL`) call
+    `clear_prepared()`.
+
+    The attributes `!prepared_hits` and `!prepared_misses` count the queries
+    executed respectively using a prepared statement or not.
+
+    Note that the types of the parameters of a prepared statement are
+    inferred by the server from the query, so a parameter used in a
+    context where its type is not clear (e.g. :sql:`SELECT %s`) will be
+    returned as a string. Only :sql:`SELECT`, :sql:`INSERT`, :sql:`UPDATE`,
+    :sql:`DELETE`, :sql:`WITH`, :sql:`VALUES` statements executed with
+    `~cursor.execute()` on client-side cursors are prepared, and only if
+    they contain a single statement.
+    """
+    prepare_threshold = 5
+    prepared_max = 100
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+        self._prepared = OrderedDict()  # (query, no params?) -> (name, EXECUTE)
+        self._counts = OrderedDict()    # (query, no params?) -> executions
+        self._nprepared = 0
+        self._failed = []   # names maybe prepared by a failed execution
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', self.cursor_factory or PreparingCursor)
+        return super().cursor(*args, **kwargs)
+
+    def clear_prepared(self):
+        """Forget the prepared statements, without releasing them."""
+        self._prepared.clear()
+        self._counts.clear()
+        del self._failed[:]
+
+
+class PreparingCursor(_cursor):
+    """The cursor sub-class companion to `PreparingConnection`."""
+
+    def execute(self, query, vars=None):
+        conn = self.connection
+        if (self.name is not None or conn.prepare_threshold is None
+                or not isinstance(query, (str, bytes))):
+            return super().execute(query, vars)
+
+        if (conn._failed and conn.info.transaction_status
+                != _ext.TRANSACTION_STATUS_INERROR):
+            self._deallocate_failed()
+
+        key = (query, vars is None)
+        prepared = conn._prepared
+        if key in prepared:
+            prepared.move_to_end(key)
+            stmt = prepared[key]
+            if stmt is None:
+                # not a preparable statement
+                return super().execute(query, vars)
+            conn.prepared_hits += 1
+            return super().execute(stmt[1], vars)
+
+        conn.prepared_misses += 1
+        counts = conn._counts
+        n = counts.pop(key, 0) + 1
+        if n < conn.prepare_threshold:
+            counts[key] = n
+            if len(counts) > conn.prepared_max:
+                counts.popitem(last=False)
+            return super().execute(query, vars)
+
+        if isinstance(query, bytes):
+            query = query.decode(_ext.encodings[conn.encoding])
+        conn._nprepared += 1
+        name = f"_pg2_{conn._nprepared}"
+        stmts = _prepare_statements(query, name, vars is not None)
+
+        while len(prepared) >= conn.prepared_max:
+            old = prepared.popitem(last=False)[1]
+            if old is not None:
+                super().execute("DEALLOCATE " + old[0])
+
+        if stmts is None:
+            prepared[key] = None
+            return super().execute(query, vars)
+
+        # prepare and execute the statement in the same round trip (the
+        # newline ends a comment at the end of the query)
+        try:
+            rv = super().execute(stmts[0] + "\n;" + stmts[1], vars)
+        except Exception:
+            # The PREPARE may have succeeded even if the EXECUTE failed:
+            # release the statement once the transaction is usable again.
+            conn._failed.append(name)
+            raise
+        prepared[key] = (name, stmts[1])
+        return rv
+
+    def _deallocate_failed(self):
+        """Release the statements prepared by executions that failed."""
+        conn = self.connection
+        names = conn._failed[:]
+        del conn._failed[:]
+        super().execute(
+            "SELECT name FROM pg_prepared_statements WHERE name = ANY(%s)",
+            (names,))
+        for row in self.fetchall():
+            super().execute("DEALLOCATE " + row[0])
+
+
+_re_preparable = _re.compile(
+    r"\s*(?:select|insert|update|delete|with|values)\b", _re.I)
+_re_prepare_param = _re.compile(r"%(?:\(([^)]*)\)s|s|%)|%")
+
+# Literals and comments, which may contain a ';' not separating statements
+_re_sql_tokens = _re.compile(r"""
+    [eE]'(?:[^'\\]|\\.|'')*'            # escape string
+    | '(?:[^']|'')*'                    # string
+    | "(?:[^"]|"")*"                    # quoted identifier
+    | \$([A-Za-z_][A-Za-z_0-9]*|)\$.*?\$\1\$  # dollar-quoted string
+    | --[^\n]*                          # line comment
+    | /\*.*?\*/                         # block comment
+    | ;
+    """, _re.S | _re.X)
+
+
+def _prepare_statements(query, name, params=True):
+    """Convert *query* into a :sql:`PREPARE` and an :sql:`EXECUTE` statement.
+
+    Return the pair of statements, to be executed with the same parameters
+    as *query*, or `!None` if the query cannot be prepared.
+    """
+    if not _re_preparable.match(query):
+        return None
+
+    # Only a single statement can be prepared
+    if any(m.group() == ';' for m in _re_sql_tokens.finditer(query)):
+        return None
+
+    if not params:
+        return f"PREPARE {name} AS {query}", f"EXECUTE {name}"
+
+    parts = []
+    args = []
+    names = {}
+    pos = 0
+    for m in _re_prepare_param.finditer(query):
+        parts.append(query[pos:m.start()])
+        pos = m.end()
+        token = m.group()
+        if token == '%%':
+            parts.append(token)
+        elif token == '%s':
+            if names:
+                return None
+            args.append(token)
+            parts.append(f"${len(args)}")
+        elif m.group(1) is not None:
+            if len(args) > len(names):
+                return None
+            if token not in names:
+                args.append(token)
+                names[token] = len(args)
+            parts.append(f"${names[token]}")
+        else:
+            # unsupported format: let execute() raise the error
+            return None
+    parts.append(query[pos:])
+
+    prepare = f"PREPARE {name} AS {''.join(parts)}"
+    if args:
+        return prepare, f"EXECUTE {name} ({', '.join(args)})"
+    else:
+        return prepare, f"EXECUTE {name}"
+
+
 class LogicalReplicationConnection(_replicationConnection):
 
     def __init__(self, *args, **kwargs):
@@ -770,19 +1692,229 @@ def wait_select(conn):
             continue
 
 
+async def wait_asyncio(conn):
+    """Wait until an asynchronous connection has data available, using asyncio.
+
+    The coroutine is the asyncio counterpart of `wait_select()`: instead of
+    blocking in :py:func:`~select.select()` it drives `~connection.poll()`
+    watching the connection file descriptor with the running event loop, so
+    other tasks can run while the server works. Use it after creating an
+    asynchronous connection or after executing a command on one of its
+    cursors.
+    """
+    import asyncio
+    from psycopg2.extensions import POLL_OK, POLL_READ, POLL_WRITE
+
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == POLL_OK:
+            break
+        elif state == POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise conn.OperationalError(f"bad state from poll: {state}")
+
+        fileno = conn.fileno()
+        ready = loop.create_future()
+        add(fileno, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(fileno)
+
+
 def _solve_conn_curs(conn_or_curs):
     """Return the connection and a DBAPI cursor from a connection or cursor."""
     if conn_or_curs is None:
         raise psycopg2.ProgrammingError("no connection or cursor provided")
 
-    if hasattr(conn_or_curs, 'execute'):
-        conn = conn_or_curs.connection
-        curs = conn.cursor(cursor_factory=_cursor)
-    else:
-        conn = conn_or_curs
-        curs = conn.cursor(cursor_factory=_cursor)
+    if hasattr(conn_or_curs, 'execute'):
+        conn = conn_or_curs.connection
+        curs = conn.cursor(cursor_factory=_cursor)
+    else:
+        conn = conn_or_curs
+        curs = conn.cursor(cursor_factory=_cursor)
+
+    return conn, curs
+
+
+# Catalog information about a data type: *name* is the name the type was
+# looked up with, *subtype_oid* is the subtype of a range, *attrs* the list
+# of (name, oid) of the attributes of a composite type.
+TypeInfo = namedtuple('TypeInfo',
+    'name oid array_oid typname schema subtype_oid attrs')
+
+
+class TypeCache:
+    """Cache the catalog information about the data types of the databases.
+
+    The functions registering typecasters for types whose oid is not known
+    in advance (`register_hstore()`, `register_composite()`,
+    `register_range()`, `~psycopg2.extras.register_json()`) accept a
+    *type_cache* parameter: if a `!TypeCache` is passed, they look up their
+    type in it instead of running their own catalog queries. Pass the same
+    cache when registering types on all the connections of a pool::
+
+        type_cache = TypeCache()
+
+        def setup(conn):
+            register_hstore(conn, type_cache=type_cache)
+            register_composite('card', conn, type_cache=type_cache)
+
+    The cache remembers all the type names ever looked up in a database: the
+    first lookup on a connection fetches all of them with a single query, so
+    a new connection pays one catalog round trip, and the types dropped and
+    created again since are seen. Later lookups on the same connection are
+    served from the cache. The information is keyed by database host, port
+    and name and is discarded if the server version changes, e.g. after a
+    failover on a server running a different version.
+
+    Types not found are not cached and fall back to the registering
+    functions' own queries, so error messages and lookup rules are unchanged.
+    The cache is only used on PostgreSQL 9.2 or later.
+    """
+    def __init__(self):
+        import threading
+        self._lock = threading.Lock()
+        self._names = set()
+        self._servers = {}
+        self._checked = _weakref.WeakSet()
+
+    def lookup(self, conn_or_curs, name):
+        """Return the list of `TypeInfo` for the types named *name*.
+
+        *name* can be schema-qualified: the list contains the types with
+        that name in any schema. Return `!None` if the types cannot be looked
+        up, or if no type with the name was found.
+        """
+        conn, curs = _solve_conn_curs(conn_or_curs)
+        return self._lookup(conn, curs, [name]).get(name)
+
+    def prefetch(self, conn_or_curs, names):
+        """Look up several type names at once.
+
+        Later `lookup()` of the same names, on any connection to the same
+        database, will be served from the cache.
+        """
+        names = list(names)
+        if names:
+            conn, curs = _solve_conn_curs(conn_or_curs)
+            self._lookup(conn, curs, names)
+
+    def clear(self):
+        """Discard the information cached."""
+        self._lock.acquire()
+        try:
+            self._servers.clear()
+            self._checked.clear()
+        finally:
+            self._lock.release()
+
+    def _lookup(self, conn, curs, names):
+        if conn.async_ or conn.info.server_version < 90200:
+            return {}
+
+        key = (conn.info.host, conn.info.port, conn.info.dbname)
+        version = conn.info.server_version
+        self._lock.acquire()
+        try:
+            server = self._servers.get(key)
+            checked = (server is not None and server[0] == version
+                and conn in self._checked)
+            if checked:
+                rv = {n: server[1][n] for n in names if n in server[1]}
+                fetch = [n for n in names if n not in rv]
+                if not fetch:
+                    return rv
+            else:
+                # first use of the connection: refresh all the names
+                rv = {}
+                fetch = sorted(self._names.union(names))
+        finally:
+            self._lock.release()
+
+        types = self._fetch(conn, curs, fetch)
+
+        self._lock.acquire()
+        try:
+            server = self._servers.get(key)
+            if not checked or server is None or server[0] != version:
+                server = self._servers[key] = (version, {})
+            server[1].update(types)
+            # forget the names not found, e.g. misspelled ones
+            self._names.difference_update(fetch)
+            self._names.update(types)
+            self._checked.add(conn)
+        finally:
+            self._lock.release()
+
+        rv.update((n, types[n]) for n in names if n in types)
+        return rv
+
+    def _fetch(self, conn, curs, names):
+        # Store the transaction status of the connection to revert it after use
+        conn_status = conn.status
+
+        # the type names, without the schema if specified
+        curs.execute("""\
+SELECT n.name, t.oid, t.typarray, t.typname, ns.nspname, r.rngsubtype,
+    ARRAY(SELECT attname::text FROM pg_attribute
+        WHERE attrelid = t.typrelid AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum),
+    ARRAY(SELECT atttypid::int8 FROM pg_attribute
+        WHERE attrelid = t.typrelid AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum)
+FROM unnest(%s::text[]) AS n(name)
+JOIN pg_type t ON t.typname = substr(n.name, strpos(n.name, '.') + 1)
+JOIN pg_namespace ns ON ns.oid = t.typnamespace
+LEFT JOIN pg_range r ON r.rngtypid = t.oid
+ORDER BY n.name, t.oid
+""", (names,))
+        recs = curs.fetchall()
+
+        # revert the status of the connection as before the command
+        if conn_status != _ext.STATUS_IN_TRANSACTION and not conn.autocommit:
+            conn.rollback()
+
+        rv = {}
+        for rec in recs:
+            rv.setdefault(rec[0], []).append(TypeInfo(
+                rec[0], rec[1], rec[2], rec[3], rec[4], rec[5],
+                list(zip(rec[6], rec[7]))))
+        return rv
+
+
+def _lookup_type(type_cache, conn_or_curs, name, kind=None):
+    """Return the `TypeInfo` of the type *name* from *type_cache*.
+
+    Choose the type in the schema specified in *name*, or in ``public`` if
+    not specified, as the registering functions' own queries do. If *kind*
+    is ``'composite'`` or ``'range'`` only consider the types of that kind.
+    Return `!None` if the type is not found or the cache cannot be used.
+    """
+    if type_cache is None:
+        return None
+
+    types = type_cache.lookup(conn_or_curs, name)
+    if not types:
+        return None
 
-    return conn, curs
+    if kind == 'composite':
+        types = [t for t in types if t.attrs]
+    elif kind == 'range':
+        types = [t for t in types if t.subtype_oid]
+
+    if '.' in name:
+        schema, tname = name.split('.', 1)
+    else:
+        schema, tname = 'public', name
+    for t in types:
+        if t.typname == tname and t.schema == schema:
+            return t
+    return None
 
 
 class HstoreAdapter:
@@ -848,7 +1980,7 @@ class HstoreAdapter:
     """, _re.VERBOSE)
 
     @classmethod
-    def parse(self, s, cur, _bsdec=_re.compile(r"\\(.)")):
+    def parse(self, s, cur):
         """Parse an hstore representation in a Python string.
 
         The hstore is represented as something like::
@@ -860,6 +1992,19 @@ class HstoreAdapter:
         if s is None:
             return None
 
+        # Fast path: without backslashes every double quote delimits a string
+        if '\\' not in s:
+            rv = self._parse_unescaped(s)
+        else:
+            rv = self._parse_escaped(s)
+        if rv is not None:
+            return rv
+
+        return self._parse_re(s)
+
+    @classmethod
+    def _parse_re(self, s, _bsdec=_re.compile(r"\\(.)")):
+        """Parse an hstore representation using a regular expression."""
         rv = {}
         start = 0
         for m in self._re_hstore.finditer(s):
@@ -880,6 +2025,98 @@ class HstoreAdapter:
 
         return rv
 
+    @classmethod
+    def _parse_unescaped(self, s):
+        """Parse an hstore without escaped chars in the format output by the
+        server.
+
+        Return `!None` if the string is not in the expected format.
+        """
+        if not s:
+            return {}
+
+        # '"a"=>"1", "b"=>NULL' -> ['', 'a', '=>', '1', ', ', 'b', '=>NULL']
+        parts = s.split('"')
+        if parts[0]:
+            return None
+
+        rv = {}
+        i = 1
+        nparts = len(parts)
+        while i < nparts - 1:
+            sep = parts[i + 1]
+            if sep == '=>':
+                if i + 3 >= nparts:
+                    return None
+                rv[parts[i]] = parts[i + 2]
+                sep = parts[i + 3]
+                i += 4
+                if sep == ', ':
+                    continue
+            elif sep.startswith('=>NULL'):
+                rv[parts[i]] = None
+                sep = sep[6:]
+                i += 2
+                if sep == ', ':
+                    continue
+            else:
+                return None
+
+            # the last pair
+            if sep or i != nparts:
+                return None
+            return rv
+
+        return None
+
+    @classmethod
+    def _parse_escaped(self, s):
+        """Parse an hstore in the format output by the server in one pass.
+
+        Return `!None` if the string is not in the expected format.
+        """
+        rv = {}
+        n = len(s)
+        i = 0
+        key = None
+        while True:
+            # parse a quoted string starting at i
+            if not s.startswith('"', i):
+                return None
+            chunks = []
+            j = i + 1
+            while True:
+                q = s.find('"', j)
+                if q == -1:
+                    return None
+                b = s.find('\\', j, q)
+                if b == -1:
+                    break
+                chunks.append(s[j:b])
+                chunks.append(s[b + 1:b + 2])
+                j = b + 2
+            chunks.append(s[j:q])
+            i = q + 1
+
+            if key is None:
+                key = ''.join(chunks)
+                if not s.startswith('=>', i):
+                    return None
+                i += 2
+                if not s.startswith('NULL', i):
+                    continue
+                rv[key] = None
+                i += 4
+            else:
+                rv[key] = ''.join(chunks)
+
+            key = None
+            if i == n:
+                return rv
+            if not s.startswith(', ', i) or i + 2 == n:
+                return None
+            i += 2
+
     @classmethod
     def parse_unicode(self, s, cur):
         """Parse an hstore returning unicode keys and values."""
@@ -890,9 +2127,18 @@ class HstoreAdapter:
         return self.parse(s, cur)
 
     @classmethod
-    def get_oids(self, conn_or_curs):
+    def get_oids(self, conn_or_curs, type_cache=None):
         """Return the lists of OID of the hstore and hstore[] types.
+
+        Look them up in *type_cache* if not `!None` (see `TypeCache`).
         """
+        types = type_cache and type_cache.lookup(conn_or_curs, 'hstore')
+        if types:
+            types = [t for t in types if t.typname == 'hstore']
+        if types:
+            return (tuple(t.oid for t in types),
+                tuple(t.array_oid for t in types))
+
         conn, curs = _solve_conn_curs(conn_or_curs)
 
         # Store the transaction status of the connection to revert it after use
@@ -922,7 +2168,7 @@ WHERE typname = 'hstore';
 
 
 def register_hstore(conn_or_curs, globally=False, unicode=False,
-                    oid=None, array_oid=None):
+                    oid=None, array_oid=None, type_cache=None):
     r"""Register adapter and typecaster for `!dict`\-\ |hstore| conversions.
 
     :param conn_or_curs: a connection or cursor: the typecaster will be
@@ -935,6 +2181,8 @@ def register_hstore(conn_or_curs, globally=False, unicode=False,
         queried on *conn_or_curs*.
     :param array_oid: the OID of the |hstore| array type if known. If not, it
         will be queried on *conn_or_curs*.
+    :param type_cache: a `TypeCache` to look up the |hstore| type in, instead
+        of querying *conn_or_curs* every time.
 
     The connection or cursor passed to the function will be used to query the
     database and look for the OID of the |hstore| type (which may be different
@@ -953,7 +2201,7 @@ def register_hstore(conn_or_curs, globally=False, unicode=False,
     Raise `~psycopg2.ProgrammingError` if the type is not found.
     """
     if oid is None:
-        oid = HstoreAdapter.get_oids(conn_or_curs)
+        oid = HstoreAdapter.get_oids(conn_or_curs, type_cache)
         if oid is None or not oid[0]:
             raise psycopg2.ProgrammingError(
                 "hstore type not found in the database. "
@@ -1006,10 +2254,19 @@ class CompositeCaster:
         else:
             self.array_typecaster = None
 
+    # If true return LazyComposite objects, parsed on first access
+    lazy = False
+
     def parse(self, s, curs):
         if s is None:
             return None
 
+        if self.lazy and curs is not None:
+            return LazyComposite(self, s, curs)
+
+        return self._parse(s, curs)
+
+    def _parse(self, s, curs):
         tokens = self.tokenize(s)
         if len(tokens) != len(self.atttypes):
             raise psycopg2.DataError(
@@ -1043,6 +2300,19 @@ class CompositeCaster:
 
     @classmethod
     def tokenize(self, s):
+        # Fast path: no quoted value
+        if '"' not in s and s[:1] == '(' and s[-1:] == ')':
+            return [t or None for t in s[1:-1].split(',')]
+
+        rv = self._tokenize_quoted(s)
+        if rv is not None:
+            return rv
+
+        return self._tokenize_re(s)
+
+    @classmethod
+    def _tokenize_re(self, s):
+        """Split a record using a regular expression."""
         rv = []
         for m in self._re_tokenize.finditer(s):
             if m is None:
@@ -1056,6 +2326,50 @@ class CompositeCaster:
 
         return rv
 
+    @classmethod
+    def _tokenize_quoted(self, s):
+        """Split a record in the format output by the server in one pass.
+
+        Return `!None` if the string is not in the expected format.
+        """
+        end = len(s) - 1
+        if end < 1 or s[0] != '(' or s[end] != ')':
+            return None
+
+        rv = []
+        i = 1
+        while True:
+            if s[i] == '"':
+                # quoted value: quotes and backslashes are doubled
+                chunks = []
+                j = i + 1
+                while True:
+                    k = s.find('"', j)
+                    if k == -1:
+                        return None
+                    if s[k + 1] != '"':
+                        break
+                    chunks.append(s[j:k + 1])
+                    j = k + 2
+                chunks.append(s[j:k])
+                token = ''.join(chunks)
+                if '\\' in token:
+                    token = token.replace('\\\\', '\\')
+                i = k + 1
+            else:
+                k = s.find(',', i)
+                if k == -1:
+                    k = end
+                token = s[i:k] or None
+                i = k
+
+            rv.append(token)
+            if i == end:
+                return rv
+            if s[i] != ',':
+                return None
+            i += 1
+
     def _create_type(self, name, attnames):
         name = _re_clean.sub('_', name)
         self.type = namedtuple(name, attnames)
@@ -1144,7 +2458,76 @@ ORDER BY attnum;
             array_oid=array_oid, schema=schema)
 
 
-def register_composite(name, conn_or_curs, globally=False, factory=None):
+class LazyComposite:
+    """A composite value parsed only when its content is accessed.
+
+    Objects of this class are returned by the typecasters registered by
+    `register_composite()` with *lazy* set to `!True`. The object in the
+    `!value` property is created on first access, using the cursor the
+    record was fetched from or, if it was deleted, a new cursor on its
+    connection, which must still be open. Only weak references to the
+    cursor and the connection are kept. The attributes, items and
+    comparison operators of the value are available on the proxy too.
+    """
+    __slots__ = ('_lazy', '_value')
+
+    def __init__(self, caster, s, curs):
+        self._lazy = (
+            caster, s, _weakref.ref(curs), _weakref.ref(curs.connection))
+
+    @property
+    def value(self):
+        """The composite parsed into a Python object."""
+        try:
+            return self._value
+        except AttributeError:
+            pass
+
+        caster, s, wcurs, wconn = self._lazy
+        curs = wcurs()
+        if curs is None:
+            conn = wconn()
+            if conn is None or conn.closed:
+                raise psycopg2.InterfaceError(
+                    "can't parse the composite: the cursor it was fetched "
+                    "from was deleted and the connection is closed")
+            curs = conn.cursor()
+        value = self._value = caster._parse(s, curs)
+        del self._lazy
+        return value
+
+    def __getattr__(self, name):
+        if name in LazyComposite.__slots__:
+            raise AttributeError(name)
+        return getattr(self.value, name)
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyComposite):
+            other = other.value
+        return self.value == other
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return repr(self.value)
+
+    def __conform__(self, proto):
+        if proto is _ext.ISQLQuote:
+            return _A(self.value)
+
+
+def register_composite(name, conn_or_curs, globally=False, factory=None,
+                       lazy=False, type_cache=None):
     """Register a typecaster to convert a composite type into a tuple.
 
     :param name: the name of a PostgreSQL composite type, e.g. created using
@@ -1156,13 +2539,25 @@ def register_composite(name, conn_or_curs, globally=False, factory=None):
         *conn_or_curs*, otherwise register it globally
     :param factory: if specified it should be a `CompositeCaster` subclass: use
         it to :ref:`customize how to cast composite types <custom-composite>`
+    :param lazy: if `!True` return `LazyComposite` objects, keeping the string
+        received from the server and parsing it only on first access
+    :param type_cache: a `TypeCache` to look up the type in, instead of
+        querying *conn_or_curs* every time
     :return: the registered `CompositeCaster` or *factory* instance
         responsible for the conversion
     """
     if factory is None:
         factory = CompositeCaster
 
-    caster = factory._from_db(name, conn_or_curs)
+    # looked up here, not in _from_db(), which factories may override
+    t = _lookup_type(type_cache, conn_or_curs, name, 'composite')
+    if t is not None:
+        caster = factory(t.typname, t.oid, t.attrs,
+            array_oid=t.array_oid, schema=t.schema)
+    else:
+        caster = factory._from_db(name, conn_or_curs)
+    if lazy:
+        caster.lazy = True
     _ext.register_type(caster.typecaster, not globally and conn_or_curs or None)
 
     if caster.array_typecaster is not None:
@@ -1208,12 +2603,97 @@ def execute_batch(cur, sql, argslist, page_size=100):
     statements, resulting in a reduced number of server roundtrips.
 
     After the execution of the function the `cursor.rowcount` property will
-    **not** contain a total result.
+    **not** contain a total result: the server only reports the result of the
+    last statement of a multi-statement command, so `!rowcount` is the count
+    of the last statement executed.
 
     """
+    from psycopg2.sql import Composable
+    if isinstance(sql, Composable):
+        sql = sql.as_string(cur)
+
+    encoding = _ext.encodings[cur.connection.encoding]
+    if not isinstance(sql, bytes):
+        sql = sql.encode(encoding)
+
+    parsed = _batch_template(sql, encoding)
+    if parsed is None:
+        # unusual placeholders: let mogrify() deal with them
+        for page in _paginate(argslist, page_size=page_size):
+            sqls = [cur.mogrify(sql, args) for args in page]
+            cur.execute(b";".join(sqls))
+        return
+
+    # Merge the records of a page into a single sequence of arguments, to
+    # be formatted into a template repeating *sql* once per record
+    template, getter, nparams = parsed
+    templates = {}
     for page in _paginate(argslist, page_size=page_size):
-        sqls = [cur.mogrify(sql, args) for args in page]
-        cur.execute(b";".join(sqls))
+        if getter is not None:
+            try:
+                args = [v for rec in page for v in getter(rec)]
+            except (LookupError, TypeError):
+                # let psycopg raise its own error, e.g. for a sequence
+                for rec in page:
+                    cur.mogrify(sql, rec)
+                raise
+        else:
+            for rec in page:
+                if not isinstance(rec, (tuple, list)) or len(rec) != nparams:
+                    # let psycopg check the record and raise its own error,
+                    # e.g. for a mapping, which would be read as its keys
+                    cur.mogrify(sql, rec)
+            args = [v for rec in page for v in rec]
+
+        page_template = templates.get(len(page))
+        if page_template is None:
+            page_template = templates[len(page)] = b";".join(
+                [template] * len(page))
+
+        cur.execute(page_template, args)
+
+
+def _batch_template(sql, encoding):
+    """Convert the placeholders of *sql* into positional ones.
+
+    Return the converted query, a function to return the positional
+    arguments from a mapping (`!None` if the query uses positional
+    arguments already) and the number of positional arguments. Return
+    `!None` if the query uses unsupported placeholders.
+    """
+    parts = []
+    names = []
+    nparams = 0
+    for token in _re_batch_param.split(sql):
+        if token[:1] != b'%' or len(token) < 2:
+            parts.append(token)
+        elif token == b'%%':
+            parts.append(token)
+        elif token == b'%s':
+            parts.append(token)
+            nparams += 1
+        elif token[:2] == b'%(' and token[-1:] == b's':
+            parts.append(b'%s')
+            names.append(token[2:-2].decode(encoding))
+        else:
+            return None
+
+    if not names:
+        return b''.join(parts), None, nparams
+    elif nparams:
+        return None
+
+    if len(names) == 1:
+        name = names[0]
+
+        def getter(rec):
+            return (rec[name],)
+    else:
+        getter = _itemgetter(*names)
+    return b''.join(parts), getter, len(names)
+
+
+_re_batch_param = _re.compile(br'(%(?:\([^)]*\))?.)')
 
 
 def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False):
@@ -1335,6 +2815,803 @@ def _split_sql(sql):
     return pre, post
 
 
+def iter_batches(cur, size=None, target_bytes=None, target_time=None,
+        columns=False, min_size=100, max_size=100000):
+    """Iterate on the result of a query in batches of records.
+
+    :param cur: the cursor to fetch from, usually a named (server-side)
+        cursor on which the query was already executed.
+
+    :param size: the number of records to fetch in the first round trip; if
+        `!None` use the cursor `~cursor.itersize`.
+
+    :param target_bytes: if specified, adapt the size of the following
+        batches so that each one holds about this amount of data.
+
+    :param target_time: if specified, adapt the size of the following
+        batches so that each round trip takes about this number of seconds.
+
+    :param columns: if `!False` yield every batch as a list of records, as
+        returned by `~cursor.fetchmany()`; if `!True` yield every batch as
+        a dictionary mapping the column names to the lists of their values.
+
+    :param min_size: the smallest number of records to fetch at once.
+
+    :param max_size: the largest number of records to fetch at once.
+
+    If both *target_bytes* and *target_time* are specified, the smallest
+    batch size satisfying them is used. The size of a batch is estimated
+    from the length of its string and binary values (other values are
+    counted 8 bytes each), so it is only an indication of the memory used.
+
+    Records are created by the cursor as usual, so the function can be used
+    with `DictCursor`, `RealDictCursor`, `NamedTupleCursor` or any other
+    cursor subclass. In *columns* mode the records are fetched as plain
+    tuples, skipping the creation of the record objects altogether.
+    """
+    if size is None:
+        size = cur.itersize
+    size = max(min_size, min(size, max_size))
+
+    if not columns:
+        fetch = cur.fetchmany
+    else:
+        # fetch the tuples bypassing the record objects of the subclasses,
+        # not leaving the cursor changed between the batches
+        def fetch(size):
+            row_factory = cur.row_factory
+            cur.row_factory = None
+            try:
+                return _cursor.fetchmany(cur, size)
+            finally:
+                cur.row_factory = row_factory
+
+    while True:
+        t0 = _time.monotonic()
+        rows = fetch(size)
+        elapsed = _time.monotonic() - t0
+        if not rows:
+            return
+
+        if columns:
+            names = [d[0] for d in cur.description]
+            yield dict(zip(names, map(list, zip(*rows)))) if names else {}
+        else:
+            yield rows
+
+        if len(rows) < size:
+            return
+
+        if target_bytes is None and target_time is None:
+            continue
+
+        new_size = max_size
+        if target_bytes is not None:
+            nbytes = _batch_bytes(rows) or 1
+            new_size = min(new_size, size * target_bytes // nbytes)
+        if target_time is not None and elapsed > 0:
+            new_size = min(new_size, int(size * target_time / elapsed))
+
+        # don't jump too far on the base of a single batch
+        size = max(min_size, min(new_size, size * 4, max_size))
+
+
+def fetch_columns(cur, size=None, numpy=None, numeric=False):
+    """Fetch the rest of the result of a query column by column.
+
+    :param cur: the cursor to fetch from, usually a named (server-side)
+        cursor on which the query was already executed.
+
+    :param size: the number of records to fetch in every round trip; if
+        `!None` use the cursor `~cursor.itersize`.
+
+    :param numpy: if `!True` return NumPy arrays for the columns of numeric
+        and date types, if `!False` return `array.array` objects; if
+        `!None` (default) use NumPy if it is installed.
+
+    :param numeric: if `!True` convert the :sql:`numeric` columns to floats
+        (losing precision), otherwise return them as lists of `!Decimal`.
+
+    :return: a pair of dictionaries *columns*, *nulls*: *columns* maps the
+        column names to their values, *nulls* maps the names of the columns
+        returned as arrays to a boolean array marking the null values.
+
+    Integer, floating point and boolean columns are returned as arrays of
+    the same type; :sql:`date` columns as days since 1970-01-01 (NumPy
+    :sql:`datetime64[D]`), :sql:`timestamp` and :sql:`timestamptz` columns
+    as microseconds since 1970-01-01 UTC (NumPy :sql:`datetime64[us]`). The
+    null values in an array are returned as 0. The values of the columns of
+    any other type are returned in a list.
+
+    The records are read in batches, transposing them into the column
+    buffers without keeping the records in memory, so the function can be
+    used with any cursor subclass.
+    """
+    import array
+
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+    elif numpy:
+        import numpy
+    else:
+        numpy = None
+
+    if size is None:
+        size = cur.itersize
+
+    # fetch the tuples bypassing the record objects of the subclasses
+    fetch = _cursor.fetchmany.__get__(cur)
+    row_factory = cur.row_factory
+    cur.row_factory = None
+    try:
+        rows = fetch(size)
+        if cur.description is None:
+            raise psycopg2.ProgrammingError("no results to fetch")
+
+        names = [d[0] for d in cur.description]
+        cols = []
+        for d in cur.description:
+            conv = _column_convs.get(d[1])
+            if d[1] == 1700 and numeric:
+                conv = ('d', None, float)
+            if conv is not None:
+                typecode, dtype, f = conv
+                cols.append((array.array(typecode), array.array('b'), f, dtype))
+            else:
+                cols.append(([], None, None, None))
+
+        while rows:
+            for values, (data, mask, f, _) in zip(zip(*rows), cols):
+                if mask is None:
+                    data.extend(values)
+                    continue
+
+                nulls = [v is None for v in values]
+                mask.extend(nulls)
+                if True in nulls:
+                    if f is None:
+                        values = [0 if v is None else v for v in values]
+                    else:
+                        values = [0 if v is None else f(v) for v in values]
+                elif f is not None:
+                    values = map(f, values)
+                data.extend(values)
+
+            if len(rows) < size:
+                break
+            rows = fetch(size)
+    finally:
+        cur.row_factory = row_factory
+
+    columns = {}
+    nulls = {}
+    for name, (data, mask, f, dtype) in zip(names, cols):
+        if mask is not None and numpy is not None:
+            data = numpy.frombuffer(data, dtype=data.typecode)
+            if dtype is not None:
+                data = data.view(dtype)
+            mask = numpy.frombuffer(mask, dtype='b').view(bool)
+        columns[name] = data
+        if mask is not None:
+            nulls[name] = mask
+
+    return columns, nulls
+
+
+def _epoch_days(d, _epoch=_datetime.date(1970, 1, 1).toordinal()):
+    return d.toordinal() - _epoch
+
+
+def _epoch_usecs(ts,
+        _epoch=_datetime.datetime(1970, 1, 1),
+        _epoch_tz=_datetime.datetime(1970, 1, 1, tzinfo=_datetime.timezone.utc),
+        _usec=_datetime.timedelta(microseconds=1)):
+    return (ts - (_epoch if ts.tzinfo is None else _epoch_tz)) // _usec
+
+
+# Column type oid -> array typecode, NumPy type to view the data as,
+# conversion function from Python objects
+_column_convs = {
+    16: ('b', 'bool', None),                # bool
+    20: ('q', None, None),                  # int8
+    21: ('h', None, None),                  # int2
+    23: ('i', None, None),                  # int4
+    26: ('I', None, None),                  # oid
+    700: ('f', None, None),                 # float4
+    701: ('d', None, None),                 # float8
+    1082: ('q', 'datetime64[D]', _epoch_days),      # date
+    1114: ('q', 'datetime64[us]', _epoch_usecs),    # timestamp
+    1184: ('q', 'datetime64[us]', _epoch_usecs),    # timestamptz
+}
+
+
+def _batch_bytes(rows, sample=20):
+    """Estimate the size in bytes of the values in *rows*.
+
+    Only a *sample* of evenly spaced records is measured.
+    """
+    step = max(1, len(rows) // sample)
+    nbytes = 0
+    nsampled = 0
+    for row in _itertools.islice(rows, 0, None, step):
+        if isinstance(row, dict):
+            row = row.values()
+        for v in row:
+            if isinstance(v, (str, bytes, bytearray, memoryview)):
+                nbytes += len(v)
+            else:
+                nbytes += 8
+        nsampled += 1
+    return nbytes * len(rows) // nsampled
+
+
+def execute_copy(cur, sql, argslist, columns=None, size=8192):
+    r"""Load a sequence of records into the database using :sql:`COPY`.
+
+    :param cur: the cursor to use to execute the query.
+
+    :param sql: a :sql:`COPY ... FROM STDIN` statement in text format, e.g.
+        ``"COPY mytable (id, f1, f2) FROM STDIN"``.
+
+    :param argslist: iterable of sequences or mappings with the values of
+        every record, in the order of the :sql:`COPY` columns.
+
+    :param columns: if the *argslist* items are mappings, the keys to read
+        from every item, in the order of the :sql:`COPY` columns.
+
+    :param size: size in bytes of the blocks of data sent to the server.
+
+    :return: the number of records loaded.
+
+    The function is a faster alternative to `execute_values()` to insert a
+    large amount of records: Python values are converted into the :sql:`COPY`
+    text format (`!None` as ``\N``, strings escaped, `!bytes` in the
+    :sql:`bytea` hex format, lists as arrays, `Json` and `Range` objects...)
+    and streamed to the server block by block, without building the entire
+    payload in memory, and without the server having to parse a huge
+    statement.
+    """
+    from psycopg2.sql import Composable
+    if isinstance(sql, Composable):
+        sql = sql.as_string(cur)
+
+    if columns is not None:
+        argslist = ([args[c] for c in columns] for args in argslist)
+
+    lines = ('\t'.join([
+        _copy_text(v) if v is not None else '\\N' for v in args])
+        for args in argslist)
+    reader = _CopyReader(lines, _ext.encodings[cur.connection.encoding])
+    cur.copy_expert(sql, reader, size=size)
+    return cur.rowcount
+
+
+def copy_records(cur, table, records, columns=None, size=8192, types=None):
+    """Load records into *table* using :sql:`COPY`.
+
+    :param table: the name of the table to load, possibly schema-qualified
+        (``"schema.table"``), or a `~psycopg2.sql.Composable`.
+
+    :param records: iterable of sequences or mappings with the values to load.
+
+    :param columns: names of the columns to load. If *records* are mappings
+        they are also the keys to read from them; if not specified, the keys
+        of the first record are used. If *records* are sequences and
+        *columns* is not specified, all the table columns are loaded.
+
+    :param types: if specified, the names of the PostgreSQL types of the
+        columns: use the binary format (see `execute_copy_binary()`) instead
+        of the text one.
+
+    Other parameters and return value are the same of `execute_copy()`.
+    """
+    from psycopg2 import sql as _sql
+
+    it = iter(records)
+    try:
+        first = next(it)
+    except StopIteration:
+        return 0
+    it = _itertools.chain([first], it)
+
+    if not isinstance(table, _sql.Composable):
+        table = _sql.Identifier(*table.split('.'))
+
+    mappings = hasattr(first, 'keys')
+    if columns is None and mappings:
+        columns = list(first.keys())
+
+    if columns is None:
+        query = _sql.SQL("COPY {} FROM STDIN").format(table)
+    else:
+        query = _sql.SQL("COPY {} ({}) FROM STDIN").format(
+            table, _sql.SQL(', ').join(map(_sql.Identifier, columns)))
+
+    if types is not None:
+        return execute_copy_binary(cur, query + _sql.SQL(" (FORMAT binary)"),
+            it, types, columns=columns if mappings else None, size=size)
+
+    return execute_copy(cur, query, it,
+        columns=columns if mappings else None, size=size)
+
+
+class _CopyReader:
+    """A file-like object returning the text lines produced by an iterator.
+
+    Every `!read()` returns at least *size* bytes, unless the data is over, so
+    only a block of data at time is kept in memory.
+    """
+    def __init__(self, lines, encoding):
+        self._lines = lines
+        self._encoding = encoding
+
+    def read(self, size=-1):
+        parts = []
+        nbytes = 0
+        for line in self._lines:
+            parts.append(line)
+            nbytes += len(line) + 1
+            if nbytes >= size > 0:
+                break
+        if not parts:
+            return b''
+        parts.append('')
+        return '\n'.join(parts).encode(self._encoding)
+
+    readline = read
+
+
+_copy_escapes = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_text(obj):
+    """Return the COPY text representation of a non-null Python object."""
+    try:
+        dumper = _copy_dumpers[type(obj)]
+    except KeyError:
+        dumper = _copy_dumper(type(obj))
+    return dumper(obj)
+
+
+def _copy_dumper(cls):
+    """Find the function to dump a type walking its mro, and cache it."""
+    for base in cls.__mro__:
+        if base in _copy_dumpers:
+            dumper = _copy_dumpers[cls] = _copy_dumpers[base]
+            return dumper
+
+    # Unknown objects: hope that their str() is good for the server
+    return _copy_dumpers.setdefault(cls, _copy_dump_str)
+
+
+def _copy_dump_str(obj):
+    return str(obj).translate(_copy_escapes)
+
+
+def _copy_dump_bytes(obj):
+    # bytea hex format, with its backslash escaped for COPY
+    return '\\\\x' + bytes(obj).hex()
+
+
+def _copy_dump_timedelta(obj):
+    return f"{obj.days} days {obj.seconds} seconds {obj.microseconds} us"
+
+
+def _copy_dump_json(obj):
+    return obj.dumps(obj.adapted).translate(_copy_escapes)
+
+
+def _copy_dump_lazy_json(obj):
+    return obj.raw.translate(_copy_escapes)
+
+
+def _copy_dump_array(obj):
+    return _array_text(obj).translate(_copy_escapes)
+
+
+def _copy_dump_range(obj):
+    return _range_text(obj).translate(_copy_escapes)
+
+
+def _array_text(obj):
+    """Return the representation of a list as a PostgreSQL array."""
+    items = []
+    for item in obj:
+        if item is None:
+            items.append('NULL')
+        elif isinstance(item, (list, tuple)):
+            items.append(_array_text(item))
+        else:
+            items.append(_quote_item(_item_text(item)))
+    return '{' + ','.join(items) + '}'
+
+
+def _range_text(obj):
+    """Return the representation of a `Range` as a PostgreSQL range."""
+    if obj.isempty:
+        return 'empty'
+    lower = obj.lower is not None and _quote_item(_item_text(obj.lower)) or ''
+    upper = obj.upper is not None and _quote_item(_item_text(obj.upper)) or ''
+    return f"{obj._bounds[0]}{lower},{upper}{obj._bounds[1]}"
+
+
+def _item_text(obj):
+    """Return the representation of an array or range item."""
+    if isinstance(obj, bool):
+        return obj and 't' or 'f'
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        return '\\x' + bytes(obj).hex()
+    elif isinstance(obj, Json):
+        return obj.dumps(obj.adapted)
+    elif isinstance(obj, Range):
+        return _range_text(obj)
+    elif isinstance(obj, (_datetime.date, _datetime.time)):
+        return obj.isoformat()
+    elif isinstance(obj, _datetime.timedelta):
+        return _copy_dump_timedelta(obj)
+    return str(obj)
+
+
+def _quote_item(s, _re_special=_re.compile(r'[{}()\[\]",\\\s]|^$|^null$', _re.I)):
+    """Double-quote an array or range item if it contains special chars."""
+    if _re_special.search(s):
+        return '"' + s.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return s
+
+
+_copy_dumpers = {
+    str: lambda obj: obj.translate(_copy_escapes),
+    bool: lambda obj: obj and 't' or 'f',
+    int: int.__repr__,
+    float: float.__repr__,
+    _decimal.Decimal: str,
+    _datetime.datetime: _datetime.datetime.isoformat,
+    _datetime.date: _datetime.date.isoformat,
+    _datetime.time: _datetime.time.isoformat,
+    _datetime.timedelta: _copy_dump_timedelta,
+    bytes: _copy_dump_bytes,
+    bytearray: _copy_dump_bytes,
+    memoryview: _copy_dump_bytes,
+    list: _copy_dump_array,
+    tuple: _copy_dump_array,
+    Json: _copy_dump_json,
+    LazyJson: _copy_dump_lazy_json,
+    Range: _copy_dump_range,
+}
+
+
+def execute_copy_binary(cur, sql, argslist, types, columns=None, size=8192):
+    """Load a sequence of records into the database using binary :sql:`COPY`.
+
+    :param sql: a :sql:`COPY ... FROM STDIN (FORMAT binary)` statement.
+
+    :param types: the names of the PostgreSQL types of the columns, e.g.
+        ``['int8', 'numeric', 'timestamptz', 'text']``. Supported types are
+        :sql:`int2`, :sql:`int4`, :sql:`int8`, :sql:`float4`, :sql:`float8`,
+        :sql:`numeric`, :sql:`bool`, :sql:`date`, :sql:`time`,
+        :sql:`timestamp`, :sql:`timestamptz`, :sql:`interval`, :sql:`uuid`,
+        :sql:`bytea`, :sql:`json`, :sql:`jsonb` and the text types.
+
+    Other parameters and return value are the same of `execute_copy()`.
+
+    Values are encoded straight into the PostgreSQL binary format, which
+    saves both the client from formatting numbers and dates as strings and
+    the server from parsing them. Rows are packed into a reusable buffer using
+    a precompiled `~struct.Struct` for every run of fixed-size columns, so
+    loading wide numeric tables costs little more than a `!pack_into()` per
+    row.
+
+    Naive datetimes for :sql:`timestamptz` columns are considered in UTC.
+    :sql:`json` and :sql:`jsonb` columns accept `Json` and `LazyJson`
+    objects, strings already in JSON format, or objects to serialize with the
+    default JSON codec (see `set_json_codec()`).
+    """
+    from psycopg2.sql import Composable
+    if isinstance(sql, Composable):
+        sql = sql.as_string(cur)
+
+    if columns is not None:
+        argslist = ([args[c] for c in columns] for args in argslist)
+
+    reader = _CopyBinaryReader(
+        argslist, types, _ext.encodings[cur.connection.encoding])
+    cur.copy_expert(sql, reader, size=size)
+    return cur.rowcount
+
+
+class _CopyBinaryReader:
+    """A file-like object returning records encoded in binary COPY format."""
+
+    _header = b'PGCOPY\n\xff\r\n\x00' + _struct.pack('>ii', 0, 0)
+    _trailer = _struct.pack('>h', -1)
+
+    def __init__(self, rows, types, encoding):
+        self._rows = iter(rows)
+        self._ncols = len(types)
+        self._plan = _copy_binary_plan(types, encoding)
+        self._buf = bytearray(self._ncols * 32 + 64)
+        self._started = False
+        self._done = False
+
+    def read(self, size=-1):
+        if self._done:
+            return b''
+
+        buf = self._buf
+        pos = 0
+        if not self._started:
+            buf[:len(self._header)] = self._header
+            pos = len(self._header)
+            self._started = True
+
+        for row in self._rows:
+            pos = self._pack_row(row, pos)
+            if pos >= size > 0:
+                break
+        else:
+            buf = self._reserve(pos, 2)
+            _pack_int2(buf, pos, -1)
+            pos += 2
+            self._done = True
+
+        return bytes(memoryview(self._buf)[:pos])
+
+    readline = read
+
+    def _reserve(self, pos, nbytes):
+        """Make sure there is room for *nbytes* after *pos* in the buffer."""
+        buf = self._buf
+        if len(buf) < pos + nbytes:
+            buf.extend(bytes(max(len(buf), pos + nbytes - len(buf))))
+        return buf
+
+    def _pack_row(self, row, pos):
+        if len(row) != self._ncols:
+            raise psycopg2.DataError(
+                f"expecting {self._ncols} values to copy, {len(row)} found")
+
+        # Encode the variable-size values first, to know the row size
+        plan = self._plan
+        size = plan.fixed_size
+        datas = []
+        for i, encode in plan.variable:
+            v = row[i]
+            if v is not None:
+                v = encode(v)
+                size += len(v)
+            datas.append(v)
+
+        buf = self._reserve(pos, size)
+        _pack_int2(buf, pos, self._ncols)
+        pos += 2
+
+        idatas = iter(datas)
+        for seg in plan.segments:
+            if seg is None:
+                # a variable-size column
+                data = next(idatas)
+                if data is None:
+                    _pack_int4(buf, pos, -1)
+                    pos += 4
+                else:
+                    _pack_int4(buf, pos, len(data))
+                    pos += 4
+                    buf[pos:pos + len(data)] = data
+                    pos += len(data)
+                continue
+
+            values = seg.getter(row)
+            if seg.ncols == 1:
+                values = (values,)
+            if None not in values:
+                # fast path: pack all the columns of the run in a go
+                args = seg.args[:]
+                args[1::2] = values
+                for j, convert in seg.converters:
+                    args[j] = convert(args[j])
+                seg.struct.pack_into(buf, pos, *args)
+                pos += seg.struct.size
+            else:
+                for v, (fmt, convert) in zip(values, seg.columns):
+                    if v is None:
+                        _pack_int4(buf, pos, -1)
+                        pos += 4
+                    else:
+                        if convert is not None:
+                            v = convert(v)
+                        fmt.pack_into(buf, pos, fmt.size - 4, v)
+                        pos += fmt.size
+
+        return pos
+
+
+_pack_int2 = _struct.Struct('>h').pack_into
+_pack_int4 = _struct.Struct('>i').pack_into
+
+_pg_epoch_ordinal = _datetime.date(2000, 1, 1).toordinal()
+_pg_epoch_tz = _datetime.datetime(2000, 1, 1, tzinfo=_datetime.timezone.utc)
+
+
+def _bin_date(obj):
+    return obj.toordinal() - _pg_epoch_ordinal
+
+
+def _bin_time(obj):
+    return ((obj.hour * 60 + obj.minute) * 60 + obj.second) * 1000000 \
+        + obj.microsecond
+
+
+def _bin_timestamp(obj):
+    return ((obj.toordinal() - _pg_epoch_ordinal) * 86400
+        + (obj.hour * 60 + obj.minute) * 60 + obj.second) * 1000000 \
+        + obj.microsecond
+
+
+def _bin_timestamptz(obj):
+    if obj.tzinfo is None:
+        return _bin_timestamp(obj)
+    delta = obj - _pg_epoch_tz
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _bin_uuid(obj):
+    return obj.bytes
+
+
+def _bin_interval(obj, _pack=_struct.Struct('>qii').pack):
+    # microseconds, days, months
+    return _pack(obj.seconds * 1000000 + obj.microseconds, obj.days, 0)
+
+
+_numeric_head = _struct.Struct('>hhHh')
+
+
+def _bin_numeric(obj):
+    """Encode a number in the PostgreSQL numeric binary format."""
+    if not isinstance(obj, _decimal.Decimal):
+        obj = _decimal.Decimal(repr(obj) if isinstance(obj, float) else obj)
+
+    sign, digits, exp = obj.as_tuple()
+    if exp == 'n' or exp == 'N':
+        return _numeric_head.pack(0, 0, 0xC000, 0)
+    elif exp == 'F':
+        return _numeric_head.pack(0, 0, sign and 0xF000 or 0xD000, 0)
+
+    dscale = max(0, -exp)
+    value = int(''.join(map(str, digits)) or 0)
+    if exp > 0:
+        value *= 10 ** exp
+        exp = 0
+
+    # align the decimal point to a base 10000 digit
+    pad = exp % 4
+    value *= 10 ** pad
+    nfrac = (pad - exp) // 4
+
+    groups = []
+    while value:
+        value, group = divmod(value, 10000)
+        groups.append(group)
+    groups.reverse()
+    weight = len(groups) - nfrac - 1
+    while groups and not groups[-1]:
+        groups.pop()
+    if not groups:
+        weight = 0
+
+    return _numeric_head.pack(
+        len(groups), weight, sign and 0x4000 or 0, dscale) \
+        + _struct.pack(f'>{len(groups)}h', *groups)
+
+
+def _copy_binary_plan(types, encoding):
+    """Compile the instructions to pack rows of the given types."""
+    def bin_text(obj):
+        return obj.encode(encoding)
+
+    def bin_json(obj):
+        if isinstance(obj, Json):
+            obj = obj.dumps(obj.adapted)
+        elif isinstance(obj, LazyJson):
+            obj = obj.raw
+        elif not isinstance(obj, (str, bytes)):
+            obj = get_json_codec().dumps(obj)
+        return obj.encode(encoding) if isinstance(obj, str) else obj
+
+    def bin_jsonb(obj):
+        return b'\x01' + bin_json(obj)
+
+    plan = _CopyBinaryPlan()
+    run = []
+
+    def end_run():
+        if run:
+            plan.segments.append(_CopyBinarySegment(run[:]))
+            del run[:]
+
+    for i, name in enumerate(types):
+        name = name.lower()
+        if name in _copy_binary_fixed:
+            fmt, convert = _copy_binary_fixed[name]
+            run.append((i, fmt, convert))
+            plan.fixed_size += 4 + _struct.calcsize('>' + fmt)
+            continue
+
+        if name in ('json',):
+            encode = bin_json
+        elif name in ('jsonb',):
+            encode = bin_jsonb
+        elif name in ('numeric', 'decimal'):
+            encode = _bin_numeric
+        elif name in ('interval',):
+            encode = _bin_interval
+        elif name in ('bytea',):
+            encode = bytes
+        elif name in _copy_binary_text:
+            encode = bin_text
+        else:
+            raise psycopg2.ProgrammingError(
+                f"can't copy type {name!r} in binary format")
+
+        end_run()
+        plan.segments.append(None)
+        plan.variable.append((i, encode))
+        plan.fixed_size += 4
+
+    end_run()
+    plan.fixed_size += 2
+    return plan
+
+
+class _CopyBinaryPlan:
+    """How to pack the rows of a binary COPY: segments in column order."""
+    def __init__(self):
+        self.segments = []      # _CopyBinarySegment or None for var columns
+        self.variable = []      # (column index, encode function)
+        self.fixed_size = 0     # size of the row without the var data
+
+
+class _CopyBinarySegment:
+    """A run of adjacent fixed-size columns, packed with a single Struct."""
+    def __init__(self, run):
+        self.ncols = len(run)
+        self.getter = _itemgetter(*[i for i, fmt, convert in run])
+        self.struct = _struct.Struct('>' + ''.join('i' + fmt for i, fmt, c in run))
+        self.args = []
+        self.converters = []
+        self.columns = []
+        for j, (i, fmt, convert) in enumerate(run):
+            self.args.extend((_struct.calcsize('>' + fmt), None))
+            if convert is not None:
+                self.converters.append((2 * j + 1, convert))
+            self.columns.append((_struct.Struct('>i' + fmt), convert))
+
+
+# type name -> (struct format, function to convert the Python value)
+_copy_binary_fixed = {
+    'int2': ('h', None), 'smallint': ('h', None),
+    'int4': ('i', None), 'int': ('i', None), 'integer': ('i', None),
+    'int8': ('q', None), 'bigint': ('q', None),
+    'oid': ('I', None),
+    'float4': ('f', None), 'real': ('f', None),
+    'float8': ('d', None), 'double precision': ('d', None),
+    'bool': ('?', None), 'boolean': ('?', None),
+    'date': ('i', _bin_date),
+    'time': ('q', _bin_time),
+    'timestamp': ('q', _bin_timestamp),
+    'timestamptz': ('q', _bin_timestamptz),
+    'uuid': ('16s', _bin_uuid),
+}
+
+_copy_binary_text = frozenset([
+    'text', 'varchar', 'character varying', 'bpchar', 'char', 'character',
+    'name', 'citext', 'xml'])
+
+
 # ascii except alnum and underscore
 _re_clean = _re.compile(
     '[' + _re.escape(' !"#$%&\'()*+,-./:;<=>?@[\\]^`{|}~') + ']')
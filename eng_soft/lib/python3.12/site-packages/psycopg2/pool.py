@@ -25,6 +25,11 @@ This module implements thread-safe (and not) connection pools.
 # FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
 # License for more details.
 
+import time as _time
+from bisect import bisect_left as _bisect_left
+from collections import deque as _deque
+from contextlib import asynccontextmanager as _asynccontextmanager
+
 import psycopg2
 from psycopg2 import extensions as _ext
 
@@ -33,18 +38,65 @@ class PoolError(psycopg2.Error):
     pass
 
 
+class PoolListener:
+    """Base class for the objects notified of the events of a pool.
+
+    Subclass it and override the methods of the events to observe, then pass
+    an instance to the pool 'listeners' or to its `!add_listener()` method.
+    The methods are called by the thread using the pool, with the pool lock
+    held if the pool has one: they should be quick and not use the pool.
+    Exceptions raised by the listeners are ignored.
+    """
+
+    def on_connect(self, pool, conn, duration):
+        """A new connection was opened in 'duration' seconds."""
+
+    def on_checkout(self, pool, conn, wait):
+        """A connection was handed out after 'wait' seconds from the request."""
+
+    def on_checkin(self, pool, conn, held):
+        """A connection was returned after being used for 'held' seconds."""
+
+    def on_close(self, pool, conn, age):
+        """A connection 'age' seconds old was closed and removed."""
+
+    def on_error(self, pool, error):
+        """The pool failed to connect or to hand out a connection."""
+
+
+# Upper bounds of the buckets of the acquisition time histogram, in seconds
+_ACQUIRE_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# Number of seconds over which the checkout rate is measured
+_RATE_WINDOW = 60
+
+
 class AbstractConnectionPool:
     """Generic key-based pooling code."""
 
-    def __init__(self, minconn, maxconn, *args, **kwargs):
+    def __init__(self, minconn, maxconn, *args,
+            max_idle=None, max_lifetime=None, pre_ping=False, listeners=(),
+            **kwargs):
         """Initialize the connection pool.
 
         New 'minconn' connections are created immediately calling 'connfunc'
         with given parameters. The connection pool will support a maximum of
         about 'maxconn' connections.
+
+        Idle connections older than 'max_lifetime' seconds, or unused for more
+        than 'max_idle' seconds, are closed instead of being handed out. If
+        'pre_ping' is true, an idle connection is checked with a trivial query
+        before being returned by getconn() and replaced if found broken.
+
+        'listeners' is a sequence of `PoolListener` to notify of the pool
+        events, including the creation of the first connections.
         """
         self.minconn = int(minconn)
         self.maxconn = int(maxconn)
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
         self.closed = False
 
         self._args = args
@@ -53,28 +105,193 @@ class AbstractConnectionPool:
         self._pool = []
         self._used = {}
         self._rused = {}    # id(conn) -> key map
+        self._born = {}     # id(conn) -> connection time
+        self._idle = {}     # id(conn) -> time put back in the pool
+        self._out = {}      # id(conn) -> time handed out
         self._keys = 0
+        self._init_stats(listeners)
 
         for i in range(self.minconn):
             self._connect()
 
+    def _init_stats(self, listeners):
+        """Initialize the listeners and the statistics counters."""
+        self._listeners = list(listeners)
+        self._nconnects = 0
+        self._connect_time = 0.0
+        self._max_connect_time = 0.0
+        self._ncheckouts = 0
+        self._ncheckins = 0
+        self._acquire_time = 0.0
+        self._max_acquire = 0.0
+        self._acquire_hist = [0] * (len(_ACQUIRE_BUCKETS) + 1)
+        self._hold_time = 0.0
+        self._rate = _deque(maxlen=_RATE_WINDOW)   # [second, checkouts]
+        self._ndiscarded = 0
+        self._nerrors = 0
+        self._nexhausted = 0
+
+    def add_listener(self, listener):
+        """Add a `PoolListener` to notify of the pool events."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stop notifying a `PoolListener` added before."""
+        self._listeners.remove(listener)
+
+    def _new_conn(self, record=True):
+        """Create a new connection, not assigned to the pool yet.
+
+        Account for the connection time and the errors only if 'record' is
+        true, otherwise the caller should call `!_connected()` or
+        `!_error()` when holding the lock.
+        """
+        start = _time.monotonic()
+        try:
+            conn = psycopg2.connect(*self._args, **self._kwargs)
+        except psycopg2.Error as e:
+            if record:
+                self._error(e)
+            raise
+        now = _time.monotonic()
+        self._born[id(conn)] = now
+        if record:
+            self._connected(conn, now - start)
+        return conn
+
     def _connect(self, key=None):
         """Create a new connection and assign it to 'key' if not None."""
-        conn = psycopg2.connect(*self._args, **self._kwargs)
+        conn = self._new_conn()
         if key is not None:
             self._used[key] = conn
             self._rused[id(conn)] = key
         else:
             self._pool.append(conn)
+            self._idle[id(conn)] = _time.monotonic()
         return conn
 
+    def _discard(self, conn):
+        """Close a connection and forget about it."""
+        self._forget(conn)
+        self._close(conn)
+
+    def _forget(self, conn):
+        """Remove a connection from the pool accounting."""
+        born = self._born.pop(id(conn), None)
+        self._idle.pop(id(conn), None)
+        self._out.pop(id(conn), None)
+        self._ndiscarded += 1
+        if self._listeners:
+            age = _time.monotonic() - born if born is not None else 0.0
+            self._notify('on_close', conn, age)
+
+    def _close(self, conn):
+        """Close a connection ignoring errors."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _notify(self, event, *args):
+        """Call the method 'event' of the listeners, ignoring their errors."""
+        for listener in self._listeners:
+            try:
+                getattr(listener, event)(self, *args)
+            except Exception:
+                pass
+
+    def _connected(self, conn, duration):
+        """Account for a new connection, opened in 'duration' seconds."""
+        self._nconnects += 1
+        self._connect_time += duration
+        if duration > self._max_connect_time:
+            self._max_connect_time = duration
+        if self._listeners:
+            self._notify('on_connect', conn, duration)
+
+    def _error(self, error):
+        """Account for an error connecting or handing out a connection."""
+        self._nerrors += 1
+        if self._listeners:
+            self._notify('on_error', error)
+
+    def _checkout(self, conn, start):
+        """Account for a connection handed out to a request made at 'start'."""
+        now = _time.monotonic()
+        wait = now - start
+        self._out[id(conn)] = now
+        self._ncheckouts += 1
+        self._acquire_time += wait
+        if wait > self._max_acquire:
+            self._max_acquire = wait
+        self._acquire_hist[_bisect_left(_ACQUIRE_BUCKETS, wait)] += 1
+
+        sec = int(now)
+        if self._rate and self._rate[-1][0] == sec:
+            self._rate[-1][1] += 1
+        else:
+            self._rate.append([sec, 1])
+
+        if self._listeners:
+            self._notify('on_checkout', conn, wait)
+
+    def _checkin(self, conn):
+        """Account for a connection returned to the pool."""
+        now = _time.monotonic()
+        held = now - self._out.pop(id(conn), now)
+        self._ncheckins += 1
+        self._hold_time += held
+        if self._listeners:
+            self._notify('on_checkin', conn, held)
+
+    def _expired(self, conn, now=None):
+        """Return `!True` if 'conn' passed its max lifetime or idle time."""
+        if now is None:
+            now = _time.monotonic()
+        if self.max_lifetime is not None:
+            born = self._born.get(id(conn))
+            if born is not None and now - born > self.max_lifetime:
+                return True
+        if self.max_idle is not None:
+            idle = self._idle.get(id(conn))
+            if idle is not None and now - idle > self.max_idle:
+                return True
+        return False
+
+    def _ping(self, conn):
+        """Return `!True` if the server answers a trivial query on 'conn'."""
+        autocommit = conn.autocommit
+        try:
+            # In autocommit the ping doesn't cost a BEGIN/ROLLBACK pair
+            conn.autocommit = True
+            curs = conn.cursor(cursor_factory=_ext.cursor)
+            try:
+                curs.execute("SELECT 1")
+            finally:
+                curs.close()
+            conn.autocommit = autocommit
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _usable(self, conn):
+        """Return `!True` if an idle connection can be handed out."""
+        if conn.closed or self._expired(conn):
+            return False
+        if self.pre_ping and not self._ping(conn):
+            return False
+        return True
+
     def _getkey(self):
         """Return a new unique key."""
         self._keys += 1
         return self._keys
 
-    def _getconn(self, key=None):
-        """Get a free connection and assign it to 'key' if not None."""
+    def _getconn(self, key=None, start=None):
+        """Get a free connection and assign it to 'key' if not None.
+
+        'start' is the time the connection was requested, if earlier than now.
+        """
         if self.closed:
             raise PoolError("connection pool is closed")
         if key is None:
@@ -83,14 +300,28 @@ class AbstractConnectionPool:
         if key in self._used:
             return self._used[key]
 
-        if self._pool:
-            self._used[key] = conn = self._pool.pop()
+        if start is None:
+            start = _time.monotonic()
+
+        while self._pool:
+            conn = self._pool.pop()
+            if not self._usable(conn):
+                self._discard(conn)
+                continue
+            del self._idle[id(conn)]
+            self._used[key] = conn
             self._rused[id(conn)] = key
+            self._checkout(conn, start)
             return conn
-        else:
-            if len(self._used) == self.maxconn:
-                raise PoolError("connection pool exhausted")
-            return self._connect(key)
+
+        if len(self._used) == self.maxconn:
+            self._nexhausted += 1
+            error = PoolError("connection pool exhausted")
+            self._error(error)
+            raise error
+        conn = self._connect(key)
+        self._checkout(conn, start)
+        return conn
 
     def _putconn(self, conn, key=None, close=False):
         """Put away a connection."""
@@ -102,24 +333,29 @@ class AbstractConnectionPool:
             if key is None:
                 raise PoolError("trying to put unkeyed connection")
 
-        if len(self._pool) < self.minconn and not close:
+        self._checkin(conn)
+        if self._keep_idle() and not close and not self._expired(conn):
             # Return the connection into a consistent state before putting
             # it back into the pool
             if not conn.closed:
                 status = conn.info.transaction_status
                 if status == _ext.TRANSACTION_STATUS_UNKNOWN:
                     # server connection lost
-                    conn.close()
+                    self._discard(conn)
                 elif status != _ext.TRANSACTION_STATUS_IDLE:
                     # connection in error or in transaction
                     conn.rollback()
                     self._pool.append(conn)
+                    self._idle[id(conn)] = _time.monotonic()
                 else:
                     # regular idle connection
                     self._pool.append(conn)
-            # If the connection is closed, we just discard it.
+                    self._idle[id(conn)] = _time.monotonic()
+            else:
+                # If the connection is closed, we just discard it.
+                self._discard(conn)
         else:
-            conn.close()
+            self._discard(conn)
 
         # here we check for the presence of key because it can happen that a
         # thread tries to put back a connection after a call to close
@@ -127,6 +363,10 @@ class AbstractConnectionPool:
             del self._used[key]
             del self._rused[id(conn)]
 
+    def _keep_idle(self):
+        """Return `!True` if a connection put back should stay in the pool."""
+        return len(self._pool) < self.minconn
+
     def _closeall(self):
         """Close all connections.
 
@@ -141,8 +381,60 @@ class AbstractConnectionPool:
                 conn.close()
             except Exception:
                 pass
+        self._born.clear()
+        self._idle.clear()
+        self._out.clear()
         self.closed = True
 
+    def _stats(self):
+        """Return a dict with a snapshot of the pool state and counters.
+
+        Gauges: 'in_use' and 'idle' connections, 'max_age' and 'mean_age' of
+        the open connections (seconds), 'checkout_rate' (connections handed
+        out per second, over the last minute).
+
+        Counters (since the pool creation): 'checkouts' and 'checkins'
+        (connections handed out and returned); 'acquire_time' and
+        'max_acquire' (total and longest time to get a connection);
+        'hold_time' (total time the connections returned were used);
+        'connects', 'connect_time', 'max_connect_time' (connections opened
+        and time spent connecting); 'discarded' (connections closed by
+        the pool); 'errors' (connection failures and requests which couldn't
+        be served), of which 'exhausted' (`PoolError` raised because the pool
+        was full).
+
+        'acquire_histogram' is a list of pairs (*upper bound*, *count*) with
+        the number of checkouts by time to get a connection; the last bound
+        is infinity.
+        """
+        now = _time.monotonic()
+        ages = [now - t for t in self._born.values()]
+        since = int(now) - _RATE_WINDOW
+        recent = sum(n for sec, n in self._rate if sec > since)
+
+        return {
+            'minconn': self.minconn,
+            'maxconn': self.maxconn,
+            'in_use': len(self._used),
+            'idle': len(self._pool),
+            'max_age': max(ages) if ages else 0.0,
+            'mean_age': sum(ages) / len(ages) if ages else 0.0,
+            'checkout_rate': recent / _RATE_WINDOW,
+            'checkouts': self._ncheckouts,
+            'checkins': self._ncheckins,
+            'acquire_time': self._acquire_time,
+            'max_acquire': self._max_acquire,
+            'acquire_histogram': list(zip(
+                _ACQUIRE_BUCKETS + (float('inf'),), self._acquire_hist)),
+            'hold_time': self._hold_time,
+            'connects': self._nconnects,
+            'connect_time': self._connect_time,
+            'max_connect_time': self._max_connect_time,
+            'discarded': self._ndiscarded,
+            'errors': self._nerrors,
+            'exhausted': self._nexhausted,
+        }
+
 
 class SimpleConnectionPool(AbstractConnectionPool):
     """A connection pool that can't be shared across different threads."""
@@ -150,18 +442,40 @@ class SimpleConnectionPool(AbstractConnectionPool):
     getconn = AbstractConnectionPool._getconn
     putconn = AbstractConnectionPool._putconn
     closeall = AbstractConnectionPool._closeall
+    stats = AbstractConnectionPool._stats
 
 
 class ThreadedConnectionPool(AbstractConnectionPool):
     """A connection pool that works with the threading module."""
 
-    def __init__(self, minconn, maxconn, *args, **kwargs):
-        """Initialize the threading lock."""
+    def __init__(self, minconn, maxconn, *args, reap_interval=None, **kwargs):
+        """Initialize the threading lock.
+
+        If 'max_idle' or 'max_lifetime' are specified, a background thread
+        closes the stale idle connections every 'reap_interval' seconds (by
+        default half the shortest of the two) and opens new ones to keep
+        'minconn' connections ready. A 'reap_interval' of 0 disables it.
+        """
         import threading
         AbstractConnectionPool.__init__(
             self, minconn, maxconn, *args, **kwargs)
         self._lock = threading.Lock()
 
+        if reap_interval is None:
+            limits = [t for t in (self.max_idle, self.max_lifetime)
+                if t is not None]
+            reap_interval = min(limits) / 2 if limits else 0
+        self.reap_interval = reap_interval
+
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+        if self.reap_interval:
+            import weakref
+            self._reaper = threading.Thread(
+                target=_reaper, name="psycopg2-pool-reaper", daemon=True,
+                args=(weakref.ref(self), self.reap_interval, self._reaper_stop))
+            self._reaper.start()
+
     def getconn(self, key=None):
         """Get a free connection and assign it to 'key' if not None."""
         self._lock.acquire()
@@ -185,3 +499,786 @@ class ThreadedConnectionPool(AbstractConnectionPool):
             self._closeall()
         finally:
             self._lock.release()
+
+    def stats(self):
+        """Return a dict with a snapshot of the pool state and counters.
+
+        See `AbstractConnectionPool._stats()` for the keys returned.
+        """
+        self._lock.acquire()
+        try:
+            return self._stats()
+        finally:
+            self._lock.release()
+
+    def _closeall(self):
+        AbstractConnectionPool._closeall(self)
+        self._reaper_stop.set()
+
+    def _reap(self):
+        """Replace the stale idle connections, without holding up getconn()."""
+        self._lock.acquire()
+        try:
+            if self.closed:
+                return
+            now = _time.monotonic()
+            stale = [conn for conn in self._pool
+                if conn.closed or self._expired(conn, now)]
+            for conn in stale:
+                self._pool.remove(conn)
+                self._forget(conn)
+            missing = min(
+                self.minconn - len(self._pool),
+                self.maxconn - len(self._pool) - len(self._used))
+        finally:
+            self._lock.release()
+
+        for conn in stale:
+            self._close(conn)
+
+        # Connect outside the lock: the new connections are published at the
+        # end, if the pool has still room for them.
+        fresh = []
+        error = None
+        try:
+            for i in range(missing):
+                start = _time.monotonic()
+                conn = self._new_conn(record=False)
+                fresh.append((conn, _time.monotonic() - start))
+        except psycopg2.Error as e:
+            error = e
+            raise
+        finally:
+            self._lock.acquire()
+            try:
+                if error is not None:
+                    self._error(error)
+                for conn, duration in fresh:
+                    self._connected(conn, duration)
+                    if self.closed or (
+                            len(self._pool) + len(self._used) >= self.maxconn):
+                        self._discard(conn)
+                    else:
+                        self._pool.append(conn)
+                        self._idle[id(conn)] = _time.monotonic()
+            finally:
+                self._lock.release()
+
+
+def _reaper(wpool, interval, stop):
+    """Body of the thread periodically calling `!_reap()` on a pool.
+
+    Only keep a weak reference to the pool, so that the thread doesn't keep
+    it alive.
+    """
+    while not stop.wait(interval):
+        pool = wpool()
+        if pool is None:
+            return
+        try:
+            pool._reap()
+        except psycopg2.Error:
+            # The server is not reachable: try again at the next round
+            pass
+        del pool
+
+
+class _Waiter:
+    """A thread waiting for a connection in a `BlockingConnectionPool`."""
+
+    __slots__ = ('key', 'cond', 'start', 'conn', 'error')
+
+    def __init__(self, key, cond, start):
+        self.key = key
+        self.cond = cond
+        self.start = start
+        self.conn = None
+        self.error = None
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """A threaded connection pool waiting for a connection to be available.
+
+    When all the *maxconn* connections are in use `getconn()` doesn't raise
+    `PoolError` straight away, but waits for a connection to be put back,
+    for at most *timeout* seconds (forever if `!None`). Waiting threads are
+    served in arrival order.
+    """
+
+    def __init__(self, minconn, maxconn, *args, timeout=None, **kwargs):
+        """Initialize the queue of waiting threads."""
+        ThreadedConnectionPool.__init__(
+            self, minconn, maxconn, *args, **kwargs)
+        self.timeout = timeout
+        self._waiters = _deque()
+        self._nwaits = 0
+        self._ntimeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def getconn(self, key=None, timeout=None):
+        """Get a free connection and assign it to 'key' if not None.
+
+        If no connection is available wait for at most 'timeout' seconds
+        (the pool 'timeout' if None) and raise `PoolError` if none was
+        returned in time.
+        """
+        self._lock.acquire()
+        try:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+            if key is not None and key in self._used:
+                return self._used[key]
+
+            # Don't overtake the threads already waiting.
+            if not self._waiters and (
+                    self._pool or len(self._used) < self.maxconn):
+                return self._getconn(key)
+
+            if key is None:
+                key = self._getkey()
+            if timeout is None:
+                timeout = self.timeout
+            return self._wait(key, timeout)
+        finally:
+            self._lock.release()
+
+    def putconn(self, conn=None, key=None, close=False):
+        """Put away an unused connection, handing it to a waiting thread."""
+        self._lock.acquire()
+        try:
+            self._putconn(conn, key, close)
+            self._serve_waiters()
+        finally:
+            self._lock.release()
+
+    def closeall(self):
+        """Close all connections and wake up the waiting threads."""
+        self._lock.acquire()
+        try:
+            self._closeall()
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.error = PoolError("connection pool is closed")
+                waiter.cond.notify()
+        finally:
+            self._lock.release()
+
+    def wait_stats(self):
+        """Return a dict of statistics about the threads that had to wait.
+
+        'waits' and 'timeouts' count the `getconn()` calls which had to wait
+        and the ones which gave up; 'wait_time' and 'max_wait' are the total
+        and the longest time spent waiting, in seconds; 'waiting' is the
+        number of threads waiting right now.
+        """
+        self._lock.acquire()
+        try:
+            return self._wait_stats()
+        finally:
+            self._lock.release()
+
+    def _wait_stats(self):
+        return {
+            'waits': self._nwaits,
+            'timeouts': self._ntimeouts,
+            'wait_time': self._wait_time,
+            'max_wait': self._max_wait,
+            'waiting': len(self._waiters),
+        }
+
+    def _stats(self):
+        """Return the pool statistics, including the `wait_stats()` ones."""
+        rv = ThreadedConnectionPool._stats(self)
+        rv.update(self._wait_stats())
+        return rv
+
+    def _reap(self):
+        ThreadedConnectionPool._reap(self)
+        self._lock.acquire()
+        try:
+            self._serve_waiters()
+        finally:
+            self._lock.release()
+
+    def _keep_idle(self):
+        # A connection put back is more useful to a waiting thread than closed
+        return bool(self._waiters) or len(self._pool) < self.minconn
+
+    def _wait(self, key, timeout):
+        """Wait for a connection to be assigned to 'key'. Call with the lock."""
+        import threading
+        start = _time.monotonic()
+        waiter = _Waiter(key, threading.Condition(self._lock), start)
+        self._waiters.append(waiter)
+
+        try:
+            while waiter.conn is None and waiter.error is None:
+                if timeout is None:
+                    waiter.cond.wait()
+                    continue
+                remaining = start + timeout - _time.monotonic()
+                if remaining <= 0:
+                    break
+                waiter.cond.wait(remaining)
+        finally:
+            waited = _time.monotonic() - start
+            self._nwaits += 1
+            self._wait_time += waited
+            if waited > self._max_wait:
+                self._max_wait = waited
+
+        if waiter.conn is not None:
+            return waiter.conn
+        if waiter.error is not None:
+            raise waiter.error
+
+        self._waiters.remove(waiter)
+        self._ntimeouts += 1
+        error = PoolError(
+            f"couldn't get a connection after {timeout:.2f} sec")
+        self._error(error)
+        raise error
+
+    def _serve_waiters(self):
+        """Assign the available connections to the waiting threads, in order."""
+        while self._waiters and (
+                self._pool or len(self._used) < self.maxconn):
+            waiter = self._waiters.popleft()
+            try:
+                waiter.conn = self._getconn(waiter.key, waiter.start)
+            except Exception as e:
+                waiter.error = e
+            waiter.cond.notify()
+
+
+class RoutingPool:
+    """Route connections between a primary server and its read replicas.
+
+    'primary' and every item of 'replicas' are thread-safe pools (e.g.
+    `ThreadedConnectionPool` or `BlockingConnectionPool`) connected to the
+    respective servers. `getconn()` returns a connection to the primary,
+    unless 'readonly' is true, in which case it returns a connection to a
+    replica, chosen according to 'strategy': "round_robin" or "least_used"
+    (the replica with the fewest connections in use).
+
+    After a read-write connection of a 'session' (any hashable, e.g. a user
+    id; `!None` is a session too) is returned, the read-only connections of
+    the same session are taken from the primary for 'sticky' seconds, so that
+    the session reads its own writes even if the replicas lag behind.
+
+    A replica failing to connect, or whose connection is returned broken, is
+    considered down and not used for 'retry_interval' seconds; then it is
+    checked with a trivial query before being used again. `check_replicas()`
+    can be called to check all of them. If no replica is available the
+    read-only connections are taken from the primary. The replicas are
+    never waited for: an exhausted `BlockingConnectionPool` replica is
+    skipped too.
+    """
+
+    def __init__(self, primary, replicas=(), strategy='round_robin',
+            sticky=0.0, retry_interval=30.0):
+        import threading
+        if strategy not in ('round_robin', 'least_used'):
+            raise ValueError(f"unknown routing strategy: {strategy!r}")
+
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.sticky = sticky
+        self.retry_interval = retry_interval
+        self.closed = False
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down = {}         # replica index -> time it went down
+        self._writes = {}       # session -> time of the last write
+        self._used = {}         # id(conn) -> (pool, session, readonly)
+
+    def getconn(self, readonly=False, session=None):
+        """Get a connection to the primary, or to a replica if 'readonly'."""
+        if self.closed:
+            raise PoolError("connection pool is closed")
+
+        pool = None
+        if readonly and self.replicas and not self._is_sticky(session):
+            pool, conn = self._replica_conn()
+
+        if pool is None:
+            pool = self.primary
+            conn = pool.getconn()
+
+        self._lock.acquire()
+        try:
+            self._used[id(conn)] = (pool, session, readonly)
+        finally:
+            self._lock.release()
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool it was taken from."""
+        self._lock.acquire()
+        try:
+            try:
+                pool, session, readonly = self._used.pop(id(conn))
+            except KeyError:
+                raise PoolError("trying to put unkeyed connection") from None
+
+            if not readonly:
+                self._note_write(session)
+            elif pool is not self.primary and _broken(conn):
+                self._down[self.replicas.index(pool)] = _time.monotonic()
+        finally:
+            self._lock.release()
+
+        pool.putconn(conn, close=close)
+
+    def closeall(self):
+        """Close all the connections of the primary and the replicas."""
+        self.closed = True
+        self.primary.closeall()
+        for pool in self.replicas:
+            pool.closeall()
+
+    def stats(self):
+        """Return the statistics of the primary and replicas pools.
+
+        Return a dict with keys 'primary', the primary pool `!stats()`, and
+        'replicas', a list with the `!stats()` of every replica, including
+        the key 'down' (`!True` if the replica is currently not used).
+        """
+        self._lock.acquire()
+        try:
+            down = set(self._down)
+        finally:
+            self._lock.release()
+
+        replicas = []
+        for i, pool in enumerate(self.replicas):
+            rv = pool.stats()
+            rv['down'] = i in down
+            replicas.append(rv)
+        return {'primary': self.primary.stats(), 'replicas': replicas}
+
+    def check_replicas(self):
+        """Check every replica with a trivial query, updating its state.
+
+        Return the list of the replicas available.
+        """
+        rv = []
+        for i, pool in enumerate(self.replicas):
+            if self._check(pool):
+                self._lock.acquire()
+                try:
+                    self._down.pop(i, None)
+                finally:
+                    self._lock.release()
+                rv.append(pool)
+            else:
+                self._lock.acquire()
+                try:
+                    self._down[i] = _time.monotonic()
+                finally:
+                    self._lock.release()
+        return rv
+
+    def _is_sticky(self, session):
+        """Return `!True` if 'session' wrote recently."""
+        if not self.sticky:
+            return False
+        last = self._writes.get(session)
+        return last is not None and _time.monotonic() - last < self.sticky
+
+    def _note_write(self, session):
+        """Remember the time of a write of 'session'. Call with the lock."""
+        if not self.sticky:
+            return
+        now = _time.monotonic()
+        self._writes[session] = now
+        if len(self._writes) > 1000:
+            # forget the sessions past their sticky window
+            self._writes = {s: t for s, t in self._writes.items()
+                if now - t < self.sticky}
+
+    def _candidates(self):
+        """Return the indexes of the replicas to try, in order of preference."""
+        n = len(self.replicas)
+        if self.strategy == 'least_used':
+            # don't hold our lock while taking the replicas' ones
+            in_use = [pool.stats()['in_use'] for pool in self.replicas]
+
+        self._lock.acquire()
+        try:
+            if self.strategy == 'round_robin':
+                start = self._next
+                self._next = (start + 1) % n
+                order = [(start + i) % n for i in range(n)]
+            else:
+                order = sorted(range(n), key=in_use.__getitem__)
+
+            now = _time.monotonic()
+            rv = []
+            for i in order:
+                down = self._down.get(i)
+                if down is None:
+                    rv.append((i, False))
+                elif now - down >= self.retry_interval:
+                    # try it again, checking it first; in the meantime don't
+                    # let other threads retry it too
+                    self._down[i] = now
+                    rv.append((i, True))
+            return rv
+        finally:
+            self._lock.release()
+
+    def _replica_conn(self):
+        """Return a pool and a connection to an available replica.
+
+        Return (None, None) if no replica is available.
+        """
+        for i, retry in self._candidates():
+            pool = self.replicas[i]
+            if retry and not self._check(pool):
+                continue
+
+            try:
+                conn = _getconn_nowait(pool)
+            except PoolError:
+                # exhausted: try another replica
+                continue
+            except psycopg2.OperationalError:
+                self._lock.acquire()
+                try:
+                    self._down[i] = _time.monotonic()
+                finally:
+                    self._lock.release()
+                continue
+
+            if retry:
+                self._lock.acquire()
+                try:
+                    self._down.pop(i, None)
+                finally:
+                    self._lock.release()
+            return pool, conn
+
+        return None, None
+
+    def _check(self, pool):
+        """Return `!True` if 'pool' can return a working connection."""
+        try:
+            conn = _getconn_nowait(pool)
+        except PoolError:
+            # exhausted, but its connections work
+            return True
+        except psycopg2.Error:
+            return False
+
+        ok = pool._ping(conn)
+        pool.putconn(conn, close=not ok)
+        return ok
+
+
+def _getconn_nowait(pool):
+    """Get a connection from 'pool', raising `PoolError` if it is exhausted.
+
+    A `BlockingConnectionPool` would wait for a connection instead.
+    """
+    if isinstance(pool, BlockingConnectionPool):
+        return pool.getconn(timeout=0)
+    return pool.getconn()
+
+
+def _broken(conn):
+    """Return `!True` if the server connection of 'conn' was lost."""
+    return bool(conn.closed) or (
+        conn.info.transaction_status == _ext.TRANSACTION_STATUS_UNKNOWN)
+
+
+class AsyncConnectionPool:
+    """A connection pool for asyncio, using asynchronous connections.
+
+    Connections are created with *async_* and all the communication with the
+    server is driven by the running event loop using
+    `~psycopg2.extras.wait_asyncio()`, so a single thread can run many
+    queries concurrently. The pool must be filled calling `open()` from a
+    coroutine; when all the *maxconn* connections are in use `getconn()`
+    waits for one to be returned, for at most *timeout* seconds.
+
+    Note that asynchronous connections are always in autocommit mode.
+
+    'listeners' is a sequence of `PoolListener` to notify of the pool events,
+    called in the event loop; `stats()` returns the same statistics of the
+    other pools, with the `BlockingConnectionPool.wait_stats()` ones.
+    """
+
+    def __init__(self, minconn, maxconn, *args, timeout=None, listeners=(),
+            **kwargs):
+        """Initialize the connection pool; no connection is created yet."""
+        self.minconn = int(minconn)
+        self.maxconn = int(maxconn)
+        self.timeout = timeout
+        self.closed = False
+
+        self._args = args
+        self._kwargs = kwargs
+
+        self._pool = []
+        self._used = set()
+        self._nconns = 0        # connections open or being opened
+        self._waiters = _deque()
+
+        self._born = {}     # id(conn) -> connection time
+        self._idle = {}
+        self._out = {}      # id(conn) -> time handed out
+        self._init_stats(listeners)
+        self._nwaits = 0
+        self._ntimeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    _init_stats = AbstractConnectionPool._init_stats
+    add_listener = AbstractConnectionPool.add_listener
+    remove_listener = AbstractConnectionPool.remove_listener
+    _forget = AbstractConnectionPool._forget
+    _notify = AbstractConnectionPool._notify
+    _connected = AbstractConnectionPool._connected
+    _error = AbstractConnectionPool._error
+    _checkout = AbstractConnectionPool._checkout
+    _checkin = AbstractConnectionPool._checkin
+    _wait_stats = BlockingConnectionPool._wait_stats
+
+    def stats(self):
+        """Return a dict with a snapshot of the pool state and counters.
+
+        See `AbstractConnectionPool._stats()` and
+        `BlockingConnectionPool.wait_stats()` for the keys returned.
+        """
+        rv = AbstractConnectionPool._stats(self)
+        rv.update(self._wait_stats())
+        return rv
+
+    async def open(self):
+        """Create the initial 'minconn' connections concurrently."""
+        import asyncio
+
+        n = self.minconn - self._nconns
+        if n <= 0:
+            return
+        self._nconns += n
+        results = await asyncio.gather(
+            *[self._connect() for i in range(n)], return_exceptions=True)
+
+        error = None
+        for rv in results:
+            if isinstance(rv, BaseException):
+                self._nconns -= 1
+                error = rv
+            else:
+                self._put(rv)
+        if error is not None:
+            raise error
+
+    async def _connect(self):
+        """Create a new asynchronous connection, waiting for it to be ready."""
+        from psycopg2.extras import wait_asyncio
+
+        start = _time.monotonic()
+        try:
+            conn = psycopg2.connect(*self._args, async_=True, **self._kwargs)
+            try:
+                await wait_asyncio(conn)
+            except BaseException:
+                conn.close()
+                raise
+        except psycopg2.Error as e:
+            self._error(e)
+            raise
+        now = _time.monotonic()
+        self._born[id(conn)] = now
+        self._connected(conn, now - start)
+        return conn
+
+    async def getconn(self, timeout=None):
+        """Get a free connection, waiting for one if the pool is exhausted.
+
+        Raise `PoolError` if no connection is available after 'timeout'
+        seconds (the pool 'timeout' if None).
+        """
+        import asyncio
+
+        if self.closed:
+            raise PoolError("connection pool is closed")
+
+        start = _time.monotonic()
+        while self._pool and not self._waiters:
+            conn = self._pool.pop()
+            if conn.closed:
+                self._forget(conn)
+                self._nconns -= 1
+                continue
+            self._used.add(conn)
+            self._checkout(conn, start)
+            return conn
+
+        if self._nconns < self.maxconn and not self._waiters:
+            self._nconns += 1
+        else:
+            if timeout is None:
+                timeout = self.timeout
+            ready = asyncio.get_running_loop().create_future()
+            self._waiters.append(ready)
+            try:
+                await asyncio.wait_for(asyncio.shield(ready), timeout)
+            except asyncio.TimeoutError:
+                self._waited(start)
+                self._give_up(ready)
+                self._ntimeouts += 1
+                error = PoolError(
+                    f"couldn't get a connection after {timeout:.2f} sec")
+                self._error(error)
+                raise error from None
+            except BaseException:
+                self._waited(start)
+                self._give_up(ready)
+                raise
+            self._waited(start)
+            conn = ready.result()
+            if conn is not None:
+                self._checkout(conn, start)
+                return conn
+            # we were given a free slot to open a new connection
+
+        try:
+            conn = await self._connect()
+        except BaseException:
+            self._nconns -= 1
+            self._serve_waiters()
+            raise
+        self._used.add(conn)
+        self._checkout(conn, start)
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Put away a connection, handing it to a waiting task if any."""
+        if conn not in self._used:
+            raise PoolError("trying to put a connection not from this pool")
+        self._used.discard(conn)
+        self._checkin(conn)
+
+        if self.closed or close or conn.closed or conn.isexecuting():
+            # A connection still executing is not in a consistent state
+            self._forget(conn)
+            if not conn.closed:
+                conn.close()
+            self._nconns -= 1
+            self._serve_waiters()
+        else:
+            self._put(conn)
+
+    def _waited(self, start):
+        """Account for a task which waited for a connection since 'start'."""
+        waited = _time.monotonic() - start
+        self._nwaits += 1
+        self._wait_time += waited
+        if waited > self._max_wait:
+            self._max_wait = waited
+
+    def _give_up(self, ready):
+        """Stop waiting on 'ready', passing on what it may have received."""
+        if not ready.done():
+            ready.cancel()
+            self._waiters.remove(ready)
+        elif not ready.cancelled() and ready.exception() is None:
+            conn = ready.result()
+            if conn is None:
+                # we were given a slot to connect: leave it to the next one
+                self._nconns -= 1
+                self._serve_waiters()
+            else:
+                self._used.discard(conn)
+                self._put(conn)
+
+    def _put(self, conn):
+        """Give an idle connection to the first waiter or add it to the pool."""
+        while self._waiters:
+            ready = self._waiters.popleft()
+            if not ready.done():
+                self._used.add(conn)
+                ready.set_result(conn)
+                return
+        if len(self._pool) < self.minconn:
+            self._pool.append(conn)
+        else:
+            self._forget(conn)
+            conn.close()
+            self._nconns -= 1
+
+    def _serve_waiters(self):
+        """Let the first waiter open a new connection, if there is room."""
+        while self._waiters and self._nconns < self.maxconn:
+            ready = self._waiters.popleft()
+            if not ready.done():
+                self._nconns += 1
+                ready.set_result(None)
+
+    def closeall(self):
+        """Close all connections (even the one currently in use.)"""
+        if self.closed:
+            raise PoolError("connection pool is closed")
+        for conn in self._pool + list(self._used):
+            try:
+                conn.close()
+            except Exception:
+                pass
+        while self._waiters:
+            ready = self._waiters.popleft()
+            if not ready.done():
+                ready.set_exception(PoolError("connection pool is closed"))
+        self._born.clear()
+        self._out.clear()
+        self.closed = True
+
+    @_asynccontextmanager
+    async def connection(self, timeout=None):
+        """Context manager returning a connection and putting it back on exit.
+
+        A connection left in the middle of an operation, e.g. because the
+        task was cancelled while waiting for the server, is closed.
+        """
+        conn = await self.getconn(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            if not self.closed:
+                self.putconn(conn)
+
+    async def execute(self, query, vars=None):
+        """Execute a command on a pool connection and return its rowcount."""
+        from psycopg2.extras import wait_asyncio
+
+        async with self.connection() as conn:
+            curs = conn.cursor()
+            curs.execute(query, vars)
+            await wait_asyncio(conn)
+            return curs.rowcount
+
+    async def fetchone(self, query, vars=None, cursor_factory=None):
+        """Execute a query on a pool connection and return its first record."""
+        from psycopg2.extras import wait_asyncio
+
+        async with self.connection() as conn:
+            curs = conn.cursor(cursor_factory=cursor_factory)
+            curs.execute(query, vars)
+            await wait_asyncio(conn)
+            return curs.fetchone()
+
+    async def fetchall(self, query, vars=None, cursor_factory=None):
+        """Execute a query on a pool connection and return all its records."""
+        from psycopg2.extras import wait_asyncio
+
+        async with self.connection() as conn:
+            curs = conn.cursor(cursor_factory=cursor_factory)
+            curs.execute(query, vars)
+            await wait_asyncio(conn)
+            return curs.fetchall()
@@ -25,6 +25,7 @@
 # License for more details.
 
 import string
+from functools import lru_cache
 
 from psycopg2 import extensions as ext
 
@@ -82,6 +83,9 @@ class Composable:
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return hash((type(self), self._wrapped))
+
 
 class Composed(Composable):
     """
@@ -125,6 +129,9 @@ class Composed(Composable):
     def __iter__(self):
         return iter(self._wrapped)
 
+    def __hash__(self):
+        return hash((type(self), tuple(self._wrapped)))
+
     def __add__(self, other):
         if isinstance(other, Composed):
             return Composed(self._wrapped + other._wrapped)
@@ -224,36 +231,29 @@ class SQL(Composable):
 
         """
         rv = []
-        autonum = 0
-        for pre, name, spec, conv in _formatter.parse(self._wrapped):
-            if spec:
-                raise ValueError("no format specification supported by SQL")
-            if conv:
-                raise ValueError("no format conversion supported by SQL")
-            if pre:
-                rv.append(SQL(pre))
-
-            if name is None:
+        for pre, key in _parse_format(self._wrapped):
+            if pre is not None:
+                rv.append(pre)
+            if key is None:
                 continue
+            rv.append(args[key] if isinstance(key, int) else kwargs[key])
 
-            if name.isdigit():
-                if autonum:
-                    raise ValueError(
-                        "cannot switch from automatic field numbering to manual")
-                rv.append(args[int(name)])
-                autonum = None
+        return Composed(rv)
 
-            elif not name:
-                if autonum is None:
-                    raise ValueError(
-                        "cannot switch from manual field numbering to automatic")
-                rv.append(args[autonum])
-                autonum += 1
+    def compile(self):
+        """
+        Parse the `!SQL` string once into a reusable `Template`.
 
-            else:
-                rv.append(kwargs[name])
+        :rtype: `Template`
 
-        return Composed(rv)
+        Example::
+
+            >>> tmpl = sql.SQL("select * from {} where {} = %s").compile()
+            >>> print(tmpl.render(conn, sql.Identifier('people'), sql.Identifier('id')))
+            select * from "people" where "id" = %s
+
+        """
+        return Template(self)
 
     def join(self, seq):
         """
@@ -347,7 +347,15 @@ class Identifier(Composable):
         return f"{self.__class__.__name__}({', '.join(map(repr, self._wrapped))})"
 
     def as_string(self, context):
-        return '.'.join(ext.quote_ident(s, context) for s in self._wrapped)
+        encoding = _context_encoding(context)
+        rv = _quoted_idents.get((self._wrapped, encoding))
+        if rv is None:
+            rv = '.'.join(ext.quote_ident(s, context) for s in self._wrapped)
+            if encoding is not None:
+                if len(_quoted_idents) >= _MAX_CACHE:
+                    _quoted_idents.clear()
+                _quoted_idents[self._wrapped, encoding] = rv
+        return rv
 
 
 class Literal(Composable):
@@ -450,6 +458,153 @@ class Placeholder(Composable):
             return "%s"
 
 
+class Template:
+    """
+    An `SQL` template parsed once, to be merged with `Composable` parameters.
+
+    `!Template` objects are created by `SQL.compile()`. The `format()` method
+    works like `SQL.format()`, without parsing the string again; `render()`
+    returns the query string directly. The strings rendered with parameters
+    made only of `SQL`, `Identifier`, `Placeholder` (or `Composed` of them) are
+    memoized for every connection encoding, so rendering the same query again
+    costs a dictionary lookup.
+    """
+
+    def __init__(self, sql):
+        if not isinstance(sql, SQL):
+            raise TypeError("Template can be only created from an SQL")
+        self.sql = sql
+        self._parts = _parse_format(sql.string)
+        self._rendered = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.sql!r})"
+
+    def format(self, *args, **kwargs):
+        """
+        Merge `Composable` objects into the template.
+
+        :rtype: `Composed`
+
+        Same as `SQL.format()`.
+        """
+        rv = []
+        for pre, key in self._parts:
+            if pre is not None:
+                rv.append(pre)
+            if key is None:
+                continue
+            rv.append(args[key] if isinstance(key, int) else kwargs[key])
+
+        return Composed(rv)
+
+    def render(self, context, *args, **kwargs):
+        """
+        Merge `Composable` objects into the template and return a string.
+
+        :param context: the context to evaluate the string into.
+        :type context: `connection` or `cursor`
+        :rtype: `!str`
+
+        Equivalent to ``template.format(*args, **kwargs).as_string(context)``.
+        """
+        key = None
+        encoding = _context_encoding(context)
+        if encoding is not None and all(map(_is_static, args)) \
+                and all(map(_is_static, kwargs.values())):
+            key = (encoding, args, tuple(kwargs.items()))
+            try:
+                return self._rendered[key]
+            except KeyError:
+                pass
+
+        rv = []
+        for pre, k in self._parts:
+            if pre is not None:
+                rv.append(pre._wrapped)
+            if k is None:
+                continue
+            rv.append((args[k] if isinstance(k, int) else kwargs[k])
+                .as_string(context))
+        rv = ''.join(rv)
+
+        if key is not None:
+            if len(self._rendered) >= _MAX_CACHE:
+                self._rendered.clear()
+            self._rendered[key] = rv
+        return rv
+
+
+# Maximum number of quoted identifiers and rendered templates to remember
+_MAX_CACHE = 1024
+
+# (identifier strings, encoding) -> quoted identifier
+_quoted_idents = {}
+
+
+@lru_cache(512)
+def _parse_format(string):
+    """Parse a `SQL.format()` string.
+
+    Return a tuple of pairs (*pre*, *key*) where *pre* is the `SQL` preceding
+    a placeholder (`!None` if empty) and *key* is the index or name of the
+    argument to replace it (`!None` if there is no placeholder).
+    """
+    rv = []
+    autonum = 0
+    for pre, name, spec, conv in _formatter.parse(string):
+        if spec:
+            raise ValueError("no format specification supported by SQL")
+        if conv:
+            raise ValueError("no format conversion supported by SQL")
+        pre = SQL(pre) if pre else None
+
+        if name is None:
+            key = None
+
+        elif name.isdigit():
+            if autonum:
+                raise ValueError(
+                    "cannot switch from automatic field numbering to manual")
+            key = int(name)
+            autonum = None
+
+        elif not name:
+            if autonum is None:
+                raise ValueError(
+                    "cannot switch from manual field numbering to automatic")
+            key = autonum
+            autonum += 1
+
+        else:
+            key = name
+
+        rv.append((pre, key))
+
+    return tuple(rv)
+
+
+def _context_encoding(context):
+    """Return the encoding of a connection or cursor, `!None` if unknown."""
+    if isinstance(context, ext.connection):
+        return context.encoding
+    elif isinstance(context, ext.cursor):
+        return context.connection.encoding
+    else:
+        return None
+
+
+def _is_static(obj):
+    """Return `!True` if *obj* renders the same on every connection with the
+    same encoding."""
+    cls = type(obj)
+    if cls is SQL or cls is Identifier or cls is Placeholder:
+        return True
+    if cls is Composed:
+        return all(map(_is_static, obj._wrapped))
+    return False
+
+
 # Literals
 NULL = SQL("NULL")
 DEFAULT = SQL("DEFAULT")
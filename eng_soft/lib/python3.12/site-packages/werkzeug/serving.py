@@ -16,10 +16,16 @@ from __future__ import annotations
 import errno
 import io
 import os
+import re
+import select
 import selectors
+import signal
 import socket
 import socketserver
+import stat
 import sys
+import threading
+import time
 import typing as t
 from datetime import datetime as dt
 from datetime import timedelta
@@ -31,8 +37,17 @@ from urllib.parse import urlsplit
 
 from ._internal import _log
 from ._internal import _wsgi_encoding_dance
+from .exceptions import BadRequest
+from .exceptions import ClientDisconnected
+from .exceptions import HTTPException
 from .exceptions import InternalServerError
+from .exceptions import RequestEntityTooLarge
+from .exceptions import RequestHeaderFieldsTooLarge
+from .exceptions import ServiceUnavailable
 from .urls import uri_to_iri
+from .wsgi import FileWrapper
+from .wsgi import LimitedStream
+from .wsgi import _RangeWrapper
 
 try:
     import ssl
@@ -72,6 +87,10 @@ except AttributeError:
 
 LISTEN_QUEUE = 128
 
+# Unread request body that is read and discarded to keep the connection
+# alive. If there is more, it's cheaper for the client to connect again.
+KEEP_ALIVE_MAX_DRAIN = 1_000_000
+
 _TSSLContextArg = t.Optional[
     t.Union["ssl.SSLContext", t.Tuple[str, t.Optional[str]], t.Literal["adhoc"]]
 ]
@@ -148,10 +167,22 @@ class DechunkedInput(io.RawIOBase):
 
 
 class WSGIRequestHandler(BaseHTTPRequestHandler):
-    """A request handler that implements WSGI dispatching."""
+    """A request handler that implements WSGI dispatching.
+
+    .. versionchanged:: 3.1
+        HTTP/1.1 connections are kept alive between requests if the
+        server has a ``keep_alive_timeout``.
+    """
 
     server: BaseWSGIServer
 
+    #: The number of requests handled on the current connection.
+    requests_handled = 0
+
+    #: Answer ``Expect: 100-continue`` with a *100 Continue* response before
+    #: running the application. Disabled by servers answering it themselves.
+    send_continue = True
+
     @property
     def server_version(self) -> str:  # type: ignore
         return self.server._server_version
@@ -183,6 +214,7 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
             "wsgi.multithread": self.server.multithread,
             "wsgi.multiprocess": self.server.multiprocess,
             "wsgi.run_once": False,
+            "wsgi.file_wrapper": FileWrapper,
             "werkzeug.socket": self.connection,
             "SERVER_SOFTWARE": self.server_version,
             "REQUEST_METHOD": self.command,
@@ -238,18 +270,44 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
         return environ
 
     def run_wsgi(self) -> None:
-        if self.headers.get("Expect", "").lower().strip() == "100-continue":
+        if (
+            self.send_continue
+            and self.headers.get("Expect", "").lower().strip() == "100-continue"
+        ):
             self.wfile.write(b"HTTP/1.1 100 Continue\r\n\r\n")
 
         self.environ = environ = self.make_environ()
+        self.requests_handled += 1
+        keep_alive = self.can_keep_alive()
+        body: LimitedStream | None = None
+
+        if keep_alive and not environ.get("wsgi.input_terminated"):
+            # The next request starts after the body: limit the input to
+            # the body so that it can be read past what the app consumed.
+            try:
+                content_length = int(environ.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                content_length = -1
+
+            if content_length < 0:
+                keep_alive = False
+            else:
+                body = LimitedStream(self.rfile, content_length)
+                environ["wsgi.input"] = body
+                environ["wsgi.input_terminated"] = True
+
+        # The application may replace or wrap the stream in the environ.
+        request_input = environ["wsgi.input"]
+
         status_set: str | None = None
         headers_set: list[tuple[str, str]] | None = None
         status_sent: str | None = None
         headers_sent: list[tuple[str, str]] | None = None
         chunk_response: bool = False
+        no_body: bool = False
 
         def write(data: bytes) -> None:
-            nonlocal status_sent, headers_sent, chunk_response
+            nonlocal status_sent, headers_sent, chunk_response, no_body
             assert status_set is not None, "write() before start_response"
             assert headers_set is not None, "write() before start_response"
             if status_sent is None:
@@ -261,10 +319,12 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
                     code_str, msg = status_sent, ""
                 code = int(code_str)
                 self.send_response(code, msg)
-                header_keys = set()
-                for key, value in headers_sent:
-                    self.send_header(key, value)
-                    header_keys.add(key.lower())
+                header_keys = {key.lower() for key, _ in headers_sent}
+                no_body = (
+                    environ["REQUEST_METHOD"] == "HEAD"
+                    or (100 <= code < 200)
+                    or code in {204, 304}
+                )
 
                 # Use chunked transfer encoding if there is no content
                 # length. Do not use for 1xx and 204 responses. 304
@@ -272,28 +332,68 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
                 # is the more conservative behavior and matches other
                 # parts of the code.
                 # https://httpwg.org/specs/rfc7230.html#rfc.section.3.3.1
+                chunk_response = (
+                    not ("content-length" in header_keys or no_body)
+                    and self.protocol_version >= "HTTP/1.1"
+                )
+
+                # The application may ask to close the connection by sending
+                # "Connection: close" itself.
+                if any(
+                    key.lower() == "connection" and value.strip().lower() == "close"
+                    for key, value in headers_sent
+                ):
+                    self.close_connection = True
+
+                # Too much of the body left unread to drain it after the
+                # response, the connection is closed: say so in the headers.
                 if (
-                    not (
+                    keep_alive
+                    and body is not None
+                    and body.limit - body.tell() > KEEP_ALIVE_MAX_DRAIN
+                ):
+                    self.close_connection = True
+
+                # Keep the connection only if the client can tell where the
+                # response ends.
+                keep = (
+                    keep_alive
+                    and not self.close_connection
+                    and (
                         "content-length" in header_keys
-                        or environ["REQUEST_METHOD"] == "HEAD"
-                        or (100 <= code < 200)
-                        or code in {204, 304}
+                        or no_body
+                        or (chunk_response and self.request_version >= "HTTP/1.1")
                     )
-                    and self.protocol_version >= "HTTP/1.1"
-                ):
-                    chunk_response = True
+                )
+                close_sent = False
+
+                for key, value in headers_sent:
+                    if key.lower() == "connection" and not keep:
+                        # Replaced by "Connection: close" below.
+                        if value.strip().lower() != "close":
+                            continue
+
+                        close_sent = True
+
+                    self.send_header(key, value)
+
+                if chunk_response:
                     self.send_header("Transfer-Encoding", "chunked")
 
-                # Always close the connection. This disables HTTP/1.1
-                # keep-alive connections. They aren't handled well by
-                # Python's http.server because it doesn't know how to
-                # drain the stream before the next request line.
-                self.send_header("Connection", "close")
+                if keep:
+                    if (
+                        self.request_version == "HTTP/1.0"
+                        and "connection" not in header_keys
+                    ):
+                        self.send_header("Connection", "keep-alive")
+                elif not close_sent:
+                    self.send_header("Connection", "close")
+
                 self.end_headers()
 
             assert isinstance(data, bytes), "applications must write bytes"
 
-            if data:
+            if data and not no_body:
                 if chunk_response:
                     self.wfile.write(hex(len(data))[2:].encode())
                     self.wfile.write(b"\r\n")
@@ -322,38 +422,33 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
         def execute(app: WSGIApplication) -> None:
             application_iter = app(environ, start_response)
             try:
-                for data in application_iter:
-                    write(data)
-                if not headers_sent:
+                file_range = None
+
+                if headers_set is not None:
+                    file_range = self.get_sendfile_range(application_iter)
+
+                if file_range is not None:
                     write(b"")
+
+                    if not no_body:
+                        self.sendfile(*file_range, chunked=chunk_response)
+                else:
+                    for data in application_iter:
+                        write(data)
+                    if not headers_sent:
+                        write(b"")
                 if chunk_response:
                     self.wfile.write(b"0\r\n\r\n")
             finally:
-                # Check for any remaining data in the read socket, and discard it. This
-                # will read past request.max_content_length, but lets the client see a
-                # 413 response instead of a connection reset failure. If we supported
-                # keep-alive connections, this naive approach would break by reading the
-                # next request line. Since we know that write (above) closes every
-                # connection we can read everything.
-                selector = selectors.DefaultSelector()
-                selector.register(self.connection, selectors.EVENT_READ)
-                total_size = 0
-                total_reads = 0
-
-                # A timeout of 0 tends to fail because a client needs a small amount of
-                # time to continue sending its data.
-                while selector.select(timeout=0.01):
-                    # Only read 10MB into memory at a time.
-                    data = self.rfile.read(10_000_000)
-                    total_size += len(data)
-                    total_reads += 1
-
-                    # Stop reading on no data, >=10GB, or 1000 reads. If a client sends
-                    # more than that, they'll get a connection reset failure.
-                    if not data or total_size >= 10_000_000_000 or total_reads > 1000:
-                        break
+                # On a kept-alive connection read the rest of the request body, up
+                # to the start of the next request. Close the connection if there
+                # is too much of it.
+                if keep_alive and not self.close_connection:
+                    if not self.drain_input(request_input):
+                        self.close_connection = True
 
-                selector.close()
+                if self.close_connection or not keep_alive:
+                    self.drain_socket()
 
                 if hasattr(application_iter, "close"):
                     application_iter.close()
@@ -361,12 +456,14 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
         try:
             execute(self.server.app)
         except (ConnectionError, socket.timeout) as e:
+            self.close_connection = True
             self.connection_dropped(e, environ)
         except Exception as e:
             if self.server.passthrough_errors:
                 raise
 
-            if status_sent is not None and chunk_response:
+            # The response already started can't be completed.
+            if status_sent is not None:
                 self.close_connection = True
 
             try:
@@ -384,6 +481,174 @@ class WSGIRequestHandler(BaseHTTPRequestHandler):
             msg = DebugTraceback(e).render_traceback_text()
             self.server.log("error", f"Error on request:\n{msg}")
 
+    def get_sendfile_range(
+        self, app_iter: t.Iterable[bytes]
+    ) -> tuple[t.IO[bytes], int, int] | None:
+        """If the response iterable is a :class:`~werkzeug.wsgi.FileWrapper`,
+        possibly limited to a range, wrapping a regular file, return the
+        file, the offset and the number of bytes to send with
+        :meth:`sendfile`. Otherwise, or with TLS, return ``None``.
+
+        .. versionadded:: 3.1
+        """
+        if self.server.ssl_context is not None or not isinstance(
+            self.connection, socket.socket
+        ):
+            return None
+
+        offset = None
+        count = None
+
+        if isinstance(app_iter, _RangeWrapper):
+            # The range can only be sent if nothing was read yet.
+            if app_iter.read_length or not app_iter.seekable:
+                return None
+
+            offset = app_iter.start_byte
+            count = app_iter.byte_range
+            app_iter = app_iter.iterable
+
+        if not isinstance(app_iter, FileWrapper):
+            return None
+
+        file = app_iter.file
+
+        try:
+            st = os.fstat(file.fileno())
+
+            if offset is None:
+                offset = file.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        size = max(st.st_size - offset, 0)
+        return file, offset, size if count is None else min(count, size)
+
+    def sendfile(
+        self, file: t.IO[bytes], offset: int, count: int, chunked: bool = False
+    ) -> None:
+        """Send ``count`` bytes of ``file`` from ``offset`` as the response
+        body, without copying them through Python where the platform
+        supports it. The headers must be sent already.
+
+        .. versionadded:: 3.1
+        """
+        if not count:
+            return
+
+        if chunked:
+            self.wfile.write(f"{count:x}\r\n".encode())
+
+        sent = self.connection.sendfile(file, offset, count)
+
+        if sent < count:
+            # The file was truncated, the response is incomplete.
+            self.close_connection = True
+
+        if chunked:
+            self.wfile.write(b"\r\n")
+
+    def can_keep_alive(self) -> bool:
+        """Whether the connection may stay open after the current request.
+
+        Requires a server ``keep_alive_timeout``, HTTP/1.1 support, a client
+        not asking to close, and fewer than the server
+        ``max_keep_alive_requests`` requests on the connection.
+
+        .. versionadded:: 3.1
+        """
+        return bool(
+            self.server.keep_alive_timeout
+            and self.protocol_version >= "HTTP/1.1"
+            and not self.close_connection
+            and self.requests_handled < self.server.max_keep_alive_requests
+        )
+
+    def drain_input(self, stream: t.IO[bytes]) -> bool:
+        """Read and discard what is left of the request body in ``stream``.
+
+        Return ``False`` if the body can't be read to the end, or if more
+        than :data:`KEEP_ALIVE_MAX_DRAIN` bytes are left.
+
+        .. versionadded:: 3.1
+        """
+        total_size = 0
+
+        try:
+            while True:
+                data = stream.read(65536)
+
+                if not data:
+                    return True
+
+                total_size += len(data)
+
+                if total_size > KEEP_ALIVE_MAX_DRAIN:
+                    return False
+        except (OSError, ValueError, ClientDisconnected):
+            return False
+
+    def drain_socket(self) -> None:
+        """Discard any data left in the read socket before closing it.
+
+        This will read past ``request.max_content_length``, but lets the
+        client see a 413 response instead of a connection reset failure.
+
+        .. versionadded:: 3.1
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self.connection, selectors.EVENT_READ)
+        total_size = 0
+        total_reads = 0
+
+        try:
+            # A timeout of 0 tends to fail because a client needs a small amount of
+            # time to continue sending its data.
+            while selector.select(timeout=0.01):
+                # Only read 10MB into memory at a time.
+                data = self.rfile.read(10_000_000)
+                total_size += len(data)
+                total_reads += 1
+
+                # Stop reading on no data, >=10GB, or 1000 reads. If a client sends
+                # more than that, they'll get a connection reset failure.
+                if not data or total_size >= 10_000_000_000 or total_reads > 1000:
+                    break
+        finally:
+            selector.close()
+
+    def handle_one_request(self) -> None:
+        """Handle a request, waiting for it for at most the server
+        ``keep_alive_timeout`` if it's not the first on the connection.
+        """
+        if self.requests_handled and not self.wait_for_request():
+            self.close_connection = True
+            return
+
+        super().handle_one_request()
+
+    def wait_for_request(self) -> bool:
+        """Wait for the next request on a kept-alive connection. Return
+        ``False`` if the client closed the connection or was idle for
+        longer than the server ``keep_alive_timeout``.
+
+        Data already buffered, such as a pipelined request, is available
+        immediately.
+
+        .. versionadded:: 3.1
+        """
+        self.connection.settimeout(self.server.keep_alive_timeout)
+
+        try:
+            return bool(self.rfile.peek(1))  # type: ignore[attr-defined]
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
     def handle(self) -> None:
         """Handles a request ignoring dropped connections."""
         try:
@@ -688,6 +953,10 @@ class BaseWSGIServer(HTTPServer):
     """A WSGI server that that handles one request at a time.
 
     Use :func:`make_server` to create a server instance.
+
+    .. versionchanged:: 3.1
+        Added the ``keep_alive_timeout`` parameter, refused if the server
+        handles one request at a time.
     """
 
     multithread = False
@@ -695,6 +964,10 @@ class BaseWSGIServer(HTTPServer):
     request_queue_size = LISTEN_QUEUE
     allow_reuse_address = True
 
+    #: The maximum number of requests served on a kept-alive connection
+    #: before closing it.
+    max_keep_alive_requests = 100
+
     def __init__(
         self,
         host: str,
@@ -704,7 +977,14 @@ class BaseWSGIServer(HTTPServer):
         passthrough_errors: bool = False,
         ssl_context: _TSSLContextArg | None = None,
         fd: int | None = None,
+        keep_alive_timeout: float | None = None,
     ) -> None:
+        if keep_alive_timeout and not (self.multithread or self.multiprocess):
+            raise ValueError(
+                "Cannot keep connections alive in a server handling one request"
+                " at a time."
+            )
+
         if handler is None:
             handler = WSGIRequestHandler
 
@@ -720,6 +1000,7 @@ class BaseWSGIServer(HTTPServer):
         self.port = port
         self.app = app
         self.passthrough_errors = passthrough_errors
+        self.keep_alive_timeout = keep_alive_timeout
 
         self.address_family = address_family = select_address_family(host, port)
         server_address = get_sockaddr(host, int(port), address_family)
@@ -863,202 +1144,1562 @@ class ThreadedWSGIServer(socketserver.ThreadingMixIn, BaseWSGIServer):
     daemon_threads = True
 
 
-class ForkingWSGIServer(ForkingMixIn, BaseWSGIServer):
-    """A WSGI server that handles concurrent requests in separate forked
-    processes.
+class PooledWSGIServer(BaseWSGIServer):
+    """A WSGI server that handles concurrent requests with a fixed pool
+    of worker threads.
+
+    Accepted connections wait in a queue for a free worker. When
+    ``max_queue`` connections are already waiting, new ones are answered
+    with a *503 Service Unavailable* response and closed, or only closed
+    with TLS. A kept-alive connection (see ``keep_alive_timeout``) occupies its
+    worker while idle.
 
     Use :func:`make_server` to create a server instance.
+
+    :param threads: The number of worker threads.
+    :param max_queue: The maximum number of connections waiting for a
+        worker. Defaults to four times ``threads``.
+
+    .. versionadded:: 3.1
     """
 
-    multiprocess = True
+    multithread = True
+
+    #: Wait for the queued and active connections to be handled when the
+    #: server is closed. Otherwise the queued connections are dropped.
+    block_on_close = False
 
     def __init__(
         self,
         host: str,
         port: int,
         app: WSGIApplication,
-        processes: int = 40,
+        threads: int = 8,
         handler: type[WSGIRequestHandler] | None = None,
         passthrough_errors: bool = False,
         ssl_context: _TSSLContextArg | None = None,
         fd: int | None = None,
+        keep_alive_timeout: float | None = None,
+        max_queue: int | None = None,
     ) -> None:
-        if not can_fork:
-            raise ValueError("Your platform does not support forking.")
-
-        super().__init__(host, port, app, handler, passthrough_errors, ssl_context, fd)
-        self.max_children = processes
-
-
-def make_server(
-    host: str,
-    port: int,
-    app: WSGIApplication,
-    threaded: bool = False,
-    processes: int = 1,
-    request_handler: type[WSGIRequestHandler] | None = None,
-    passthrough_errors: bool = False,
-    ssl_context: _TSSLContextArg | None = None,
-    fd: int | None = None,
-) -> BaseWSGIServer:
-    """Create an appropriate WSGI server instance based on the value of
-    ``threaded`` and ``processes``.
-
-    This is called from :func:`run_simple`, but can be used separately
-    to have access to the server object, such as to run it in a separate
-    thread.
-
-    See :func:`run_simple` for parameter docs.
-    """
-    if threaded and processes > 1:
-        raise ValueError("Cannot have a multi-thread and multi-process server.")
-
-    if threaded:
-        return ThreadedWSGIServer(
-            host, port, app, request_handler, passthrough_errors, ssl_context, fd=fd
-        )
+        if threads < 1:
+            raise ValueError("The number of threads must be at least 1.")
+
+        self.threads = threads
+        self.max_queue = threads * 4 if max_queue is None else max_queue
+        # The base class may call server_close() before the pool is created.
+        self._executor: t.Any = None
+        self._rejector: threading.Thread | None = None
+        self._stats_lock = threading.Lock()
+        self._dropping = False
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_time = 0.0
+        self._max_queue_time = 0.0
+        self._service_time = 0.0
+        self._max_service_time = 0.0
 
-    if processes > 1:
-        return ForkingWSGIServer(
+        super().__init__(
             host,
             port,
             app,
-            processes,
-            request_handler,
+            handler,
             passthrough_errors,
             ssl_context,
-            fd=fd,
+            fd,
+            keep_alive_timeout=keep_alive_timeout,
         )
 
-    return BaseWSGIServer(
-        host, port, app, request_handler, passthrough_errors, ssl_context, fd=fd
-    )
+        import queue
+        from concurrent.futures import ThreadPoolExecutor
 
+        self._executor = ThreadPoolExecutor(
+            threads, thread_name_prefix="werkzeug-worker"
+        )
+        # Rejected connections, with the time to close them, for a thread
+        # started on the first one.
+        self._rejected_conns: queue.SimpleQueue[tuple[t.Any, float] | None] = (
+            queue.SimpleQueue()
+        )
 
-def is_running_from_reloader() -> bool:
-    """Check if the server is running as a subprocess within the
-    Werkzeug reloader.
+    def process_request(self, request: t.Any, client_address: t.Any) -> None:
+        """Queue the connection for a worker, or reject it if the queue
+        is full.
+        """
+        with self._stats_lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                reject = True
+            else:
+                self._queued += 1
+                reject = False
 
-    .. versionadded:: 0.10
-    """
-    return os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+        if reject:
+            self.reject_request(request)
+            return
 
+        self._executor.submit(
+            self.process_request_thread, request, client_address, time.monotonic()
+        )
 
-def run_simple(
-    hostname: str,
-    port: int,
-    application: WSGIApplication,
-    use_reloader: bool = False,
-    use_debugger: bool = False,
-    use_evalex: bool = True,
-    extra_files: t.Iterable[str] | None = None,
-    exclude_patterns: t.Iterable[str] | None = None,
-    reloader_interval: int = 1,
-    reloader_type: str = "auto",
-    threaded: bool = False,
-    processes: int = 1,
-    request_handler: type[WSGIRequestHandler] | None = None,
-    static_files: dict[str, str | tuple[str, str]] | None = None,
-    passthrough_errors: bool = False,
-    ssl_context: _TSSLContextArg | None = None,
-) -> None:
-    """Start a development server for a WSGI application. Various
-    optional features can be enabled.
+    def process_request_thread(
+        self, request: t.Any, client_address: t.Any, queued_at: float
+    ) -> None:
+        """Handle a connection in a worker thread."""
+        start = time.monotonic()
+        waited = start - queued_at
 
-    .. warning::
+        with self._stats_lock:
+            self._queued -= 1
 
-        Do not use the development server when deploying to production.
-        It is intended for use only during local development. It is not
-        designed to be particularly efficient, stable, or secure.
+            if self._dropping:
+                self.shutdown_request(request)
+                return
 
-    :param hostname: The host to bind to, for example ``'localhost'``.
-        Can be a domain, IPv4 or IPv6 address, or file path starting
-        with ``unix://`` for a Unix socket.
-    :param port: The port to bind to, for example ``8080``. Using ``0``
-        tells the OS to pick a random free port.
-    :param application: The WSGI application to run.
-    :param use_reloader: Use a reloader process to restart the server
-        process when files are changed.
-    :param use_debugger: Use Werkzeug's debugger, which will show
-        formatted tracebacks on unhandled exceptions.
-    :param use_evalex: Make the debugger interactive. A Python terminal
-        can be opened for any frame in the traceback. Some protection is
-        provided by requiring a PIN, but this should never be enabled
-        on a publicly visible server.
-    :param extra_files: The reloader will watch these files for changes
-        in addition to Python modules. For example, watch a
-        configuration file.
-    :param exclude_patterns: The reloader will ignore changes to any
-        files matching these :mod:`fnmatch` patterns. For example,
-        ignore cache files.
-    :param reloader_interval: How often the reloader tries to check for
-        changes.
-    :param reloader_type: The reloader to use. The ``'stat'`` reloader
-        is built in, but may require significant CPU to watch files. The
-        ``'watchdog'`` reloader is much more efficient but requires
-        installing the ``watchdog`` package first.
-    :param threaded: Handle concurrent requests using threads. Cannot be
-        used with ``processes``.
-    :param processes: Handle concurrent requests using up to this number
-        of processes. Cannot be used with ``threaded``.
-    :param request_handler: Use a different
-        :class:`~BaseHTTPServer.BaseHTTPRequestHandler` subclass to
-        handle requests.
-    :param static_files: A dict mapping URL prefixes to directories to
-        serve static files from using
-        :class:`~werkzeug.middleware.SharedDataMiddleware`.
-    :param passthrough_errors: Don't catch unhandled exceptions at the
-        server level, let the server crash instead. If ``use_debugger``
-        is enabled, the debugger will still catch such errors.
-    :param ssl_context: Configure TLS to serve over HTTPS. Can be an
-        :class:`ssl.SSLContext` object, a ``(cert_file, key_file)``
-        tuple to create a typical context, or the string ``'adhoc'`` to
-        generate a temporary self-signed certificate.
+            self._active += 1
+            self._queue_time += waited
+            self._max_queue_time = max(self._max_queue_time, waited)
 
-    .. versionchanged:: 2.1
-        Instructions are shown for dealing with an "address already in
-        use" error.
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            elapsed = time.monotonic() - start
+
+            with self._stats_lock:
+                self._active -= 1
+                self._completed += 1
+                self._service_time += elapsed
+                self._max_service_time = max(self._max_service_time, elapsed)
+
+    def reject_request(self, request: t.Any) -> None:
+        """Send a *503 Service Unavailable* response to a connection that
+        can't be queued, and close it, without blocking the thread
+        accepting connections. With TLS the connection is only closed.
+        """
+        if self.ssl_context is not None:
+            self.shutdown_request(request)
+            return
 
-    .. versionchanged:: 2.1
-        Running on ``0.0.0.0`` or ``::`` shows the loopback IP in
-        addition to a real IP.
+        try:
+            # The response fits in the send buffer of a new connection.
+            request.setblocking(False)
+            request.send(_error_response(ServiceUnavailable(retry_after=1)))
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            self.shutdown_request(request)
+            return
 
-    .. versionchanged:: 2.1
-        The command-line interface was removed.
+        if self._rejector is None:
+            self._rejector = threading.Thread(
+                target=self._close_rejected, name="werkzeug-reject", daemon=True
+            )
+            self._rejector.start()
 
-    .. versionchanged:: 2.0
-        Running on ``0.0.0.0`` or ``::`` shows a real IP address that
-        was bound as well as a warning not to run the development server
-        in production.
+        self._rejected_conns.put((request, time.monotonic() + 1.0))
 
-    .. versionchanged:: 2.0
-        The ``exclude_patterns`` parameter was added.
+    def _close_rejected(self) -> None:
+        """Read the requests of the rejected connections, for at most a
+        second, before closing them: closing with unread data resets the
+        connection, and the client may lose the response.
+        """
+        import queue
 
-    .. versionchanged:: 0.15
-        Bind to a Unix socket by passing a ``hostname`` that starts with
-        ``unix://``.
+        selector = selectors.DefaultSelector()
+        deadlines: dict[t.Any, float] = {}
 
-    .. versionchanged:: 0.10
-        Improved the reloader and added support for changing the backend
-        through the ``reloader_type`` parameter.
+        try:
+            while True:
+                try:
+                    while True:
+                        item = self._rejected_conns.get(block=not deadlines)
 
-    .. versionchanged:: 0.9
-        A command-line interface was added.
+                        if item is None:
+                            return
 
-    .. versionchanged:: 0.8
-        ``ssl_context`` can be a tuple of paths to the certificate and
-        private key files.
+                        selector.register(item[0], selectors.EVENT_READ)
+                        deadlines[item[0]] = item[1]
+                except queue.Empty:
+                    pass
 
-    .. versionchanged:: 0.6
-        The ``ssl_context`` parameter was added.
+                for key, _ in selector.select(0.05):
+                    try:
+                        data = key.fileobj.recv(65536)  # type: ignore[union-attr]
+                    except OSError:
+                        data = b""
 
-    .. versionchanged:: 0.5
-       The ``static_files`` and ``passthrough_errors`` parameters were
+                    if not data:
+                        deadlines[key.fileobj] = 0
+
+                now = time.monotonic()
+
+                for sock, deadline in list(deadlines.items()):
+                    if deadline < now:
+                        selector.unregister(sock)
+                        del deadlines[sock]
+                        self.close_request(sock)
+        finally:
+            for sock in deadlines:
+                self.close_request(sock)
+
+            selector.close()
+
+    def stats(self) -> dict[str, t.Any]:
+        """Return a snapshot of the pool usage.
+
+        ``queued`` and ``active`` are the connections currently waiting
+        for a worker and being handled; ``completed`` and ``rejected``
+        count the connections handled and refused with a 503 response;
+        ``queue_time`` and ``service_time`` are the total seconds spent
+        waiting in the queue and being handled, ``max_queue_time`` and
+        ``max_service_time`` the longest ones.
+        """
+        with self._stats_lock:
+            return {
+                "threads": self.threads,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "queue_time": self._queue_time,
+                "max_queue_time": self._max_queue_time,
+                "service_time": self._service_time,
+                "max_service_time": self._max_service_time,
+            }
+
+    def server_close(self) -> None:
+        super().server_close()
+
+        if self._executor is None:
+            return
+
+        if not self.block_on_close:
+            # Connections still queued are dropped, not served.
+            self._dropping = True
+
+        self._executor.shutdown(wait=self.block_on_close)
+
+        if self._rejector is not None:
+            self._rejected_conns.put(None)
+
+            if self.block_on_close:
+                self._rejector.join()
+
+
+def _error_response(error: HTTPException) -> bytes:
+    """Render an HTTP error as a complete response closing the connection."""
+    body = error.get_body().encode()
+    headers = [
+        *error.get_headers(),
+        ("Content-Length", str(len(body))),
+        ("Connection", "close"),
+    ]
+    head = "".join(f"{k}: {v}\r\n" for k, v in headers)
+    return f"HTTP/1.1 {error.code} {error.name}\r\n{head}\r\n".encode() + body
+
+
+_headers_end_re = re.compile(rb"\r?\n\r?\n")
+
+
+def _request_end(data: bytearray, max_size: int) -> int | None:
+    """Return the length of the first complete request in ``data``, or
+    ``None`` if more data is needed.
+
+    Raise an :exc:`~werkzeug.exceptions.HTTPException` if the request is
+    invalid or too large.
+    """
+    match = _headers_end_re.search(data, 0, 65536 + 4)
+
+    if match is None:
+        if len(data) > 65536:
+            raise RequestHeaderFieldsTooLarge()
+
+        return None
+
+    lengths = set()
+    encodings = []
+
+    for line in bytes(data[: match.start()]).split(b"\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        value = value.strip()
+
+        if name == b"content-length":
+            if not value.isdigit():
+                raise BadRequest()
+
+            lengths.add(int(value))
+        elif name == b"transfer-encoding":
+            encodings.append(value.lower())
+
+    # Framing that could be read differently here and by the request
+    # handler, or by a proxy, is refused to prevent request smuggling
+    # (RFC 9112 section 6.3).
+    if len(lengths) > 1 or (encodings and (lengths or encodings != [b"chunked"])):
+        raise BadRequest()
+
+    length = lengths.pop() if lengths else None
+    chunked = bool(encodings)
+    pos = match.end()
+
+    if not chunked:
+        if length is not None and pos + length > max_size:
+            raise RequestEntityTooLarge()
+
+        end = pos + (length or 0)
+        return end if len(data) >= end else None
+
+    # Walk the chunks to find the end of the body.
+    while True:
+        eol = data.find(b"\n", pos)
+
+        if eol < 0:
+            break
+
+        try:
+            size = int(bytes(data[pos:eol]).split(b";")[0].strip(), 16)
+        except ValueError:
+            raise BadRequest() from None
+
+        if size < 0:
+            raise BadRequest()
+
+        if size == 0:
+            # Skip the trailer fields, up to an empty line.
+            while True:
+                pos = eol + 1
+                eol = data.find(b"\n", pos)
+
+                if eol < 0:
+                    break
+
+                if not data[pos:eol].strip():
+                    return eol + 1
+
+            break
+
+        pos = eol + 1 + size
+
+        if data[pos : pos + 1] == b"\r":
+            pos += 1
+
+        pos += 1
+
+        if pos > max_size:
+            raise RequestEntityTooLarge()
+
+    if len(data) > max_size:
+        raise RequestEntityTooLarge()
+
+    return None
+
+
+class _LoopConnection:
+    """A client connection of an :class:`EventLoopWSGIServer`."""
+
+    def __init__(self, sock: socket.socket, address: t.Any) -> None:
+        self.sock = sock
+        self.address = address
+        self.inbuf = bytearray()
+        self.out: list[bytes | memoryview] = []
+        self.out_size = 0
+        self.cond = threading.Condition()
+        self.busy = False
+        self.close_after = False
+        self.closed = False
+        self.continued = False
+        self.requests = 0
+        self.last_active = time.monotonic()
+        # When the request being received started, None between requests.
+        self.request_start: float | None = self.last_active
+        # When the client last accepted some of the pending output.
+        self.last_sent = self.last_active
+        self.events = 0
+
+    def write(self, data: bytes) -> None:
+        """Queue ``data`` to be sent. Hold ``cond`` when called from a
+        worker thread.
+        """
+        if not self.out:
+            self.last_sent = time.monotonic()
+
+        self.out.append(data)
+        self.out_size += len(data)
+
+
+class _LoopSocket:
+    """The connection seen by the request handler in a worker thread.
+
+    Reads come from the buffered request, writes are queued for the event
+    loop to send.
+    """
+
+    # Pending output above which the worker waits for the client.
+    high_water = 1 << 20
+
+    def __init__(
+        self, server: EventLoopWSGIServer, conn: _LoopConnection, data: bytes
+    ) -> None:
+        self._server = server
+        self._conn = conn
+        self._data = data
+
+    def makefile(self, mode: str = "rb", buffering: int = -1) -> t.IO[bytes]:
+        return io.BufferedReader(io.BytesIO(self._data))  # type: ignore[arg-type]
+
+    def sendall(self, data: bytes) -> None:
+        conn = self._conn
+
+        with conn.cond:
+            while conn.out_size > self.high_water and not conn.closed:
+                # Notified each time the client accepts some output.
+                if not conn.cond.wait(self._server.send_timeout):
+                    raise socket.timeout("Timed out sending the response")
+
+            if conn.closed:
+                raise BrokenPipeError(errno.EPIPE, "Connection closed by the client")
+
+            conn.write(bytes(data))
+
+        self._server.call_soon(self._server._update_events, conn)
+
+    def fileno(self) -> int:
+        return self._conn.sock.fileno()
+
+    def settimeout(self, timeout: float | None) -> None:
+        pass
+
+    def setsockopt(self, *args: t.Any) -> None:
+        pass
+
+
+class EventLoopWSGIServer(BaseWSGIServer):
+    """A WSGI server doing all the socket I/O in a selector event loop,
+    calling the application in a pool of worker threads.
+
+    Requests are read and buffered, body included, without using a
+    thread. Only complete requests are passed to a worker, and the
+    responses are sent by the event loop, so slow clients occupy a
+    thread only while the application runs. A worker waits for the client
+    only if more than 1MB of its response is still to be sent, and at most
+    ``send_timeout`` seconds for the client to read some of it.
+
+    Kept-alive connections (see ``keep_alive_timeout``) don't occupy a
+    worker. Connections not sending a complete request within
+    ``request_timeout`` seconds, or not reading any of the response for
+    ``send_timeout`` seconds, are closed. Requests larger than
+    ``max_request_size`` bytes are refused with a *413* error.
+
+    TLS is not supported, use a TLS terminating proxy in front of it.
+
+    Use :func:`make_server` to create a server instance.
+
+    :param threads: The number of worker threads.
+    :param request_timeout: Seconds to receive a complete request.
+    :param max_request_size: The maximum size of a request, in bytes.
+    :param send_timeout: Seconds the client may read nothing of the
+        response being sent.
+
+    .. versionadded:: 3.1
+    """
+
+    multithread = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app: WSGIApplication,
+        threads: int = 8,
+        handler: type[WSGIRequestHandler] | None = None,
+        passthrough_errors: bool = False,
+        ssl_context: _TSSLContextArg | None = None,
+        fd: int | None = None,
+        keep_alive_timeout: float | None = None,
+        request_timeout: float = 30,
+        max_request_size: int = 16 * 1024 * 1024,
+        send_timeout: float = 30,
+    ) -> None:
+        if ssl_context is not None:
+            raise ValueError("The event loop server does not support TLS.")
+
+        if threads < 1:
+            raise ValueError("The number of threads must be at least 1.")
+
+        # The base class may call server_close() before the loop is set up.
+        self._executor: t.Any = None
+
+        super().__init__(
+            host,
+            port,
+            app,
+            handler,
+            passthrough_errors,
+            None,
+            fd,
+            keep_alive_timeout=keep_alive_timeout,
+        )
+
+        import queue
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.threads = threads
+        self.request_timeout = request_timeout
+        self.max_request_size = max_request_size
+        self.send_timeout = send_timeout
+        self._executor = ThreadPoolExecutor(
+            threads, thread_name_prefix="werkzeug-worker"
+        )
+        self._selector = selectors.DefaultSelector()
+        self._calls: queue.SimpleQueue[tuple[t.Callable[..., t.Any], tuple]] = (
+            queue.SimpleQueue()
+        )
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._conns: dict[int, _LoopConnection] = {}
+        self._stopping = False
+        self._stopped = threading.Event()
+
+    def call_soon(self, func: t.Callable[..., t.Any], *args: t.Any) -> None:
+        """Call ``func`` in the event loop thread. Safe to call from any
+        thread.
+        """
+        self._calls.put((func, args))
+
+        try:
+            self._wakeup_w.send(b"\0")
+        except OSError:
+            # The loop will wake up anyway.
+            pass
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        self.socket.setblocking(False)
+        self._selector.register(self.socket, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        next_check = time.monotonic() + 1
+
+        try:
+            while not self._stopping:
+                for key, mask in self._selector.select(poll_interval):
+                    if key.fileobj is self.socket:
+                        self._accept()
+                    elif key.fileobj is self._wakeup_r:
+                        self._drain_wakeup()
+                    else:
+                        self._on_event(key.data, mask)
+
+                while not self._calls.empty():
+                    func, args = self._calls.get()
+                    func(*args)
+
+                now = time.monotonic()
+
+                if now >= next_check:
+                    self._close_idle(now)
+                    next_check = now + 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            self._stopped.set()
+
+    def shutdown(self) -> None:
+        """Stop the :meth:`serve_forever` loop and wait until it stopped."""
+        self._stopping = True
+        self.call_soon(lambda: None)
+        self._stopped.wait()
+
+    def server_close(self) -> None:
+        super().server_close()
+
+        if self._executor is None:
+            return
+
+        for conn in list(self._conns.values()):
+            self._close(conn)
+
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        self._executor.shutdown(wait=False)
+
+    def _accept(self) -> None:
+        for _ in range(LISTEN_QUEUE):
+            try:
+                sock, address = self.socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # For example too many open files: try again later.
+                self.log("error", f"Cannot accept connection: {e}")
+                return
+
+            sock.setblocking(False)
+            conn = _LoopConnection(sock, address)
+            self._conns[sock.fileno()] = conn
+            self._update_events(conn)
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _on_event(self, conn: _LoopConnection, mask: int) -> None:
+        if mask & selectors.EVENT_WRITE:
+            self._send(conn)
+
+        if mask & selectors.EVENT_READ and not conn.closed:
+            self._recv(conn)
+
+    def _recv(self, conn: _LoopConnection) -> None:
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._close(conn)
+            return
+
+        if not data:
+            self._close(conn)
+            return
+
+        conn.inbuf += data
+        conn.last_active = time.monotonic()
+
+        if conn.request_start is None:
+            conn.request_start = conn.last_active
+
+        self._dispatch(conn)
+
+    def _dispatch(self, conn: _LoopConnection) -> None:
+        """Pass the next request to a worker, if it was read completely."""
+        if conn.closed:
+            return
+
+        if not (conn.busy or conn.close_after) and conn.inbuf:
+            try:
+                end = _request_end(conn.inbuf, self.max_request_size)
+            except HTTPException as e:
+                conn.inbuf.clear()
+                conn.close_after = True
+                conn.write(_error_response(e))
+            else:
+                if end is not None:
+                    data = bytes(conn.inbuf[:end])
+                    del conn.inbuf[:end]
+                    conn.busy = True
+                    conn.continued = False
+                    conn.request_start = None
+                    self._executor.submit(self._handle, conn, data)
+                elif (
+                    not conn.continued
+                    and _headers_end_re.search(conn.inbuf, 0, 65536 + 4)
+                    and re.search(rb"(?im)^expect:\s*100-continue", conn.inbuf)
+                ):
+                    # The client waits for this before sending the body.
+                    conn.continued = True
+                    conn.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        self._update_events(conn)
+
+    def _handle(self, conn: _LoopConnection, data: bytes) -> None:
+        """Run the request handler for a request, in a worker thread."""
+        request = _LoopSocket(self, conn, data)
+        handler = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        handler.request = request
+        handler.client_address = conn.address
+        handler.server = self
+        handler.requests_handled = conn.requests
+        handler.close_connection = True
+        # The event loop read the request completely, nothing to discard,
+        # and answered "Expect: 100-continue" already.
+        handler.drain_socket = lambda: None  # type: ignore[method-assign]
+        handler.handle_expect_100 = lambda: True  # type: ignore[method-assign]
+        handler.send_continue = False
+
+        try:
+            handler.setup()
+
+            try:
+                handler.handle_one_request()
+            finally:
+                handler.finish()
+        except (ConnectionError, socket.timeout) as e:
+            handler.close_connection = True
+            handler.connection_dropped(e)
+        except Exception:
+            handler.close_connection = True
+            self.handle_error(request, conn.address)
+        finally:
+            self.call_soon(
+                self._request_done,
+                conn,
+                handler.close_connection,
+                handler.requests_handled,
+            )
+
+    def _request_done(
+        self, conn: _LoopConnection, close: bool, requests: int
+    ) -> None:
+        conn.requests = requests
+        conn.close_after = close
+        conn.busy = False
+        conn.last_active = time.monotonic()
+
+        if conn.inbuf:
+            # A pipelined request, it may be complete already.
+            conn.request_start = conn.last_active
+
+        self._dispatch(conn)
+
+    def _send(self, conn: _LoopConnection) -> None:
+        with conn.cond:
+            try:
+                while conn.out:
+                    sent = conn.sock.send(conn.out[0])
+
+                    if sent:
+                        conn.last_sent = time.monotonic()
+
+                    if sent < len(conn.out[0]):
+                        # A memoryview slice doesn't copy the rest.
+                        conn.out[0] = memoryview(conn.out[0])[sent:]
+                        conn.out_size -= sent
+                        break
+
+                    conn.out_size -= len(conn.out.pop(0))
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._close(conn)
+                return
+            finally:
+                conn.cond.notify_all()
+
+        conn.last_active = time.monotonic()
+        self._update_events(conn)
+
+    def _update_events(self, conn: _LoopConnection) -> None:
+        """Register the events the connection is waiting for."""
+        if conn.closed:
+            return
+
+        if conn.close_after and not conn.busy and not conn.out:
+            self._close(conn)
+            return
+
+        events = 0
+
+        if conn.out:
+            events |= selectors.EVENT_WRITE
+
+        if not (conn.busy or conn.close_after):
+            events |= selectors.EVENT_READ
+
+        if events == conn.events:
+            return
+
+        if not events:
+            self._selector.unregister(conn.sock)
+        elif not conn.events:
+            self._selector.register(conn.sock, events, conn)
+        else:
+            self._selector.modify(conn.sock, events, conn)
+
+        conn.events = events
+
+    def _close_idle(self, now: float) -> None:
+        """Close the connections waiting for too long for a request, taking
+        too long to send one, or not reading the response.
+        """
+        for conn in list(self._conns.values()):
+            if conn.out:
+                # Also while the application runs, a worker waiting to
+                # write more is woken up by closing.
+                expired = now - conn.last_sent > self.send_timeout
+            elif conn.busy:
+                continue
+            elif conn.request_start is not None:
+                # Not reset by receiving data: a client sending a request
+                # slowly can't hold the connection longer.
+                expired = now - conn.request_start > self.request_timeout
+            else:
+                expired = now - conn.last_active > (self.keep_alive_timeout or 0)
+
+            if expired:
+                self._close(conn)
+
+    def _close(self, conn: _LoopConnection) -> None:
+        if conn.closed:
+            return
+
+        with conn.cond:
+            conn.closed = True
+            conn.cond.notify_all()
+
+        if conn.events:
+            try:
+                self._selector.unregister(conn.sock)
+            except (KeyError, ValueError):
+                pass
+
+        self._conns.pop(conn.sock.fileno(), None)
+
+        try:
+            conn.sock.close()
+        except OSError:
+            pass
+
+
+class PreforkWSGIServer(BaseWSGIServer):
+    """A WSGI server that handles requests in a fixed number of
+    long-lived worker processes.
+
+    The server process binds the socket, then starts the workers and
+    supervises them, starting a new worker when one exits. Every worker
+    runs its own server, threaded according to ``threaded``, accepting
+    connections on the socket shared with the other workers. With
+    ``reuse_port``, every worker binds instead its own socket to the same
+    address with ``SO_REUSEPORT``, and the kernel balances the connections
+    between them. A worker that stops handles the connections waiting in
+    its socket before closing it.
+
+    Sending ``SIGHUP`` to the server process starts a new set of workers,
+    then stops the old ones gracefully. ``SIGTERM`` stops the workers
+    gracefully and the server. A worker stops gracefully by not accepting
+    new connections and finishing the requests in progress, within
+    ``graceful_timeout`` seconds, after which it is killed. Workers failing
+    right after starting are restarted with an increasing delay, up to
+    :attr:`max_spawn_delay` seconds.
+
+    Use :func:`make_server` to create a server instance.
+
+    :param workers: The number of worker processes.
+    :param threaded: How the workers handle concurrent requests, like the
+        :func:`make_server` parameter: ``False`` for one request at a
+        time, ``True`` for a thread per connection, a number for a pool of
+        threads.
+    :param max_requests: Replace a worker after it handled this number of
+        requests, for example to limit the effect of memory leaks. The
+        replacement is started before the worker stops gracefully. ``0``
+        disables it.
+    :param reuse_port: Use a ``SO_REUSEPORT`` socket in every worker
+        instead of sharing the server socket.
+    :param graceful_timeout: Seconds given to the workers to finish the
+        requests in progress when stopping.
+
+    .. versionadded:: 3.1
+    """
+
+    multiprocess = True
+
+    #: A worker exiting with an error within this number of seconds from
+    #: its start delays starting the next ones.
+    min_worker_lifetime = 1.0
+
+    #: The maximum delay, in seconds, before restarting failing workers.
+    max_spawn_delay = 30.0
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app: WSGIApplication,
+        workers: int = 2,
+        threaded: bool | int = True,
+        handler: type[WSGIRequestHandler] | None = None,
+        passthrough_errors: bool = False,
+        ssl_context: _TSSLContextArg | None = None,
+        fd: int | None = None,
+        keep_alive_timeout: float | None = None,
+        max_requests: int = 0,
+        reuse_port: bool = False,
+        graceful_timeout: float = 30,
+    ) -> None:
+        if not can_fork:
+            raise ValueError("Your platform does not support forking.")
+
+        if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("Your platform does not support SO_REUSEPORT.")
+
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+
+        if keep_alive_timeout and not threaded:
+            raise ValueError(
+                "Cannot keep connections alive in workers handling one request"
+                " at a time."
+            )
+
+        self.workers = workers
+        self.threaded = threaded
+        self.max_requests = max_requests
+        self.reuse_port = reuse_port
+        self.graceful_timeout = graceful_timeout
+        self._children: dict[int, int] = {}  # pid -> generation, -1 if retired
+        self._started: dict[int, float] = {}  # pid -> start time
+        self._deadlines: dict[int, float] = {}  # pid -> time to kill it
+        self._spawn_delay = 0.0
+        self._spawn_after = 0.0
+        self._generation = 0
+        self._restart = False
+        self._stopping = False
+        self._stopped = threading.Event()
+
+        super().__init__(
+            host,
+            port,
+            app,
+            handler,
+            passthrough_errors,
+            ssl_context,
+            fd,
+            keep_alive_timeout=keep_alive_timeout,
+        )
+
+    def server_bind(self) -> None:
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        super().server_bind()
+
+    def server_activate(self) -> None:
+        # With reuse_port the socket only reserves the address for the
+        # workers. Listening, it would get its share of the connections,
+        # reset when it's closed.
+        if not self.reuse_port:
+            super().server_activate()
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        """Start the workers and supervise them until the server is shut
+        down or receives ``SIGTERM``.
+        """
+        handlers = {}
+
+        if threading.current_thread() is threading.main_thread():
+            handlers[signal.SIGHUP] = signal.signal(signal.SIGHUP, self._on_sighup)
+            handlers[signal.SIGTERM] = signal.signal(
+                signal.SIGTERM, self._on_sigterm
+            )
+
+        # Workers write their pid here when they reach max_requests.
+        self._retire_r, self._retire_w = os.pipe()
+
+        try:
+            self._spawn_workers()
+
+            if self.reuse_port:
+                # The workers have their own sockets, this one only reserved
+                # the address until they bound them.
+                self.socket.close()
+
+            while not self._stopping:
+                if select.select([self._retire_r], [], [], poll_interval)[0]:
+                    self._retire_workers()
+
+                self._reap_workers()
+
+                if self._restart:
+                    self._restart = False
+                    self._restart_workers()
+
+                if not self._stopping and time.monotonic() >= self._spawn_after:
+                    self._spawn_workers()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop_workers()
+
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+            os.close(self._retire_r)
+            os.close(self._retire_w)
+            self.server_close()
+            self._stopped.set()
+
+    def shutdown(self) -> None:
+        """Stop the workers and the :meth:`serve_forever` loop, waiting
+        until they are stopped.
+        """
+        self._stopping = True
+        self._stopped.wait()
+
+    def _on_sighup(self, signum: int, frame: t.Any) -> None:
+        self._restart = True
+
+    def _on_sigterm(self, signum: int, frame: t.Any) -> None:
+        self._stopping = True
+
+    def _spawn_workers(self) -> None:
+        """Start workers until there are ``workers`` of the current
+        generation.
+        """
+        current = sum(g == self._generation for g in self._children.values())
+
+        for _ in range(self.workers - current):
+            pid = os.fork()
+
+            if pid == 0:
+                status = 1
+
+                try:
+                    self._run_worker()
+                    status = 0
+                except BaseException:
+                    import traceback
+
+                    _log("error", f"Worker failed:\n{traceback.format_exc()}")
+                finally:
+                    os._exit(status)
+
+            self._children[pid] = self._generation
+            self._started[pid] = time.monotonic()
+
+    def _retire_workers(self) -> None:
+        """Replace the workers that reached ``max_requests``: start new
+        workers first, then stop the old ones gracefully, so that there
+        is always a worker accepting connections.
+        """
+        pids = [int(pid) for pid in os.read(self._retire_r, 4096).split()]
+        # Ignore the workers already exited, their pid may be reused.
+        pids = [pid for pid in pids if pid in self._children]
+
+        for pid in pids:
+            self._children[pid] = -1
+
+        if time.monotonic() >= self._spawn_after:
+            self._spawn_workers()
+
+        self._terminate(pids)
+
+    def _restart_workers(self) -> None:
+        """Start a new generation of workers, then stop the old ones."""
+        old = list(self._children)
+        self._generation += 1
+        self._spawn_workers()
+        self._terminate(old)
+        _log("info", f" * Restarting {len(old)} workers")
+
+    def _terminate(self, pids: t.Iterable[int]) -> None:
+        """Ask workers to stop gracefully, killing them if they don't stop
+        in ``graceful_timeout`` seconds.
+        """
+        deadline = time.monotonic() + self.graceful_timeout
+
+        for pid in pids:
+            self._deadlines.setdefault(pid, deadline)
+
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap_workers(self) -> None:
+        """Collect the exited workers and kill the ones past their
+        deadline.
+        """
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if pid == 0:
+                break
+
+            generation = self._children.pop(pid, None)
+            started = self._started.pop(pid, None)
+            self._deadlines.pop(pid, None)
+
+            if (
+                status
+                and generation == self._generation
+                and not self._stopping
+            ):
+                _log("error", f" * Worker {pid} exited unexpectedly ({status})")
+
+                if (
+                    started is not None
+                    and time.monotonic() - started < self.min_worker_lifetime
+                ):
+                    # Probably failing at startup: don't fork in a loop.
+                    self._spawn_delay = min(
+                        self._spawn_delay * 2 or 0.5, self.max_spawn_delay
+                    )
+                    self._spawn_after = time.monotonic() + self._spawn_delay
+                    _log(
+                        "error",
+                        f" * Starting workers again in {self._spawn_delay:g}s",
+                    )
+
+        now = time.monotonic()
+
+        # The workers started fine, don't delay the next failure.
+        if (
+            self._spawn_delay
+            and self._started
+            and all(
+                now - started >= self.min_worker_lifetime
+                for started in self._started.values()
+            )
+        ):
+            self._spawn_delay = 0.0
+
+        for pid, deadline in list(self._deadlines.items()):
+            if now > deadline:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _stop_workers(self) -> None:
+        """Stop all the workers gracefully and wait for them."""
+        self._terminate(list(self._children))
+
+        while self._children:
+            self._reap_workers()
+
+            if self._children:
+                time.sleep(0.05)
+
+    def _run_worker(self) -> None:
+        """Body of a worker process: serve requests until asked to stop,
+        or until ``max_requests`` requests were handled.
+        """
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        self._children.clear()
+        self._started.clear()
+        self._deadlines.clear()
+        os.close(self._retire_r)
+
+        if self.reuse_port:
+            sock = socket.socket(self.address_family, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(self.server_address)
+            sock.listen(self.request_queue_size)
+        else:
+            sock = self.socket
+
+        app = self.app
+        count = 0
+        lock = threading.Lock()
+
+        def counting_app(
+            environ: WSGIEnvironment, start_response: t.Any
+        ) -> t.Iterable[bytes]:
+            nonlocal count
+
+            with lock:
+                count += 1
+                last = count == self.max_requests
+
+            if last:
+                # Ask to be replaced, the server will stop this worker.
+                os.write(self._retire_w, f"{os.getpid()}\n".encode())
+
+            return app(environ, start_response)
+
+        # Every worker uses a duplicate of the socket, close this one.
+        try:
+            srv = make_server(
+                self.host,
+                self.port,
+                counting_app if self.max_requests else app,
+                threaded=self.threaded,
+                request_handler=self.RequestHandlerClass,
+                passthrough_errors=self.passthrough_errors,
+                ssl_context=self.ssl_context,
+                fd=sock.fileno(),
+                keep_alive_timeout=self.keep_alive_timeout,
+            )
+        finally:
+            sock.close()
+            self.socket.close()
+
+        # One of several processes, whatever the class of the server.
+        srv.multiprocess = True
+        # Finish the requests in progress before exiting.
+        srv.daemon_threads = False  # type: ignore[attr-defined]
+        srv.block_on_close = True  # type: ignore[attr-defined]
+
+        def serve() -> None:
+            try:
+                socketserver.BaseServer.serve_forever(srv)
+            finally:
+                if self.reuse_port:
+                    # Closing the socket of this worker resets the
+                    # connections waiting in it, handle them first.
+                    while select.select([srv], [], [], 0)[0]:
+                        srv._handle_request_noblock()  # type: ignore[attr-defined]
+
+                srv.server_close()
+
+        # Serve in a thread: the signal handler only sets the event, starting
+        # a thread from it may deadlock if it interrupts a Thread.start().
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        thread = threading.Thread(target=serve, name="werkzeug-serve")
+        thread.start()
+
+        try:
+            while thread.is_alive() and not stop.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            srv.shutdown()
+            thread.join()
+
+    def log_startup(self) -> None:
+        super().log_startup()
+        _log("info", f" * Using {self.workers} worker processes")
+
+
+class ForkingWSGIServer(ForkingMixIn, BaseWSGIServer):
+    """A WSGI server that handles concurrent requests in separate forked
+    processes.
+
+    Use :func:`make_server` to create a server instance.
+    """
+
+    multiprocess = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app: WSGIApplication,
+        processes: int = 40,
+        handler: type[WSGIRequestHandler] | None = None,
+        passthrough_errors: bool = False,
+        ssl_context: _TSSLContextArg | None = None,
+        fd: int | None = None,
+        keep_alive_timeout: float | None = None,
+    ) -> None:
+        if not can_fork:
+            raise ValueError("Your platform does not support forking.")
+
+        super().__init__(
+            host,
+            port,
+            app,
+            handler,
+            passthrough_errors,
+            ssl_context,
+            fd,
+            keep_alive_timeout=keep_alive_timeout,
+        )
+        self.max_children = processes
+
+
+def make_server(
+    host: str,
+    port: int,
+    app: WSGIApplication,
+    threaded: bool | int = False,
+    processes: int = 1,
+    request_handler: type[WSGIRequestHandler] | None = None,
+    passthrough_errors: bool = False,
+    ssl_context: _TSSLContextArg | None = None,
+    fd: int | None = None,
+    keep_alive_timeout: float | None = None,
+    prefork: bool = False,
+    event_loop: bool = False,
+    max_requests: int = 0,
+    reuse_port: bool = False,
+    graceful_timeout: float = 30,
+) -> BaseWSGIServer:
+    """Create an appropriate WSGI server instance based on the value of
+    ``threaded`` and ``processes``.
+
+    This is called from :func:`run_simple`, but can be used separately
+    to have access to the server object, such as to run it in a separate
+    thread.
+
+    See :func:`run_simple` for parameter docs.
+
+    .. versionchanged:: 3.1
+        ``threaded`` can be a number of threads, to create a
+        :class:`PooledWSGIServer`.
+
+    .. versionchanged:: 3.1
+        Added the ``prefork``, ``max_requests``, ``reuse_port`` and
+        ``graceful_timeout`` parameters.
+
+    .. versionchanged:: 3.1
+        Added the ``event_loop`` parameter.
+    """
+    if (max_requests or reuse_port) and not prefork:
+        raise ValueError("'max_requests' and 'reuse_port' require 'prefork'.")
+
+    if event_loop:
+        if processes > 1:
+            raise ValueError("Cannot have an event loop and multi-process server.")
+
+        return EventLoopWSGIServer(
+            host,
+            port,
+            app,
+            threaded if threaded and not isinstance(threaded, bool) else 8,
+            request_handler,
+            passthrough_errors,
+            ssl_context,
+            fd=fd,
+            keep_alive_timeout=keep_alive_timeout,
+        )
+
+    if prefork:
+        return PreforkWSGIServer(
+            host,
+            port,
+            app,
+            processes,
+            threaded,
+            request_handler,
+            passthrough_errors,
+            ssl_context,
+            fd=fd,
+            keep_alive_timeout=keep_alive_timeout,
+            max_requests=max_requests,
+            reuse_port=reuse_port,
+            graceful_timeout=graceful_timeout,
+        )
+
+    if threaded and processes > 1:
+        raise ValueError("Cannot have a multi-thread and multi-process server.")
+
+    if threaded:
+        if not isinstance(threaded, bool):
+            return PooledWSGIServer(
+                host,
+                port,
+                app,
+                threaded,
+                request_handler,
+                passthrough_errors,
+                ssl_context,
+                fd=fd,
+                keep_alive_timeout=keep_alive_timeout,
+            )
+
+        return ThreadedWSGIServer(
+            host,
+            port,
+            app,
+            request_handler,
+            passthrough_errors,
+            ssl_context,
+            fd=fd,
+            keep_alive_timeout=keep_alive_timeout,
+        )
+
+    if processes > 1:
+        return ForkingWSGIServer(
+            host,
+            port,
+            app,
+            processes,
+            request_handler,
+            passthrough_errors,
+            ssl_context,
+            fd=fd,
+            keep_alive_timeout=keep_alive_timeout,
+        )
+
+    return BaseWSGIServer(
+        host,
+        port,
+        app,
+        request_handler,
+        passthrough_errors,
+        ssl_context,
+        fd=fd,
+        keep_alive_timeout=keep_alive_timeout,
+    )
+
+
+def is_running_from_reloader() -> bool:
+    """Check if the server is running as a subprocess within the
+    Werkzeug reloader.
+
+    .. versionadded:: 0.10
+    """
+    return os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+def run_simple(
+    hostname: str,
+    port: int,
+    application: WSGIApplication,
+    use_reloader: bool = False,
+    use_debugger: bool = False,
+    use_evalex: bool = True,
+    extra_files: t.Iterable[str] | None = None,
+    exclude_patterns: t.Iterable[str] | None = None,
+    reloader_interval: int = 1,
+    reloader_type: str = "auto",
+    threaded: bool | int = False,
+    processes: int = 1,
+    request_handler: type[WSGIRequestHandler] | None = None,
+    static_files: dict[str, str | tuple[str, str]] | None = None,
+    passthrough_errors: bool = False,
+    ssl_context: _TSSLContextArg | None = None,
+    keep_alive_timeout: float | None = None,
+    prefork: bool = False,
+    event_loop: bool = False,
+    max_requests: int = 0,
+    reuse_port: bool = False,
+    graceful_timeout: float = 30,
+) -> None:
+    """Start a development server for a WSGI application. Various
+    optional features can be enabled.
+
+    .. warning::
+
+        Do not use the development server when deploying to production.
+        It is intended for use only during local development. It is not
+        designed to be particularly efficient, stable, or secure.
+
+    :param hostname: The host to bind to, for example ``'localhost'``.
+        Can be a domain, IPv4 or IPv6 address, or file path starting
+        with ``unix://`` for a Unix socket.
+    :param port: The port to bind to, for example ``8080``. Using ``0``
+        tells the OS to pick a random free port.
+    :param application: The WSGI application to run.
+    :param use_reloader: Use a reloader process to restart the server
+        process when files are changed.
+    :param use_debugger: Use Werkzeug's debugger, which will show
+        formatted tracebacks on unhandled exceptions.
+    :param use_evalex: Make the debugger interactive. A Python terminal
+        can be opened for any frame in the traceback. Some protection is
+        provided by requiring a PIN, but this should never be enabled
+        on a publicly visible server.
+    :param extra_files: The reloader will watch these files for changes
+        in addition to Python modules. For example, watch a
+        configuration file.
+    :param exclude_patterns: The reloader will ignore changes to any
+        files matching these :mod:`fnmatch` patterns. For example,
+        ignore cache files.
+    :param reloader_interval: How often the reloader tries to check for
+        changes.
+    :param reloader_type: The reloader to use. The ``'stat'`` reloader
+        is built in, but may require significant CPU to watch files. The
+        ``'watchdog'`` reloader is much more efficient but requires
+        installing the ``watchdog`` package first.
+    :param threaded: Handle concurrent requests using threads. Cannot be
+        used with ``processes``. If ``True``, a new thread is started for
+        each connection. If a number, a pool of that many threads handles
+        the connections, and new connections are answered with a 503
+        error when too many are waiting, see :class:`PooledWSGIServer`.
+    :param processes: Handle concurrent requests using up to this number
+        of processes. Cannot be used with ``threaded``, unless
+        ``prefork`` is enabled.
+    :param request_handler: Use a different
+        :class:`~BaseHTTPServer.BaseHTTPRequestHandler` subclass to
+        handle requests.
+    :param static_files: A dict mapping URL prefixes to directories to
+        serve static files from using
+        :class:`~werkzeug.middleware.SharedDataMiddleware`.
+    :param passthrough_errors: Don't catch unhandled exceptions at the
+        server level, let the server crash instead. If ``use_debugger``
+        is enabled, the debugger will still catch such errors.
+    :param ssl_context: Configure TLS to serve over HTTPS. Can be an
+        :class:`ssl.SSLContext` object, a ``(cert_file, key_file)``
+        tuple to create a typical context, or the string ``'adhoc'`` to
+        generate a temporary self-signed certificate.
+    :param keep_alive_timeout: Keep HTTP/1.1 connections open between
+        requests, waiting for at most this number of seconds for the next
+        one. Requires ``threaded``, or ``processes`` without ``prefork``,
+        since a connection being kept occupies a worker. By default every
+        connection is closed after a request.
+    :param prefork: Start ``processes`` long-lived worker processes, each
+        handling concurrent requests as set by ``threaded``, see
+        :class:`PreforkWSGIServer`.
+    :param event_loop: Do the socket I/O in an event loop and call the
+        application in a pool of ``threaded`` threads (8 if not a
+        number), see :class:`EventLoopWSGIServer`.
+    :param max_requests: With ``prefork``, replace a worker after it
+        handled this number of requests. ``0`` disables it.
+    :param reuse_port: With ``prefork``, bind a ``SO_REUSEPORT`` socket in
+        every worker instead of sharing one. Cannot be used with
+        ``use_reloader``.
+    :param graceful_timeout: With ``prefork``, the seconds given to the
+        workers to finish the requests in progress when stopping.
+
+    .. versionchanged:: 3.1
+        The ``event_loop`` parameter was added.
+
+    .. versionchanged:: 3.1
+        The ``prefork``, ``max_requests``, ``reuse_port`` and
+        ``graceful_timeout`` parameters were added.
+
+    .. versionchanged:: 3.1
+        The ``keep_alive_timeout`` parameter was added.
+
+    .. versionchanged:: 3.1
+        ``threaded`` can be a number of threads to use a thread pool.
+
+    .. versionchanged:: 2.1
+        Instructions are shown for dealing with an "address already in
+        use" error.
+
+    .. versionchanged:: 2.1
+        Running on ``0.0.0.0`` or ``::`` shows the loopback IP in
+        addition to a real IP.
+
+    .. versionchanged:: 2.1
+        The command-line interface was removed.
+
+    .. versionchanged:: 2.0
+        Running on ``0.0.0.0`` or ``::`` shows a real IP address that
+        was bound as well as a warning not to run the development server
+        in production.
+
+    .. versionchanged:: 2.0
+        The ``exclude_patterns`` parameter was added.
+
+    .. versionchanged:: 0.15
+        Bind to a Unix socket by passing a ``hostname`` that starts with
+        ``unix://``.
+
+    .. versionchanged:: 0.10
+        Improved the reloader and added support for changing the backend
+        through the ``reloader_type`` parameter.
+
+    .. versionchanged:: 0.9
+        A command-line interface was added.
+
+    .. versionchanged:: 0.8
+        ``ssl_context`` can be a tuple of paths to the certificate and
+        private key files.
+
+    .. versionchanged:: 0.6
+        The ``ssl_context`` parameter was added.
+
+    .. versionchanged:: 0.5
+       The ``static_files`` and ``passthrough_errors`` parameters were
        added.
     """
     if not isinstance(port, int):
         raise TypeError("port must be an integer")
 
+    if reuse_port and use_reloader:
+        # The socket kept open by the reloader process would get a share
+        # of the connections, never accepted.
+        raise ValueError("Cannot use the reloader with 'reuse_port'.")
+
     if static_files:
         from .middleware.shared_data import SharedDataMiddleware
 
@@ -1084,6 +2725,12 @@ def run_simple(
         passthrough_errors,
         ssl_context,
         fd=fd,
+        keep_alive_timeout=keep_alive_timeout,
+        prefork=prefork,
+        event_loop=event_loop,
+        max_requests=max_requests,
+        reuse_port=reuse_port,
+        graceful_timeout=graceful_timeout,
     )
     srv.socket.set_inheritable(True)
     os.environ["WERKZEUG_SERVER_FD"] = str(srv.fileno())
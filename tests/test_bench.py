@@ -0,0 +1,47 @@
+import contextlib
+import importlib.util
+import io
+import os
+import unittest
+
+from testutils import ConnectingTestCase, dsn
+
+spec = importlib.util.spec_from_file_location('bench_psycopg2', os.path.join(
+    os.path.dirname(__file__), '..', 'benchmarks', 'bench_psycopg2.py'))
+bench = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench)
+
+
+class ParseRowsTestCase(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            bench.parse_rows('10, 1k,2M'), [10, 1000, 2000000])
+        self.assertRaises(ValueError, bench.parse_rows, '1x')
+
+
+class RunBenchmarksTestCase(ConnectingTestCase):
+    def test_smoke(self):
+        # skip if the database is not available
+        self.conn
+        with contextlib.redirect_stderr(io.StringIO()):
+            report = bench.run_benchmarks(
+                dsn, list(bench.WORKLOADS), [10], 1)
+        self.assertEqual(report['meta']['repeat'], 1)
+        self.assertEqual(
+            [r['workload'] for r in report['results']], list(bench.WORKLOADS))
+        for result in report['results']:
+            if result['workload'] == 'hstore' and 'error' in result:
+                # the extension may be not available
+                continue
+            self.assertNotIn('error', result)
+            self.assertEqual(len(result['times']), 1)
+
+        # the database is left as it was found
+        curs = self.conn.cursor()
+        curs.execute(
+            "select 1 from pg_namespace where nspname = 'psycopg2_bench'")
+        self.assertIsNone(curs.fetchone())
+
+
+if __name__ == '__main__':
+    unittest.main()
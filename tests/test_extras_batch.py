@@ -0,0 +1,95 @@
+import unittest
+
+from psycopg2 import sql
+from psycopg2.extras import _batch_template, execute_batch
+
+from testutils import ConnectingTestCase
+
+
+class BatchTemplateTestCase(unittest.TestCase):
+    def test_positional(self):
+        template, getter, nparams = _batch_template(
+            b"insert into t values (%s, %s, '%%')", 'utf8')
+        self.assertEqual(template, b"insert into t values (%s, %s, '%%')")
+        self.assertIsNone(getter)
+        self.assertEqual(nparams, 2)
+
+    def test_named(self):
+        template, getter, nparams = _batch_template(
+            b"insert into t values (%(a)s, %(b)s, %(a)s)", 'utf8')
+        self.assertEqual(template, b"insert into t values (%s, %s, %s)")
+        self.assertEqual(getter({'a': 1, 'b': 2}), (1, 2, 1))
+        self.assertEqual(nparams, 3)
+
+    def test_unsupported(self):
+        self.assertIsNone(_batch_template(b"select %s, %(a)s", 'utf8'))
+        self.assertIsNone(_batch_template(b"select %d", 'utf8'))
+
+
+class ExecuteBatchTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        curs = self.conn.cursor()
+        curs.execute(
+            "create temp table testbatch (id int primary key, data text)")
+
+    def rows(self):
+        curs = self.conn.cursor()
+        curs.execute("select id, data from testbatch order by id")
+        return curs.fetchall()
+
+    def test_pages(self):
+        curs = self.conn.cursor()
+        execute_batch(
+            curs, "insert into testbatch values (%s, %s)",
+            ((i, f"'{i}'%") for i in range(250)), page_size=100)
+        self.assertEqual(self.rows(), [(i, f"'{i}'%") for i in range(250)])
+
+    def test_named(self):
+        curs = self.conn.cursor()
+        execute_batch(
+            curs, "insert into testbatch values (%(id)s, %(data)s || '%%')",
+            [{'id': i, 'data': str(i)} for i in range(5)], page_size=2)
+        self.assertEqual(self.rows(), [(i, f"{i}%") for i in range(5)])
+
+    def test_composable(self):
+        curs = self.conn.cursor()
+        execute_batch(
+            curs,
+            sql.SQL("insert into {} values (%s, %s)").format(
+                sql.Identifier('testbatch')),
+            [(1, 'a'), (2, 'b')])
+        self.assertEqual(self.rows(), [(1, 'a'), (2, 'b')])
+
+    def test_unusual_placeholders(self):
+        # left to mogrify() and its errors
+        curs = self.conn.cursor()
+        self.assertRaises(
+            Exception, execute_batch, curs,
+            "insert into testbatch values (%s, %(a)s)", [{'a': 1}])
+
+    def test_wrong_records(self):
+        curs = self.conn.cursor()
+        # psycopg's own errors, not the ones of the fast path
+        with self.assertRaises(TypeError) as cm:
+            execute_batch(
+                curs, "insert into testbatch values (%s, %s)",
+                [{'id': 1, 'data': 'a'}])
+        self.assertIn('not a sequence', str(cm.exception))
+        with self.assertRaises(TypeError) as cm:
+            execute_batch(
+                curs, "insert into testbatch values (%(id)s, %(data)s)",
+                [(1, 'a')])
+        self.assertIn('tuple indices', str(cm.exception))
+        with self.assertRaises(KeyError):
+            execute_batch(
+                curs, "insert into testbatch values (%(id)s, %(data)s)",
+                [{'id': 1}])
+        with self.assertRaises(IndexError):
+            execute_batch(
+                curs, "insert into testbatch values (%s, %s)", [(1,)])
+        self.assertEqual(self.rows(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
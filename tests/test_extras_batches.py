@@ -0,0 +1,85 @@
+import unittest
+
+from psycopg2.extras import NamedTupleCursor, _batch_bytes, iter_batches
+
+from testutils import ConnectingTestCase
+
+
+class BatchBytesTestCase(unittest.TestCase):
+    def test_estimate(self):
+        self.assertEqual(_batch_bytes([(1, 'abc', b'de')]), 13)
+        self.assertEqual(_batch_bytes([{'a': 'xy'}] * 10), 20)
+
+
+class IterBatchesTestCase(ConnectingTestCase):
+    def named(self, query, **kwargs):
+        curs = self.conn.cursor('testbatches', **kwargs)
+        curs.execute(query)
+        return curs
+
+    def test_fixed(self):
+        curs = self.named("select generate_series(1, 250)")
+        batches = list(iter_batches(curs, size=100))
+        self.assertEqual([len(b) for b in batches], [100, 100, 50])
+        self.assertEqual(
+            [r[0] for b in batches for r in b], list(range(1, 251)))
+
+    def test_itersize(self):
+        curs = self.named("select generate_series(1, 300)")
+        curs.itersize = 200
+        self.assertEqual(
+            [len(b) for b in iter_batches(curs)], [200, 100])
+
+    def test_target_bytes_grows(self):
+        curs = self.named("select generate_series(1, 10000)")
+        sizes = [len(b) for b in iter_batches(
+            curs, size=100, target_bytes=100000, max_size=3000)]
+        # growing at most 4 times per batch
+        self.assertEqual(sizes[:4], [100, 400, 1600, 3000])
+        self.assertEqual(sum(sizes), 10000)
+
+    def test_target_bytes_shrinks(self):
+        curs = self.named(
+            "select repeat('x', 1000) from generate_series(1, 100)")
+        sizes = [len(b) for b in iter_batches(
+            curs, size=50, target_bytes=5000, min_size=2)]
+        self.assertEqual(sizes[:2], [50, 5])
+        self.assertEqual(sum(sizes), 100)
+
+    def test_target_time(self):
+        curs = self.named("select generate_series(1, 5000)")
+        sizes = [len(b) for b in iter_batches(
+            curs, size=100, target_time=10, max_size=1000)]
+        self.assertEqual(sizes[:3], [100, 400, 1000])
+
+    def test_cursor_subclass(self):
+        curs = self.named(
+            "select generate_series(1, 3) as n",
+            cursor_factory=NamedTupleCursor)
+        batch = next(iter_batches(curs))
+        self.assertEqual([r.n for r in batch], [1, 2, 3])
+
+    def test_columns(self):
+        curs = self.named(
+            "select n, n::text as s from generate_series(1, 150) n")
+        batches = list(iter_batches(curs, size=100, columns=True))
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(batches[1]['n'], list(range(101, 151)))
+        self.assertEqual(batches[0]['s'][:2], ['1', '2'])
+
+    def test_empty(self):
+        curs = self.named("select 1 where false")
+        self.assertEqual(list(iter_batches(curs)), [])
+        curs = self.conn.cursor()
+        curs.execute("select 1 where false")
+        self.assertEqual(list(iter_batches(curs, columns=True)), [])
+
+    def test_client_cursor(self):
+        curs = self.conn.cursor()
+        curs.execute("select generate_series(1, 150)")
+        self.assertEqual(
+            [len(b) for b in iter_batches(curs, size=100)], [100, 50])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import time
+import unittest
+
+from psycopg2.extensions import Notify
+from psycopg2.extras import (
+    CachingConnection, DictCursor, ResultCache, iter_batches)
+
+from testutils import ConnectingTestCase
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def test_ttl(self):
+        cache = ResultCache()
+        cache.put(('q',), None, [(1,)], 1)
+        self.assertIsNone(cache.get(('q',)))
+
+        cache.put(('q',), None, [(1,)], 1, 'SELECT 1', ttl=0.2)
+        self.assertEqual(cache.get(('q',)), (None, [(1,)], 1, 'SELECT 1'))
+        time.sleep(0.3)
+        self.assertIsNone(cache.get(('q',)))
+
+    def test_invalidate(self):
+        cache = ResultCache(ttl=10)
+        cache.put(('q1',), None, [], 0, tags=['t1'])
+        cache.put(('q2',), None, [], 0, tags=['t2'])
+        cache.invalidate('t1')
+        self.assertIsNone(cache.get(('q1',)))
+        self.assertIsNotNone(cache.get(('q2',)))
+
+        cache.handle_notify(Notify(0, 'result_cache', ''))
+        self.assertIsNone(cache.get(('q2',)))
+
+    def test_stale_put(self):
+        cache = ResultCache(ttl=10)
+        generation = cache.generation
+        cache.invalidate('t')
+        cache.put(('q',), None, [], 0, generation=generation)
+        self.assertIsNone(cache.get(('q',)))
+
+    def test_max_bytes(self):
+        cache = ResultCache(max_bytes=1000, ttl=10)
+        for i in range(10):
+            cache.put((f'q{i}',), None, [('x' * 100,)], 1)
+        self.assertLessEqual(cache.nbytes, 1000)
+        self.assertGreater(cache.evictions, 0)
+        self.assertIsNotNone(cache.get(('q9',)))
+        self.assertIsNone(cache.get(('q0',)))
+
+
+class CachingCursorTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ResultCache(ttl=10)
+        self.cconn = self.connect(connection_factory=CachingConnection)
+        self.cconn.initialize(self.cache)
+        curs = self.conn.cursor()
+        curs.execute("drop table if exists testcache")
+        curs.execute("create table testcache (id int)")
+        curs.execute("insert into testcache values (1)")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.conn.cursor().execute("drop table testcache")
+        self.conn.commit()
+        super().tearDown()
+
+    def test_hit(self):
+        self.cconn.autocommit = True
+        curs = self.cconn.cursor()
+        curs.execute("select id from testcache")
+        self.assertEqual(curs.fetchall(), [(1,)])
+        self.conn.cursor().execute("insert into testcache values (2)")
+        self.conn.commit()
+
+        curs.execute("select id from testcache")
+        self.assertEqual(curs.fetchall(), [(1,)])
+        self.assertEqual(curs.rowcount, 1)
+        self.assertEqual(curs.statusmessage, 'SELECT 1')
+        self.assertEqual(curs.query, b'select id from testcache')
+        self.assertEqual(self.cache.hits, 1)
+
+        self.cache.clear()
+        curs.execute("select id from testcache order by id")
+        self.assertEqual(curs.fetchall(), [(1,), (2,)])
+
+    def test_transaction(self):
+        curs = self.cconn.cursor()
+        curs.execute("select id from testcache")
+        self.assertEqual(curs.fetchall(), [(1,)])
+
+        # the transaction sees its own writes
+        curs.execute("insert into testcache values (2)")
+        curs.execute("select id from testcache")
+        self.assertEqual(curs.fetchall(), [(1,), (2,)])
+        self.assertEqual(self.cache.hits, 0)
+        self.cconn.rollback()
+
+        # at the start of the next transaction the cache is used
+        curs.execute("select id from testcache")
+        self.assertEqual(curs.fetchall(), [(1,)])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_no_ttl(self):
+        self.cache.ttl = None
+        self.cconn.autocommit = True
+        curs = self.cconn.cursor()
+        curs.execute("select id from testcache")
+        curs.execute("select id from testcache")
+        self.assertEqual(self.cache.hits, 0)
+        curs.execute("select id from testcache", ttl=10, tags=['testcache'])
+        curs.execute("select id from testcache", ttl=10)
+        self.assertEqual(self.cache.hits, 1)
+
+
+class IterBatchesRowFactoryTestCase(ConnectingTestCase):
+    def test_columns_restores_row_factory(self):
+        curs = self.conn.cursor(cursor_factory=DictCursor)
+        row_factory = curs.row_factory
+        curs.execute("select generate_series(1, 1000) as n")
+        batches = iter_batches(curs, size=100, columns=True)
+        self.assertEqual(next(batches)['n'], list(range(1, 101)))
+
+        # not left changed while the iteration is suspended
+        self.assertIs(curs.row_factory, row_factory)
+        self.assertEqual(curs.fetchone()['n'], 101)
+
+
+if __name__ == '__main__':
+    unittest.main()
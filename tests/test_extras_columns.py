@@ -0,0 +1,93 @@
+import array
+import datetime
+import decimal
+import unittest
+
+import psycopg2
+from psycopg2.extras import DictCursor, fetch_columns
+
+from testutils import ConnectingTestCase
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class FetchColumnsTestCase(ConnectingTestCase):
+    query = """
+        select n as i, n::int8 as big, n / 2.0::float8 as f, n % 2 = 0 as b,
+            '2000-01-01'::date + n as d, n::text as t, n::numeric as num
+        from generate_series(1, 250) n"""
+
+    def fetch(self, query=None, numpy=False, **kwargs):
+        curs = self.conn.cursor('testcolumns')
+        curs.execute(query or self.query)
+        return fetch_columns(curs, size=100, numpy=numpy, **kwargs)
+
+    def test_arrays(self):
+        columns, nulls = self.fetch()
+        self.assertEqual(
+            list(columns), ['i', 'big', 'f', 'b', 'd', 't', 'num'])
+        self.assertEqual(columns['i'], array.array('i', range(1, 251)))
+        self.assertEqual(columns['big'].typecode, 'q')
+        self.assertEqual(columns['f'][:2], array.array('d', [0.5, 1.0]))
+        self.assertEqual(list(columns['b'][:2]), [0, 1])
+        # days since the epoch
+        self.assertEqual(
+            columns['d'][0], datetime.date(2000, 1, 2).toordinal()
+            - datetime.date(1970, 1, 1).toordinal())
+
+        # other types are lists
+        self.assertEqual(columns['t'][-1], '250')
+        self.assertEqual(columns['num'][0], decimal.Decimal(1))
+        self.assertEqual(sorted(nulls), ['b', 'big', 'd', 'f', 'i'])
+        self.assertFalse(any(nulls['i']))
+
+    def test_numeric(self):
+        columns, nulls = self.fetch(numeric=True)
+        self.assertEqual(columns['num'].typecode, 'd')
+        self.assertEqual(columns['num'][-1], 250.0)
+
+    def test_nulls(self):
+        columns, nulls = self.fetch("""
+            select nullif(n, 2) as i, nullif(now(), now()) as ts
+            from generate_series(1, 3) n""")
+        self.assertEqual(list(columns['i']), [1, 0, 3])
+        self.assertEqual(list(nulls['i']), [0, 1, 0])
+        self.assertEqual(list(nulls['ts']), [1, 1, 1])
+
+    def test_timestamps(self):
+        columns, nulls = self.fetch("""
+            select '1970-01-01 00:00:01.5'::timestamp as ts,
+                '1970-01-01 00:00:01+00'::timestamptz as tstz""")
+        self.assertEqual(columns['ts'][0], 1500000)
+        self.assertEqual(columns['tstz'][0], 1000000)
+
+    def test_cursor_subclass(self):
+        curs = self.conn.cursor(cursor_factory=DictCursor)
+        curs.execute("select generate_series(1, 3) as n")
+        row_factory = curs.row_factory
+        columns, nulls = fetch_columns(curs, numpy=False)
+        self.assertEqual(list(columns['n']), [1, 2, 3])
+        self.assertIs(curs.row_factory, row_factory)
+
+    def test_no_result(self):
+        curs = self.conn.cursor()
+        curs.execute("set timezone to 'UTC'")
+        self.assertRaises(psycopg2.ProgrammingError, fetch_columns, curs)
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_numpy(self):
+        columns, nulls = self.fetch(numpy=True)
+        self.assertIsInstance(columns['i'], numpy.ndarray)
+        self.assertEqual(columns['i'].sum(), sum(range(1, 251)))
+        self.assertEqual(columns['b'].dtype, numpy.dtype(bool))
+        self.assertEqual(
+            columns['d'][0], numpy.datetime64('2000-01-02', 'D'))
+        self.assertEqual(nulls['i'].dtype, numpy.dtype(bool))
+        self.assertIsInstance(columns['t'], list)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import pickle
+import unittest
+
+from psycopg2.extras import (
+    CompactDictConnection, CompactDictCursor, CompactDictRow,
+    _make_compact_row)
+
+from testutils import ConnectingTestCase
+
+
+class CompactDictRowTestCase(unittest.TestCase):
+    def setUp(self):
+        self.row = _make_compact_row(('a', 'b'), (1, 'x'))
+
+    def test_access(self):
+        row = self.row
+        self.assertIsInstance(row, CompactDictRow)
+        self.assertEqual(row, (1, 'x'))
+        self.assertEqual((row[0], row['a']), (1, 1))
+        self.assertEqual((row[-1], row['b']), ('x', 'x'))
+        self.assertEqual(row[:1], (1,))
+        self.assertRaises(KeyError, row.__getitem__, 'c')
+        self.assertEqual((row.get('b'), row.get('c', 0)), ('x', 0))
+        self.assertIn('a', row)
+        self.assertNotIn(1, row)
+
+    def test_mapping(self):
+        row = self.row
+        self.assertEqual(list(row.keys()), ['a', 'b'])
+        self.assertEqual(list(row.values()), [1, 'x'])
+        self.assertEqual(list(row.items()), [('a', 1), ('b', 'x')])
+        self.assertEqual(dict(row.copy()), {'a': 1, 'b': 'x'})
+        self.assertEqual(repr(row), "CompactDictRow({'a': 1, 'b': 'x'})")
+
+    def test_compact(self):
+        self.assertFalse(hasattr(self.row, '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.row, 'c', 1)
+        self.assertIs(
+            type(_make_compact_row(('a', 'b'), (2, 'y'))), type(self.row))
+
+    def test_pickle(self):
+        row = pickle.loads(pickle.dumps(self.row))
+        self.assertEqual(row, (1, 'x'))
+        self.assertEqual(row['b'], 'x')
+        self.assertIs(type(row), type(self.row))
+
+
+class CompactDictCursorTestCase(ConnectingTestCase):
+    query = "select n, n * 10 as m from generate_series(1, 3) n"
+
+    def cursor(self, *args):
+        return self.conn.cursor(*args, cursor_factory=CompactDictCursor)
+
+    def test_fetch(self):
+        curs = self.cursor()
+        curs.execute(self.query)
+        row = curs.fetchone()
+        self.assertEqual((row['n'], row['m']), (1, 10))
+        rows = curs.fetchmany(1) + curs.fetchall()
+        self.assertEqual([r['m'] for r in rows], [20, 30])
+        self.assertEqual(len({type(r) for r in [row] + rows}), 1)
+        self.assertIsNone(curs.fetchone())
+
+    def test_iter(self):
+        curs = self.cursor()
+        curs.execute(self.query)
+        self.assertEqual([r['m'] for r in curs], [10, 20, 30])
+
+    def test_named(self):
+        curs = self.cursor('testcompact')
+        curs.execute(self.query)
+        self.assertEqual([r['n'] for r in curs], [1, 2, 3])
+
+    def test_new_query(self):
+        curs = self.cursor()
+        curs.execute(self.query)
+        curs.fetchone()
+        curs.execute("select 'a' as x")
+        row = curs.fetchone()
+        self.assertEqual(row['x'], 'a')
+        self.assertNotIn('n', row)
+
+    def test_connection(self):
+        conn = self.connect(connection_factory=CompactDictConnection)
+        curs = conn.cursor()
+        self.assertIsInstance(curs, CompactDictCursor)
+        curs.execute(self.query)
+        self.assertEqual(curs.fetchone()['m'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+import datetime
+import decimal
+import unittest
+import uuid
+
+import psycopg2
+
+from psycopg2 import sql
+from psycopg2.extras import (
+    Json, LazyJson, NumericRange, _copy_text, copy_records, execute_copy,
+    execute_copy_binary, register_uuid)
+
+from testutils import ConnectingTestCase
+
+
+class CopyTextTestCase(unittest.TestCase):
+    def test_scalars(self):
+        self.assertEqual(_copy_text('a\tb\\c\nd\re'), 'a\\tb\\\\c\\nd\\re')
+        self.assertEqual(_copy_text(True), 't')
+        self.assertEqual(_copy_text(10), '10')
+        self.assertEqual(_copy_text(0.1), '0.1')
+        self.assertEqual(_copy_text(decimal.Decimal('1.50')), '1.50')
+        self.assertEqual(_copy_text(b'\x00\xff'), '\\\\x00ff')
+        self.assertEqual(
+            _copy_text(datetime.timedelta(days=1, seconds=2, microseconds=3)),
+            '1 days 2 seconds 3 us')
+
+    def test_arrays(self):
+        self.assertEqual(_copy_text([1, None, 3]), '{1,NULL,3}')
+        self.assertEqual(_copy_text([[1, 2], [3, 4]]), '{{1,2},{3,4}}')
+        self.assertEqual(
+            _copy_text(['a b', '', 'null', 'x"y\\z']),
+            '{"a b","","null","x\\\\"y\\\\\\\\z"}')
+
+    def test_subclass(self):
+        class MyInt(int):
+            pass
+
+        self.assertEqual(_copy_text(MyInt(5)), '5')
+
+
+class ExecuteCopyTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        curs = self.conn.cursor()
+        curs.execute("""
+            create temp table testcopy (
+                id int, data text, b bytea, a text[], j jsonb,
+                r int4range, ts timestamptz, iv interval, n numeric)""")
+
+    def rows(self, columns='*'):
+        curs = self.conn.cursor()
+        curs.execute(f"select {columns} from testcopy order by id")
+        return curs.fetchall()
+
+    def test_types(self):
+        ts = datetime.datetime(
+            2020, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc)
+        record = (
+            1, 'tab\there\nline\\', b'\x00\x01\\', ['a', None, 'b c', '"'],
+            Json({'a': [1, None]}), NumericRange(1, 10), ts,
+            datetime.timedelta(days=-1, seconds=10), decimal.Decimal('1.5'))
+        curs = self.conn.cursor()
+        self.assertEqual(
+            execute_copy(curs, "copy testcopy from stdin", [record]), 1)
+
+        row = self.rows()[0]
+        self.assertEqual(row[:2], record[:2])
+        self.assertEqual(bytes(row[2]), record[2])
+        self.assertEqual(row[3:5], (record[3], {'a': [1, None]}))
+        self.assertEqual(row[5], record[5])
+        self.assertEqual(row[6], ts)
+        self.assertEqual(row[7:], record[7:])
+
+    def test_nulls(self):
+        curs = self.conn.cursor()
+        execute_copy(curs, "copy testcopy from stdin", [[None] * 9])
+        self.assertEqual(self.rows(), [(None,) * 9])
+
+    def test_blocks(self):
+        curs = self.conn.cursor()
+        n = execute_copy(
+            curs, sql.SQL("copy {} (id, data) from stdin").format(
+                sql.Identifier('testcopy')),
+            ((i, str(i) * 10) for i in range(1000)), size=100)
+        self.assertEqual(n, 1000)
+        self.assertEqual(
+            self.rows('id, data'), [(i, str(i) * 10) for i in range(1000)])
+
+    def test_mappings(self):
+        curs = self.conn.cursor()
+        execute_copy(
+            curs, "copy testcopy (data, id) from stdin",
+            [{'id': 1, 'data': 'a', 'other': 'x'}], columns=['data', 'id'])
+        self.assertEqual(self.rows('id, data'), [(1, 'a')])
+
+
+class CopyRecordsTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        curs = self.conn.cursor()
+        curs.execute("create temp table testcopy (id int, data text)")
+
+    def rows(self):
+        curs = self.conn.cursor()
+        curs.execute("select id, data from testcopy order by id")
+        return curs.fetchall()
+
+    def test_sequences(self):
+        curs = self.conn.cursor()
+        self.assertEqual(
+            copy_records(curs, 'testcopy', [(1, 'a'), (2, None)]), 2)
+        self.assertEqual(self.rows(), [(1, 'a'), (2, None)])
+
+    def test_mappings(self):
+        curs = self.conn.cursor()
+        copy_records(curs, 'testcopy', iter([{'data': 'a', 'id': 1}]))
+        copy_records(curs, 'testcopy', [{'id': 2}])
+        self.assertEqual(self.rows(), [(1, 'a'), (2, None)])
+
+    def test_qualified(self):
+        curs = self.conn.cursor()
+        curs.execute(
+            "select nspname from pg_namespace where oid = pg_my_temp_schema()")
+        schema = curs.fetchone()[0]
+        copy_records(
+            curs, f'{schema}.testcopy', [(1, 'a')], columns=['id', 'data'])
+        self.assertEqual(self.rows(), [(1, 'a')])
+
+    def test_empty(self):
+        curs = self.conn.cursor()
+        self.assertEqual(copy_records(curs, 'nosuchtable', []), 0)
+
+
+class ExecuteCopyBinaryTestCase(ConnectingTestCase):
+    types = [
+        'int2', 'int4', 'int8', 'float8', 'bool', 'date', 'timestamp',
+        'timestamptz', 'uuid', 'numeric', 'interval', 'bytea', 'text',
+        'jsonb', 'float4', 'time']
+
+    def setUp(self):
+        super().setUp()
+        register_uuid(conn_or_curs=self.conn)
+        curs = self.conn.cursor()
+        curs.execute(
+            "create temp table testcopy (%s)" % ', '.join(
+                f'c{i} {t}' for i, t in enumerate(self.types)))
+
+    def copy(self, records):
+        curs = self.conn.cursor()
+        n = execute_copy_binary(
+            curs, "copy testcopy from stdin (format binary)", records,
+            self.types)
+        curs.execute("select * from testcopy")
+        rows = curs.fetchall()
+        curs.execute("truncate testcopy")
+        self.assertEqual(n, len(rows))
+        return rows
+
+    def test_types(self):
+        record = (
+            -2, 2 ** 31 - 1, -2 ** 63, 0.1, True, datetime.date(1999, 12, 31),
+            datetime.datetime(2020, 1, 2, 3, 4, 5, 6),
+            datetime.datetime(
+                2020, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+            uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            decimal.Decimal('-12345.678900'),
+            datetime.timedelta(days=-3, seconds=5, microseconds=1),
+            b'\x00\xff', 'hello\t', {'a': [1, None]}, 0.5,
+            datetime.time(23, 59, 59, 999999))
+        row = self.copy([record])[0]
+        self.assertEqual(row[:11], record[:11])
+        self.assertEqual(bytes(row[11]), record[11])
+        self.assertEqual(row[12:], record[12:])
+
+    def test_nulls(self):
+        record = [None] * len(self.types)
+        rows = self.copy([record, record[:1] + [1] + record[2:]])
+        self.assertEqual(sorted(rows, key=lambda r: r[1] or 0), [
+            tuple(record), tuple(record[:1] + [1] + record[2:])])
+
+    def test_numeric(self):
+        values = [
+            '0', '0.00', '1', '-1', '10000', '123456789012345678901234567890',
+            '0.0001', '0.00001', '-1.5', '1E+5', '3.14159265358979323846',
+            'NaN']
+        curs = self.conn.cursor()
+        curs.execute("create temp table testnum (n numeric)")
+        execute_copy_binary(
+            curs, "copy testnum from stdin (format binary)",
+            [(decimal.Decimal(v),) for v in values] + [(10,), (0.25,)],
+            ['numeric'])
+        curs.execute("select n::text from testnum")
+        self.assertEqual(
+            [r[0] for r in curs.fetchall()],
+            [str(decimal.Decimal(v)) if 'E' not in v else '100000'
+                for v in values] + ['10', '0.25'])
+
+    def test_json(self):
+        curs = self.conn.cursor()
+        curs.execute("create temp table testjson (j json, jb jsonb)")
+        values = [Json([1]), LazyJson('[1]', None), '[1]', [1]]
+        execute_copy_binary(
+            curs, "copy testjson from stdin (format binary)",
+            [(v, v) for v in values], ['json', 'jsonb'])
+        curs.execute("select j, jb from testjson")
+        self.assertEqual(curs.fetchall(), [([1], [1])] * len(values))
+
+    def test_wrong_length(self):
+        # the reader error is reported by copy_expert()
+        with self.assertRaises(psycopg2.Error) as cm:
+            self.copy([(1, 2)])
+        self.assertIn('expecting 16 values', str(cm.exception))
+
+    def test_unknown_type(self):
+        curs = self.conn.cursor()
+        self.assertRaises(
+            psycopg2.ProgrammingError, execute_copy_binary, curs,
+            "copy testcopy from stdin (format binary)", [], ['point'])
+
+    def test_copy_records(self):
+        curs = self.conn.cursor()
+        curs.execute("create temp table testbin (id int8, data text)")
+        copy_records(
+            curs, 'testbin', ({'id': i, 'data': str(i)} for i in range(1000)),
+            types=['int8', 'text'], size=100)
+        curs.execute("select id, data from testbin order by id")
+        self.assertEqual(
+            curs.fetchall(), [(i, str(i)) for i in range(1000)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import unittest
+
+import psycopg2._json
+from psycopg2.extras import (
+    Json, LazyJson, get_json_codec, register_default_json, set_json_codec)
+
+from testutils import ConnectingTestCase
+
+
+class JsonCodecTestCase(unittest.TestCase):
+    def setUp(self):
+        self._codec = psycopg2._json._codec
+
+    def tearDown(self):
+        psycopg2._json._codec = self._codec
+
+    def test_default(self):
+        psycopg2._json._codec = None
+        codec = get_json_codec()
+        self.assertEqual(codec.name, 'json')
+
+        # the same documents as json.dumps()
+        obj = {'a': [1, 2.5, float('nan')], 'b': None}
+        self.assertEqual(Json(obj).dumps(obj), json.dumps(obj))
+
+    def test_set(self):
+        codec = set_json_codec('json', dumps=lambda obj: 'custom')
+        self.assertEqual(codec.name, 'custom')
+        self.assertIs(get_json_codec(), codec)
+        self.assertEqual(Json({}).dumps({}), 'custom')
+        self.assertIs(codec.loads, json.loads)
+
+    def test_fastest(self):
+        codec = set_json_codec(None)
+        self.assertIn(codec.name, ('orjson', 'ujson', 'json'))
+        self.assertEqual(codec.loads('{"a": [1, 2]}'), {'a': [1, 2]})
+        self.assertEqual(json.loads(codec.dumps({'a': [1, 2]})), {'a': [1, 2]})
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, set_json_codec, 'nosuchjson')
+
+    def test_explicit_dumps(self):
+        self.assertEqual(Json({}, dumps=lambda obj: '[]').dumps({}), '[]')
+
+
+class LazyJsonTestCase(unittest.TestCase):
+    def test_lazy(self):
+        calls = []
+
+        def loads(s):
+            calls.append(s)
+            return json.loads(s)
+
+        obj = LazyJson('{"a": [1, 2]}', loads)
+        self.assertEqual(calls, [])
+        self.assertEqual(obj['a'], [1, 2])
+        self.assertEqual(list(obj), ['a'])
+        self.assertEqual(obj.value, {'a': [1, 2]})
+        self.assertEqual(len(calls), 1)
+
+
+class JsonRoundTripTestCase(ConnectingTestCase):
+    def test_round_trip(self):
+        curs = self.conn.cursor()
+        obj = {'a': [1, 2.5], 'b': 'x'}
+        curs.execute("select %s::json, %s::jsonb", (Json(obj), Json(obj)))
+        self.assertEqual(curs.fetchone(), (obj, obj))
+
+    def test_lazy(self):
+        register_default_json(self.conn, lazy=True)
+        curs = self.conn.cursor()
+        curs.execute("""select '{"a": 1}'::json""")
+        obj = curs.fetchone()[0]
+        self.assertIsInstance(obj, LazyJson)
+        self.assertEqual(obj.raw, '{"a": 1}')
+        self.assertEqual(obj['a'], 1)
+
+        # passed back as the original text
+        curs.execute("select %s::text", (obj,))
+        self.assertEqual(curs.fetchone()[0], '{"a": 1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import pickle
+import unittest
+
+import psycopg2
+from psycopg2.extras import (
+    LazyComposite, NumericRange, Range, RangeCaster, register_composite,
+    register_range)
+
+from testutils import ConnectingTestCase
+
+
+class FRange(Range):
+    pass
+
+
+class RangeClassesTestCase(unittest.TestCase):
+    def test_attributes(self):
+        # the public range classes still have a __dict__
+        r = NumericRange(1, 2)
+        r.note = 'x'
+        self.assertEqual(r.note, 'x')
+
+        caster = RangeCaster('frange', 'FRange', 3904, 701)
+        r = caster.range(1, 2)
+        r.note = 'x'
+        self.assertEqual(r.note, 'x')
+
+
+class LazyRangeTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        curs = self.conn.cursor()
+        curs.execute("create type pg_temp.lfrange as range (subtype = float8)")
+        self.caster = register_range(
+            'pg_temp.lfrange', FRange, self.conn, lazy=True)
+
+    def fetch(self):
+        curs = self.conn.cursor()
+        curs.execute("select '[1,2)'::pg_temp.lfrange")
+        return curs, curs.fetchone()[0]
+
+    def test_lazy(self):
+        curs, r = self.fetch()
+        self.assertIsInstance(r, FRange)
+        self.assertIsNot(type(r), FRange)
+        self.assertEqual(type(r).__name__, 'FRange')
+        self.assertEqual((r.lower, r.upper), (1.0, 2.0))
+        self.assertEqual(r, FRange(1.0, 2.0))
+
+    def test_attributes(self):
+        curs, r = self.fetch()
+        r.note = 'x'
+        self.assertEqual(r.note, 'x')
+        self.assertRaises(AttributeError, getattr, r, 'nosuchattr')
+
+    def test_pickle(self):
+        curs, r = self.fetch()
+        r2 = pickle.loads(pickle.dumps(r))
+        self.assertIs(type(r2), FRange)
+        self.assertEqual(r2, FRange(1.0, 2.0))
+
+    def test_cursor_deleted(self):
+        curs, r = self.fetch()
+        del curs
+        self.assertEqual(r.lower, 1.0)
+
+    def test_connection_closed(self):
+        curs, r = self.fetch()
+        del curs
+        self.conn.close()
+        self.assertRaises(psycopg2.InterfaceError, getattr, r, 'lower')
+
+
+class LazyCompositeTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        curs = self.conn.cursor()
+        curs.execute("create type pg_temp.lcpt as (x int, y text)")
+        register_composite('pg_temp.lcpt', self.conn, lazy=True)
+
+    def fetch(self):
+        curs = self.conn.cursor()
+        curs.execute("select (1, 'a')::pg_temp.lcpt")
+        return curs, curs.fetchone()[0]
+
+    def test_lazy(self):
+        curs, c = self.fetch()
+        self.assertIsInstance(c, LazyComposite)
+        self.assertEqual(c.x, 1)
+        self.assertEqual(c[1], 'a')
+        self.assertEqual(list(c), [1, 'a'])
+        self.assertEqual(c, (1, 'a'))
+        self.assertEqual(hash(c), hash((1, 'a')))
+
+    def test_adapt(self):
+        curs, c = self.fetch()
+        curs.execute("select %s::pg_temp.lcpt = (1, 'a')::pg_temp.lcpt", (c,))
+        self.assertIs(curs.fetchone()[0], True)
+
+    def test_connection_closed(self):
+        curs, c = self.fetch()
+        del curs
+        self.conn.close()
+        self.assertRaises(psycopg2.InterfaceError, getattr, c, 'value')
+
+
+if __name__ == '__main__':
+    unittest.main()
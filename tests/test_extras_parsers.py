@@ -0,0 +1,38 @@
+import unittest
+
+import psycopg2
+from psycopg2.extras import CompositeCaster, HstoreAdapter
+
+
+class HstoreParseTestCase(unittest.TestCase):
+    def test_parse(self):
+        for s, d in [
+                ('', {}),
+                ('"a"=>"1", "b"=>NULL', {'a': '1', 'b': None}),
+                (r'"a\"b"=>"c\\d", "e"=>NULL', {'a"b': 'c\\d', 'e': None}),
+                (r'"a\\"=>"b"', {'a\\': 'b'})]:
+            self.assertEqual(HstoreAdapter.parse(s, None), d)
+            self.assertEqual(HstoreAdapter._parse_re(s), d)
+
+    def test_malformed_escaped(self):
+        for s in [r'"a\\"=>', r'"a\\"', r'"a\\"=>"b", ', r'"a\\"=>"b']:
+            self.assertIsNone(HstoreAdapter._parse_escaped(s), s)
+
+    def test_malformed_fallback(self):
+        # malformed input falls back to the regex parser and its error
+        self.assertRaises(
+            psycopg2.InterfaceError, HstoreAdapter.parse, r'"a\\"=>', None)
+
+
+class CompositeTokenizeTestCase(unittest.TestCase):
+    def test_tokenize(self):
+        for s, t in [
+                ('(1,,"a b")', ['1', None, 'a b']),
+                ('(,)', [None, None]),
+                ('("a""b","c\\\\d")', ['a"b', 'c\\d'])]:
+            self.assertEqual(CompositeCaster.tokenize(s), t)
+            self.assertEqual(CompositeCaster._tokenize_re(s), t)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+from psycopg2.extensions import cursor
+from psycopg2.extras import PreparingConnection, _prepare_statements
+
+from testutils import ConnectingTestCase
+
+
+class PrepareStatementsTestCase(unittest.TestCase):
+    def test_params(self):
+        self.assertEqual(
+            _prepare_statements("select %s, %s", 'p'),
+            ("PREPARE p AS select $1, $2", "EXECUTE p (%s, %s)"))
+        self.assertEqual(
+            _prepare_statements("select %(a)s, %(b)s, %(a)s", 'p'),
+            ("PREPARE p AS select $1, $2, $1", "EXECUTE p (%(a)s, %(b)s)"))
+
+    def test_no_params(self):
+        self.assertEqual(
+            _prepare_statements("select 1", 'p', False),
+            ("PREPARE p AS select 1", "EXECUTE p"))
+
+    def test_not_preparable(self):
+        self.assertIsNone(_prepare_statements("create table t ()", 'p'))
+        self.assertIsNone(_prepare_statements("select %s, %(a)s", 'p'))
+
+    def test_multiple_statements(self):
+        for query in [
+                "select 1; select 2",
+                "select 1;",
+                "insert into t values (%s); insert into t values (%s)"]:
+            self.assertIsNone(_prepare_statements(query, 'p'), query)
+            self.assertIsNone(_prepare_statements(query, 'p', False), query)
+
+    def test_semicolon_in_literals(self):
+        for query in [
+                "select ';'",
+                "select 'a'';'",
+                "select E'\\';'",
+                'select 1 as ";"',
+                "select $$;$$, $a$ ; $a$",
+                "select 1 -- ;\n",
+                "select /* ; */ 1"]:
+            self.assertIsNotNone(
+                _prepare_statements(query, 'p', False), query)
+
+
+class PreparingConnectionTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pconn = self.connect(connection_factory=PreparingConnection)
+        self.pconn.prepare_threshold = 3
+
+    def prepared(self):
+        """Return the names of the statements prepared in the session."""
+        curs = self.pconn.cursor(cursor_factory=cursor)
+        curs.execute("SELECT name FROM pg_prepared_statements ORDER BY name")
+        return [r[0] for r in curs.fetchall()]
+
+    def test_threshold(self):
+        curs = self.pconn.cursor()
+        for i in range(2):
+            curs.execute("select %s::int", (i,))
+            self.assertEqual(curs.fetchone(), (i,))
+        self.assertEqual(self.prepared(), [])
+
+        for i in range(2, 5):
+            curs.execute("select %s::int", (i,))
+            self.assertEqual(curs.fetchone(), (i,))
+        self.assertEqual(self.prepared(), ['_pg2_1'])
+        self.assertEqual(self.pconn.prepared_hits, 2)
+
+    def test_eviction(self):
+        self.pconn.prepare_threshold = 1
+        self.pconn.prepared_max = 2
+        curs = self.pconn.cursor()
+        for i in range(3):
+            curs.execute(f"select {i}")
+
+        # the least recently used statement was deallocated
+        self.assertEqual(self.prepared(), ['_pg2_2', '_pg2_3'])
+
+    def test_multiple_statements(self):
+        curs = self.pconn.cursor()
+        curs.execute("create temp table pt (id int)")
+        for i in range(4):
+            curs.execute("insert into pt values (1); insert into pt values (2)")
+        for i in range(4):
+            curs.execute(
+                "insert into pt values (%s); insert into pt values (%s)",
+                (3, 4))
+        curs.execute("select id, count(*) from pt group by id order by id")
+        self.assertEqual(curs.fetchall(), [(1, 4), (2, 4), (3, 4), (4, 4)])
+        self.assertEqual(self.prepared(), [])
+
+    def test_failed_execute(self):
+        curs = self.pconn.cursor()
+        curs.execute("create temp table pt (id int primary key)")
+        self.pconn.commit()
+        for i in range(2):
+            curs.execute("insert into pt values (%s)", (i,))
+        self.assertRaises(
+            self.pconn.IntegrityError,
+            curs.execute, "insert into pt values (%s)", (1,))
+        self.pconn.rollback()
+
+        # the statement prepared by the failed execution is released
+        self.pconn.cursor().execute("select 1")
+        self.assertEqual(self.prepared(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
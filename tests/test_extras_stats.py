@@ -0,0 +1,112 @@
+import unittest
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import (
+    QueryStats, StatsConnection, StatsCursor, _fingerprint)
+
+from testutils import ConnectingTestCase
+
+
+class FingerprintTestCase(unittest.TestCase):
+    def test_literals(self):
+        self.assertEqual(
+            _fingerprint("select  1,\n 'a''b', 2.5e3 from t where x = $1"),
+            "select ?, ... from t where x = ?")
+        self.assertEqual(
+            _fingerprint("select $tag$ a ' b $tag$, t1.c from t1"),
+            "select ?, t1.c from t1")
+
+    def test_placeholders(self):
+        self.assertEqual(
+            _fingerprint(b"select * from t where a = %s and b in (%(b)s)"),
+            "select * from t where a = ? and b in (?)")
+        self.assertEqual(
+            _fingerprint("insert into t values (%s, %s, %s)"),
+            "insert into t values (?, ...)")
+
+
+class QueryStatsTestCase(unittest.TestCase):
+    def test_record(self):
+        stats = QueryStats()
+        stats.record("select 1", 0.001, 1, 8)
+        stats.record("select  2", 0.003, 1, 9)
+        stats.record("select 'x'", 0.002, -1, 10, error=True)
+        stats.record("update t set a = 1", 0.010, 5, 18)
+
+        snap = stats.snapshot()
+        self.assertEqual([s['query'] for s in snap], [
+            "update t set a = ?", "select ?"])
+        s = snap[1]
+        self.assertEqual(
+            (s['calls'], s['errors'], s['rows'], s['bytes']), (3, 1, 2, 27))
+        self.assertAlmostEqual(s['total_time'], 0.006)
+        self.assertAlmostEqual(s['mean_time'], 0.002)
+        self.assertEqual((s['min_time'], s['max_time']), (0.001, 0.003))
+
+    def test_percentiles(self):
+        stats = QueryStats()
+        for i in range(1, 101):
+            stats.record("select 1", i / 1000)
+        s = stats.snapshot()[0]
+        # estimated from the histogram buckets, within their resolution
+        self.assertAlmostEqual(s['p50'], 0.050, delta=0.010)
+        self.assertAlmostEqual(s['p95'], 0.095, delta=0.020)
+        self.assertLessEqual(s['p99'], s['max_time'])
+        self.assertLessEqual(s['p50'], s['p95'])
+
+    def test_reset(self):
+        stats = QueryStats()
+        stats.record("select 1", 0.001)
+        self.assertEqual(len(stats.snapshot(reset=True)), 1)
+        self.assertEqual(stats.snapshot(), [])
+        stats.record("select 1", 0.001)
+        stats.reset()
+        self.assertEqual(stats.snapshot(), [])
+
+    def test_snapshot_copy(self):
+        stats = QueryStats()
+        stats.record("select 1", 0.001)
+        snap = stats.snapshot()
+        stats.record("select 1", 0.001)
+        self.assertEqual(snap[0]['calls'], 1)
+
+
+class StatsConnectionTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stats = QueryStats()
+        self.sconn = self.connect(connection_factory=StatsConnection)
+        self.sconn.initialize(self.stats)
+
+    def test_execute(self):
+        curs = self.sconn.cursor()
+        self.assertIsInstance(curs, StatsCursor)
+        for i in range(3):
+            curs.execute("select generate_series(1, %s)", (i,))
+        s = self.stats.snapshot()[0]
+        self.assertEqual(s['query'], "select generate_series(?, ...)")
+        self.assertEqual((s['calls'], s['rows'], s['errors']), (3, 3, 0))
+        self.assertGreater(s['bytes'], 0)
+
+    def test_error(self):
+        curs = self.sconn.cursor()
+        self.assertRaises(
+            psycopg2.ProgrammingError, curs.execute, "select nosuchcol")
+        s = self.stats.snapshot()[0]
+        self.assertEqual((s['calls'], s['errors']), (1, 1))
+
+    def test_composable(self):
+        curs = self.sconn.cursor()
+        curs.execute(sql.SQL("select {}").format(sql.Literal(42)))
+        self.assertEqual(self.stats.snapshot()[0]['query'], "select ?")
+
+    def test_callproc(self):
+        curs = self.sconn.cursor()
+        curs.callproc('abs', (-1,))
+        self.assertEqual(curs.fetchone(), (1,))
+        self.assertEqual(self.stats.snapshot()[0]['query'], 'abs')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+import psycopg2
+from psycopg2.extras import (
+    TypeCache, register_composite, register_json, register_range)
+
+from testutils import ConnectingTestCase
+
+
+class TypeCacheTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conn.autocommit = True
+        curs = self.conn.cursor()
+        curs.execute("DROP SCHEMA IF EXISTS tc_schema CASCADE")
+        curs.execute("CREATE SCHEMA tc_schema")
+        curs.execute("CREATE TYPE tc_schema.pt AS (x int, y int)")
+        curs.execute(
+            "CREATE TYPE tc_schema.frange AS RANGE (subtype = float8)")
+        self.cache = TypeCache()
+
+    def tearDown(self):
+        self.conn.cursor().execute("DROP SCHEMA tc_schema CASCADE")
+        super().tearDown()
+
+    def test_shared(self):
+        conn1 = self.connect()
+        caster1 = register_composite(
+            'tc_schema.pt', conn1, type_cache=self.cache)
+        conn2 = self.connect()
+        caster2 = register_composite(
+            'tc_schema.pt', conn2, type_cache=self.cache)
+        self.assertEqual(caster1.oid, caster2.oid)
+        self.assertEqual(caster2.attnames, ['x', 'y'])
+
+        curs = conn2.cursor()
+        curs.execute("SELECT (1, 2)::tc_schema.pt")
+        self.assertEqual(curs.fetchone()[0], (1, 2))
+
+    def test_not_global(self):
+        conn = self.connect()
+        register_composite('tc_schema.pt', conn, type_cache=self.cache)
+        self.assertEqual(self.cache._names, {'tc_schema.pt'})
+
+        # the registering functions use the cache only if passed one
+        register_range('tc_schema.frange', 'FRange', conn)
+        self.assertEqual(self.cache._names, {'tc_schema.pt'})
+
+    def test_recreated(self):
+        conn = self.connect()
+        register_composite('tc_schema.pt', conn, type_cache=self.cache)
+        curs = self.conn.cursor()
+        curs.execute("DROP TYPE tc_schema.pt")
+        curs.execute("CREATE TYPE tc_schema.pt AS (x int, y int, z int)")
+
+        # a new connection sees the type created again
+        conn = self.connect()
+        caster = register_composite(
+            'tc_schema.pt', conn, type_cache=self.cache)
+        self.assertEqual(caster.attnames, ['x', 'y', 'z'])
+        curs = conn.cursor()
+        curs.execute("SELECT (1, 2, 3)::tc_schema.pt")
+        self.assertEqual(curs.fetchone()[0], (1, 2, 3))
+
+    def test_search_path(self):
+        conn = self.connect()
+        conn.cursor().execute("SET search_path TO tc_schema, public")
+        caster = register_composite('pt', conn, type_cache=self.cache)
+        self.assertEqual(caster.schema, 'tc_schema')
+
+        # a connection with a different search_path doesn't find the type
+        # in the cache, as without it
+        conn = self.connect()
+        self.assertRaises(
+            psycopg2.ProgrammingError,
+            register_composite, 'pt', conn, type_cache=self.cache)
+
+    def test_range(self):
+        conn = self.connect()
+        caster = register_range(
+            'tc_schema.frange', 'FRange', conn, type_cache=self.cache)
+        curs = conn.cursor()
+        curs.execute("SELECT '[1,2)'::tc_schema.frange")
+        r = curs.fetchone()[0]
+        self.assertIsInstance(r, caster.range)
+        self.assertEqual((r.lower, r.upper), (1.0, 2.0))
+
+    def test_json(self):
+        conn = self.connect()
+        register_json(conn, type_cache=self.cache)
+        self.assertEqual(self.cache.lookup(conn, 'json')[0].oid, 114)
+
+    def test_missing_forgotten(self):
+        conn = self.connect()
+        self.assertIsNone(self.cache.lookup(conn, 'tc_schema.nosuchtype'))
+        self.assertRaises(
+            psycopg2.ProgrammingError,
+            register_composite, 'tc_schema.nosuchtype', conn,
+            type_cache=self.cache)
+        self.assertEqual(self.cache._names, set())
+
+        # a wrong name doesn't spoil the lookups on new connections
+        self.cache.prefetch(conn, ['"bad', 'tc_schema.pt'])
+        conn = self.connect()
+        self.assertIsNotNone(self.cache.lookup(conn, 'tc_schema.pt'))
+        self.assertEqual(self.cache._names, {'tc_schema.pt'})
+
+    def test_transaction_status(self):
+        conn = self.connect()
+        register_composite('tc_schema.pt', conn, type_cache=self.cache)
+        self.assertEqual(
+            conn.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+
+if __name__ == '__main__':
+    unittest.main()
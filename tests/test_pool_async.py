@@ -0,0 +1,122 @@
+import asyncio
+import time
+import unittest
+
+from psycopg2.pool import AsyncConnectionPool, PoolError
+
+from testutils import ConnectingTestCase, dsn
+
+
+class AsyncConnectionPoolTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        # skip if the database is not available
+        self.conn
+
+    def run_pool(self, coro, minconn=1, maxconn=2, **kwargs):
+        """Run 'coro(pool)' on a new open pool, closed at the end."""
+        async def main():
+            pool = AsyncConnectionPool(minconn, maxconn, dsn, **kwargs)
+            await pool.open()
+            try:
+                return await coro(pool)
+            finally:
+                if not pool.closed:
+                    pool.closeall()
+
+        return asyncio.run(main())
+
+    def test_open(self):
+        async def test(pool):
+            return pool.stats()
+
+        stats = self.run_pool(test, minconn=2, maxconn=3)
+        self.assertEqual((stats['idle'], stats['connects']), (2, 2))
+
+    def test_queries(self):
+        async def test(pool):
+            await pool.execute("select 1")
+            one = await pool.fetchone("select %s::int", (1,))
+            rows = await pool.fetchall("select generate_series(1, 3)")
+            return one, rows
+
+        self.assertEqual(self.run_pool(test), ((1,), [(1,), (2,), (3,)]))
+
+    def test_concurrent(self):
+        async def test(pool):
+            start = time.monotonic()
+            await asyncio.gather(
+                *[pool.execute("select pg_sleep(0.3)") for i in range(3)])
+            return time.monotonic() - start
+
+        self.assertLess(self.run_pool(test, maxconn=3), 0.8)
+
+    def test_wait(self):
+        async def test(pool):
+            async def query():
+                return await pool.fetchone("select pg_backend_pid()")
+
+            pids = await asyncio.gather(*[query() for i in range(4)])
+            return len(set(pids)), pool.stats()
+
+        npids, stats = self.run_pool(test, minconn=0, maxconn=1)
+        self.assertEqual(npids, 1)
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['waits'], 3)
+
+    def test_timeout(self):
+        async def test(pool):
+            conn = await pool.getconn()
+            with self.assertRaises(PoolError):
+                await pool.getconn(timeout=0.1)
+            self.assertEqual(pool.stats()['timeouts'], 1)
+
+            # the connection returned goes to the next waiter
+            async def put_later():
+                await asyncio.sleep(0.1)
+                pool.putconn(conn)
+
+            task = asyncio.create_task(put_later())
+            self.assertIs(await pool.getconn(timeout=5), conn)
+            await task
+
+        self.run_pool(test, maxconn=1)
+
+    def test_cancel_executing(self):
+        async def test(pool):
+            task = asyncio.create_task(pool.execute("select pg_sleep(10)"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            # the connection busy in the query was not put back
+            stats = pool.stats()
+            self.assertEqual((stats['in_use'], stats['idle']), (0, 0))
+            return await pool.fetchone("select 1")
+
+        self.assertEqual(self.run_pool(test, minconn=1, maxconn=1), (1,))
+
+    def test_closeall(self):
+        async def test(pool):
+            conn = await pool.getconn()
+            waiter = asyncio.create_task(pool.getconn())
+            await asyncio.sleep(0.05)
+            pool.closeall()
+            self.assertTrue(conn.closed)
+            with self.assertRaises(PoolError):
+                await waiter
+            with self.assertRaises(PoolError):
+                await pool.getconn()
+
+        self.run_pool(test, maxconn=1)
+
+    def test_foreign_connection(self):
+        async def test(pool):
+            self.assertRaises(PoolError, pool.putconn, self.conn)
+
+        self.run_pool(test)
+
+
+if __name__ == '__main__':
+    unittest.main()
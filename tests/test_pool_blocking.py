@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+
+from psycopg2.pool import BlockingConnectionPool, PoolError
+
+from testutils import ConnectingTestCase, dsn
+
+
+class BlockingConnectionPoolTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        # skip if the database is not available
+        self.conn
+        self.pool = BlockingConnectionPool(0, 1, dsn, timeout=5)
+
+    def tearDown(self):
+        if not self.pool.closed:
+            self.pool.closeall()
+        super().tearDown()
+
+    def getconn_later(self, results, tag=None, **kwargs):
+        """Call getconn() in a thread, appending (tag, outcome) to 'results'.
+
+        Return the thread once it is waiting for a connection.
+        """
+        def target():
+            try:
+                results.append((tag, self.pool.getconn(**kwargs)))
+            except PoolError as e:
+                results.append((tag, e))
+
+        waiting = self.pool.wait_stats()['waiting']
+        thread = threading.Thread(target=target)
+        thread.start()
+        while self.pool.wait_stats()['waiting'] == waiting:
+            time.sleep(0.01)
+        return thread
+
+    def test_timeout(self):
+        self.pool.getconn()
+        start = time.monotonic()
+        self.assertRaises(PoolError, self.pool.getconn, timeout=0.2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+        stats = self.pool.wait_stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['waiting'], 0)
+
+    def test_wait(self):
+        conn = self.pool.getconn()
+        results = []
+        thread = self.getconn_later(results)
+        self.pool.putconn(conn)
+        thread.join()
+        self.assertIs(results[0][1], conn)
+
+    def test_fifo(self):
+        conn = self.pool.getconn()
+        results = []
+        threads = [self.getconn_later(results, i) for i in range(3)]
+        for thread in threads:
+            self.pool.putconn(conn)
+            thread.join()
+            conn = results[-1][1]
+
+        self.assertEqual([tag for tag, conn in results], [0, 1, 2])
+
+    def test_closeall(self):
+        self.pool.getconn()
+        results = []
+        thread = self.getconn_later(results)
+        self.pool.closeall()
+        thread.join()
+        self.assertIsInstance(results[0][1], PoolError)
+        self.assertRaises(PoolError, self.pool.getconn)
+
+    def test_same_key(self):
+        conn = self.pool.getconn('k')
+        self.assertIs(self.pool.getconn('k'), conn)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import time
+import unittest
+
+from psycopg2.pool import SimpleConnectionPool, ThreadedConnectionPool
+
+from testutils import ConnectingTestCase, dsn
+
+
+class PoolHealthTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        # skip if the database is not available
+        self.conn
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            if not pool.closed:
+                pool.closeall()
+        super().tearDown()
+
+    def pool(self, cls=SimpleConnectionPool, minconn=1, maxconn=2, **kwargs):
+        pool = cls(minconn, maxconn, dsn, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def terminate(self, conn):
+        """Kill the backend of 'conn' from the server side."""
+        curs = self.conn.cursor()
+        curs.execute(
+            "select pg_terminate_backend(%s)", (conn.info.backend_pid,))
+        self.conn.commit()
+
+    def test_max_lifetime(self):
+        pool = self.pool(max_lifetime=0.2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        pool.putconn(conn)
+
+        time.sleep(0.3)
+        conn2 = pool.getconn()
+        self.assertIsNot(conn2, conn)
+        self.assertTrue(conn.closed)
+
+        # an expired connection is closed when put back too
+        time.sleep(0.3)
+        pool.putconn(conn2)
+        self.assertTrue(conn2.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_max_idle(self):
+        pool = self.pool(max_idle=0.2)
+        conn = pool.getconn()
+        time.sleep(0.3)
+        # the time in use doesn't count
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        pool.putconn(conn)
+
+        time.sleep(0.3)
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertTrue(conn.closed)
+
+    def test_pre_ping(self):
+        pool = self.pool(pre_ping=True)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.terminate(conn)
+
+        conn2 = pool.getconn()
+        self.assertIsNot(conn2, conn)
+        curs = conn2.cursor()
+        curs.execute("select 1")
+        self.assertEqual(curs.fetchone(), (1,))
+
+    def test_pre_ping_keeps_state(self):
+        pool = self.pool(pre_ping=True)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        self.assertFalse(conn.autocommit)
+
+    def test_no_pre_ping(self):
+        pool = self.pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.terminate(conn)
+        self.assertIs(pool.getconn(), conn)
+
+    def test_reaper(self):
+        pool = self.pool(
+            ThreadedConnectionPool, 2, 4, max_lifetime=0.3,
+            reap_interval=0.1)
+        conns = [pool.getconn() for i in range(2)]
+        for conn in conns:
+            pool.putconn(conn)
+
+        deadline = time.monotonic() + 5
+        while not all(conn.closed for conn in conns):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+        # the reaper replaced them
+        while pool.stats()['idle'] < 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertGreaterEqual(pool.stats()['discarded'], 2)
+
+    def test_reap_interval(self):
+        pool = self.pool(ThreadedConnectionPool, max_idle=10)
+        self.assertEqual(pool.reap_interval, 5)
+        pool = self.pool(ThreadedConnectionPool)
+        self.assertEqual(pool.reap_interval, 0)
+        self.assertIsNone(pool._reaper)
+
+
+if __name__ == '__main__':
+    unittest.main()
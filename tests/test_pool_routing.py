@@ -0,0 +1,139 @@
+import time
+import unittest
+
+from psycopg2.pool import (
+    BlockingConnectionPool, PoolError, RoutingPool, ThreadedConnectionPool)
+
+from testutils import ConnectingTestCase, dsn
+
+
+class RoutingPoolTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        # skip if the database is not available
+        self.conn
+        self.pools = []
+
+    def tearDown(self):
+        # the routers first: they close their pools too
+        for pool in reversed(self.pools):
+            if not pool.closed:
+                pool.closeall()
+        super().tearDown()
+
+    def pool(self, cls=ThreadedConnectionPool, maxconn=2, dsn=dsn, **kwargs):
+        pool = cls(0, maxconn, dsn, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def router(self, nreplicas=2, **kwargs):
+        router = RoutingPool(
+            self.pool(), [self.pool() for i in range(nreplicas)], **kwargs)
+        self.pools.append(router)
+        return router
+
+    def owner(self, router, conn):
+        """Return the index of the replica 'conn' is from, -1 if primary."""
+        pool = router._used[id(conn)][0]
+        if pool is router.primary:
+            return -1
+        return router.replicas.index(pool)
+
+    def test_round_robin(self):
+        router = self.router()
+        conns = [router.getconn(readonly=True) for i in range(4)]
+        self.assertEqual([self.owner(router, c) for c in conns], [0, 1, 0, 1])
+        conn = router.getconn()
+        self.assertEqual(self.owner(router, conn), -1)
+        for c in conns + [conn]:
+            router.putconn(c)
+        self.assertEqual(router.stats()['primary']['in_use'], 0)
+
+    def test_least_used(self):
+        router = self.router(strategy='least_used')
+        c1 = router.getconn(readonly=True)
+        c2 = router.getconn(readonly=True)
+        owner1 = self.owner(router, c1)
+        self.assertNotEqual(owner1, self.owner(router, c2))
+        router.putconn(c1)
+        c3 = router.getconn(readonly=True)
+        self.assertEqual(self.owner(router, c3), owner1)
+
+    def test_unknown_strategy(self):
+        self.assertRaises(ValueError, RoutingPool, None, strategy='random')
+
+    def test_no_replicas(self):
+        router = self.router(0)
+        conn = router.getconn(readonly=True)
+        self.assertEqual(self.owner(router, conn), -1)
+
+    def test_exhausted_replicas(self):
+        router = RoutingPool(self.pool(), [
+            self.pool(BlockingConnectionPool, maxconn=1, timeout=10)])
+        self.pools.append(router)
+        c1 = router.getconn(readonly=True)
+        start = time.monotonic()
+        c2 = router.getconn(readonly=True)
+        # not waiting for the replica
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(
+            (self.owner(router, c1), self.owner(router, c2)), (0, -1))
+
+    def test_sticky(self):
+        router = self.router(sticky=0.3)
+        conn = router.getconn(session='u1')
+        router.putconn(conn)
+
+        conn = router.getconn(readonly=True, session='u1')
+        self.assertEqual(self.owner(router, conn), -1)
+        conn = router.getconn(readonly=True, session='u2')
+        self.assertNotEqual(self.owner(router, conn), -1)
+
+        time.sleep(0.4)
+        conn = router.getconn(readonly=True, session='u1')
+        self.assertNotEqual(self.owner(router, conn), -1)
+
+    def test_replica_down(self):
+        bad = dsn + ' dbname=psycopg2_test_nosuchdb'
+        spare = self.pool()
+        router = RoutingPool(
+            self.pool(), [self.pool(dsn=bad), self.pool()],
+            retry_interval=0.3)
+        self.pools.append(router)
+
+        owners = [self.owner(router, router.getconn(readonly=True))
+            for i in range(2)]
+        self.assertEqual(owners, [1, 1])
+        self.assertEqual(
+            [r['down'] for r in router.stats()['replicas']], [True, False])
+        self.assertEqual(router.check_replicas(), [router.replicas[1]])
+
+        # retried after the interval, and found working
+        router.replicas[0] = spare
+        time.sleep(0.4)
+        owners = [self.owner(router, router.getconn(readonly=True))
+            for i in range(2)]
+        self.assertIn(0, owners)
+        self.assertFalse(router.stats()['replicas'][0]['down'])
+
+    def test_broken_connection(self):
+        router = self.router(1)
+        conn = router.getconn(readonly=True)
+        conn.close()
+        router.putconn(conn)
+        self.assertTrue(router.stats()['replicas'][0]['down'])
+
+    def test_foreign_connection(self):
+        router = self.router()
+        self.assertRaises(PoolError, router.putconn, self.conn)
+
+    def test_closeall(self):
+        router = self.router()
+        conn = router.getconn(readonly=True)
+        router.closeall()
+        self.assertTrue(conn.closed)
+        self.assertRaises(PoolError, router.getconn)
+
+
+if __name__ == '__main__':
+    unittest.main()
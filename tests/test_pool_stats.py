@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+
+import psycopg2
+from psycopg2.pool import (
+    AsyncConnectionPool, BlockingConnectionPool, PoolError, PoolListener,
+    SimpleConnectionPool, ThreadedConnectionPool)
+
+from testutils import ConnectingTestCase, dsn
+
+
+class RecordingListener(PoolListener):
+    def __init__(self):
+        self.events = []
+
+    def on_connect(self, pool, conn, duration):
+        self.events.append('connect')
+
+    def on_checkout(self, pool, conn, wait):
+        self.events.append('checkout')
+
+    def on_checkin(self, pool, conn, held):
+        self.events.append('checkin')
+
+    def on_close(self, pool, conn, age):
+        self.events.append('close')
+
+    def on_error(self, pool, error):
+        self.events.append(type(error).__name__)
+
+
+class BrokenListener(PoolListener):
+    def on_checkout(self, pool, conn, wait):
+        1 / 0
+
+
+class PoolStatsTestCase(ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        # skip if the database is not available
+        self.conn
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            if not pool.closed:
+                pool.closeall()
+        super().tearDown()
+
+    def pool(self, cls=SimpleConnectionPool, minconn=1, maxconn=2, **kwargs):
+        pool = cls(minconn, maxconn, dsn, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def test_stats(self):
+        pool = self.pool()
+        conns = [pool.getconn() for i in range(2)]
+        stats = pool.stats()
+        self.assertEqual((stats['in_use'], stats['idle']), (2, 0))
+        self.assertEqual((stats['checkouts'], stats['connects']), (2, 2))
+        self.assertRaises(PoolError, pool.getconn)
+
+        pool.putconn(conns[0])
+        pool.putconn(conns[1])
+        stats = pool.stats()
+        self.assertEqual((stats['in_use'], stats['idle']), (0, 1))
+        self.assertEqual(stats['checkins'], 2)
+        self.assertEqual(stats['discarded'], 1)
+        self.assertEqual((stats['errors'], stats['exhausted']), (1, 1))
+        self.assertEqual(sum(n for t, n in stats['acquire_histogram']), 2)
+        self.assertEqual(stats['acquire_histogram'][-1][0], float('inf'))
+        self.assertGreater(stats['max_age'], 0)
+        self.assertGreater(stats['checkout_rate'], 0)
+        self.assertGreaterEqual(stats['hold_time'], 0)
+
+    def test_threaded_stats(self):
+        pool = self.pool(ThreadedConnectionPool)
+        pool.putconn(pool.getconn())
+        self.assertEqual(pool.stats()['checkouts'], 1)
+
+        pool = self.pool(BlockingConnectionPool, timeout=0.01)
+        pool.getconn()
+        pool.getconn()
+        self.assertRaises(PoolError, pool.getconn)
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts']), (1, 1))
+        self.assertEqual(stats['errors'], 1)
+
+    def test_listener(self):
+        listener = RecordingListener()
+        pool = self.pool(listeners=[listener])
+        conn = pool.getconn()
+        pool.putconn(conn, close=True)
+        self.assertEqual(
+            listener.events, ['connect', 'checkout', 'checkin', 'close'])
+
+        pool.remove_listener(listener)
+        pool.putconn(pool.getconn())
+        self.assertEqual(len(listener.events), 4)
+
+    def test_connection_error(self):
+        listener = RecordingListener()
+        pool = self.pool(minconn=0)
+        pool._kwargs['dbname'] = 'psycopg2_test_nosuchdb'
+        pool.add_listener(listener)
+        self.assertRaises(psycopg2.OperationalError, pool.getconn)
+        self.assertEqual(listener.events, ['OperationalError'])
+        self.assertEqual(pool.stats()['errors'], 1)
+
+    def test_broken_listener(self):
+        pool = self.pool(listeners=[BrokenListener()])
+        conn = pool.getconn()
+        self.assertFalse(conn.closed)
+        self.assertEqual(pool.stats()['checkouts'], 1)
+
+    def test_async(self):
+        listener = RecordingListener()
+
+        async def main():
+            pool = AsyncConnectionPool(
+                1, 1, dsn, timeout=0.01, listeners=[listener])
+            await pool.open()
+            try:
+                conn = await pool.getconn()
+                with self.assertRaises(PoolError):
+                    await pool.getconn()
+                pool.putconn(conn)
+                return pool.stats()
+            finally:
+                pool.closeall()
+
+        stats = asyncio.run(main())
+        self.assertEqual(
+            listener.events,
+            ['connect', 'checkout', 'PoolError', 'checkin'])
+        self.assertEqual((stats['idle'], stats['checkouts']), (1, 1))
+        self.assertEqual((stats['timeouts'], stats['errors']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import contextlib
+import io
+import socket
+import threading
+import time
+import unittest
+
+from werkzeug.serving import (
+    EventLoopWSGIServer, WSGIRequestHandler, make_server)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log(self, type, message, *args):
+        pass
+
+
+def echo_app(environ, start_response):
+    if environ['PATH_INFO'] == '/big':
+        start_response('200 OK', [])
+        return (b'x' * 65536 for i in range(1024))
+
+    body = environ['wsgi.input'].read()
+    start_response('200 OK', [('Content-Length', str(len(body)))])
+    return [body]
+
+
+class EventLoopServerTestCase(unittest.TestCase):
+    def start(self, app=echo_app, **kwargs):
+        """Start a server in a thread, stopped at the end of the test."""
+        kwargs.setdefault('keep_alive_timeout', 5)
+        srv = EventLoopWSGIServer(
+            '127.0.0.1', 0, app, handler=QuietHandler, **kwargs)
+        thread = threading.Thread(target=srv.serve_forever)
+        thread.start()
+
+        def stop():
+            srv.shutdown()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+        self.addCleanup(stop)
+        return srv
+
+    def connect(self, srv, timeout=5):
+        sock = socket.create_connection(('127.0.0.1', srv.server_port))
+        sock.settimeout(timeout)
+        self.addCleanup(sock.close)
+        return sock
+
+    def read_all(self, sock):
+        data = b''
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        except socket.timeout:
+            pass
+        return data
+
+    def request(self, srv, data):
+        sock = self.connect(srv, timeout=2)
+        sock.sendall(data)
+        return self.read_all(sock)
+
+    def test_keep_alive(self):
+        srv = self.start()
+        sock = self.connect(srv)
+        for body in [b'abc', b'defgh']:
+            sock.sendall(
+                b'POST / HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s'
+                % (len(body), body))
+            resp = b''
+            while not resp.endswith(body):
+                resp += sock.recv(65536)
+            self.assertTrue(resp.startswith(b'HTTP/1.1 200 OK'), resp)
+            self.assertTrue(resp.endswith(b'\r\n\r\n' + body), resp)
+
+    def test_chunked_request(self):
+        srv = self.start()
+        resp = self.request(
+            srv,
+            b'POST / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n'
+            b'Connection: close\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n')
+        self.assertTrue(resp.startswith(b'HTTP/1.1 200 OK'), resp)
+        self.assertTrue(resp.endswith(b'\r\n\r\nabcde'), resp)
+
+    def test_ambiguous_framing(self):
+        srv = self.start()
+        for headers in [
+                b'Content-Length: 3\r\nContent-Length: 5\r\n',
+                b'Content-Length: 3\r\nTransfer-Encoding: chunked\r\n',
+                b'Transfer-Encoding: gzip, chunked\r\n',
+                b'Content-Length: +3\r\n']:
+            resp = self.request(
+                srv,
+                b'POST / HTTP/1.1\r\nHost: x\r\n%s\r\n3\r\nabc\r\n0\r\n\r\n'
+                % headers)
+            self.assertTrue(
+                resp.startswith(b'HTTP/1.1 400 Bad Request'), (headers, resp))
+
+    def test_same_content_length(self):
+        srv = self.start()
+        resp = self.request(
+            srv,
+            b'POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 3\r\n'
+            b'Content-Length: 3\r\nConnection: close\r\n\r\nabc')
+        self.assertTrue(resp.startswith(b'HTTP/1.1 200 OK'), resp)
+
+    def test_single_continue(self):
+        srv = self.start()
+        sock = self.connect(srv, timeout=2)
+        sock.sendall(
+            b'POST / HTTP/1.1\r\nHost: x\r\nExpect: 100-continue\r\n'
+            b'Content-Length: 3\r\nConnection: close\r\n\r\n')
+        self.assertEqual(sock.recv(65536), b'HTTP/1.1 100 Continue\r\n\r\n')
+        sock.sendall(b'abc')
+        resp = self.read_all(sock)
+        self.assertTrue(resp.startswith(b'HTTP/1.1 200 OK'), resp)
+        self.assertNotIn(b'100 Continue', resp)
+
+    def test_request_timeout(self):
+        srv = self.start(request_timeout=1)
+        sock = self.connect(srv)
+        sock.sendall(b'GET / HTTP/1.1\r\n')
+        start = time.monotonic()
+
+        # sending a header line now and then doesn't extend the deadline
+        with self.assertRaises(OSError):
+            for i in range(20):
+                sock.sendall(b'X-A: b\r\n')
+                time.sleep(0.25)
+        self.assertLess(time.monotonic() - start, 4)
+
+    def test_send_timeout(self):
+        srv = self.start(threads=1, send_timeout=1)
+        slow = self.connect(srv)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        slow.sendall(b'GET /big HTTP/1.1\r\nHost: x\r\n\r\n')
+        time.sleep(0.5)
+
+        # the only worker is freed when the slow client times out
+        start = time.monotonic()
+        resp = self.request(
+            srv, b'POST / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n'
+            b'Content-Length: 2\r\n\r\nok')
+        self.assertTrue(resp.endswith(b'\r\n\r\nok'), resp[:100])
+        self.assertLess(time.monotonic() - start, 5)
+
+        # and its connection is closed
+        for i in range(30):
+            if not srv._conns:
+                break
+            time.sleep(0.1)
+        self.assertEqual(srv._conns, {})
+
+    def test_fd(self):
+        sock = socket.socket()
+        self.addCleanup(sock.close)
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        srv = make_server(
+            '127.0.0.1', sock.getsockname()[1], echo_app, event_loop=True,
+            fd=sock.fileno())
+        self.assertIsInstance(srv, EventLoopWSGIServer)
+        srv.server_close()
+
+    def test_port_in_use(self):
+        sock = socket.socket()
+        self.addCleanup(sock.close)
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            self.assertRaises(
+                SystemExit, EventLoopWSGIServer, '127.0.0.1',
+                sock.getsockname()[1], echo_app)
+        self.assertIn('is in use', err.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
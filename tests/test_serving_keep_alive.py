@@ -0,0 +1,143 @@
+import io
+import socket
+import threading
+import unittest
+
+from werkzeug.serving import (
+    BaseWSGIServer, ThreadedWSGIServer, WSGIRequestHandler)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log(self, type, message, *args):
+        pass
+
+
+def app(environ, start_response):
+    path = environ['PATH_INFO']
+    if path == '/replace':
+        # the application replaces the input without reading the body
+        environ['wsgi.input'] = io.BytesIO(b'')
+        body = b'replaced'
+    elif path == '/close':
+        start_response('200 OK', [('Connection', 'close')])
+        return [b'closing']
+    elif path == '/nocontent':
+        start_response('204 No Content', [])
+        return [b'ignored']
+    elif path == '/stream':
+        start_response('200 OK', [])
+        return [b'ab', b'cd']
+    else:
+        body = environ['wsgi.input'].read(
+            int(environ.get('CONTENT_LENGTH') or 0))
+    start_response('200 OK', [('Content-Length', str(len(body)))])
+    return [body]
+
+
+class KeepAliveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.srv = ThreadedWSGIServer(
+            '127.0.0.1', 0, app, QuietHandler, keep_alive_timeout=5)
+        self.thread = threading.Thread(target=self.srv.serve_forever)
+        self.thread.start()
+        self.sock = socket.create_connection(
+            ('127.0.0.1', self.srv.server_port))
+        self.sock.settimeout(5)
+        self.rfile = self.sock.makefile('rb')
+
+    def tearDown(self):
+        self.rfile.close()
+        self.sock.close()
+        self.srv.shutdown()
+        self.thread.join()
+        self.srv.server_close()
+
+    def request(self, method='GET', path='/', body=b'', headers=()):
+        data = f'{method} {path} HTTP/1.1\r\nHost: x\r\n'.encode()
+        if body:
+            data += b'Content-Length: %d\r\n' % len(body)
+        for header in headers:
+            data += header.encode() + b'\r\n'
+        self.sock.sendall(data + b'\r\n' + body)
+
+    def response(self, method='GET'):
+        """Read a response, return the status, headers and body."""
+        status = self.rfile.readline().split(None, 2)[1]
+        headers = {}
+        while True:
+            line = self.rfile.readline().strip()
+            if not line:
+                break
+            key, value = line.decode().split(':', 1)
+            headers[key.lower()] = value.strip()
+
+        body = b''
+        if method == 'HEAD' or status in (b'204', b'304'):
+            pass
+        elif 'content-length' in headers:
+            body = self.rfile.read(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int(self.rfile.readline(), 16)
+                chunk = self.rfile.read(size + 2)[:-2]
+                if not size:
+                    break
+                body += chunk
+        else:
+            body = self.rfile.read()
+        return int(status), headers, body
+
+    def test_keep_alive(self):
+        for body in [b'abc', b'', b'defgh']:
+            self.request('POST', body=body)
+            status, headers, rbody = self.response()
+            self.assertEqual((status, rbody), (200, body))
+            self.assertNotEqual(headers.get('connection'), 'close')
+
+    def test_chunked_response(self):
+        self.request(path='/stream')
+        status, headers, body = self.response()
+        self.assertEqual(headers['transfer-encoding'], 'chunked')
+        self.assertEqual(body, b'abcd')
+        self.request('POST', body=b'next')
+        self.assertEqual(self.response()[2], b'next')
+
+    def test_replaced_input(self):
+        # the unread body is drained from the handler's own stream
+        self.request('POST', '/replace', body=b'unread\r\n' * 100)
+        self.assertEqual(self.response()[2], b'replaced')
+        self.request('POST', body=b'next')
+        self.assertEqual(self.response()[:3:2], (200, b'next'))
+
+    def test_no_body(self):
+        self.request('HEAD', body=b'abc')
+        status, headers, body = self.response('HEAD')
+        self.assertEqual(headers['content-length'], '3')
+        self.request(path='/nocontent')
+        self.assertEqual(self.response()[0], 204)
+        self.request('POST', body=b'next')
+        self.assertEqual(self.response()[2], b'next')
+
+    def test_app_close(self):
+        self.request(path='/close')
+        status, headers, body = self.response()
+        self.assertEqual(headers['connection'], 'close')
+        self.assertEqual(body, b'closing')
+        self.assertEqual(self.rfile.read(), b'')
+
+    def test_client_close(self):
+        self.request('POST', body=b'abc', headers=['Connection: close'])
+        status, headers, body = self.response()
+        self.assertEqual(headers['connection'], 'close')
+        self.assertEqual(self.rfile.read(), b'')
+
+
+class SingleThreadedTestCase(unittest.TestCase):
+    def test_refused(self):
+        self.assertRaises(
+            ValueError, BaseWSGIServer, '127.0.0.1', 0, app,
+            keep_alive_timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
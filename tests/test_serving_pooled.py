@@ -0,0 +1,126 @@
+import socket
+import threading
+import time
+import unittest
+
+from werkzeug.serving import (
+    PooledWSGIServer, ThreadedWSGIServer, WSGIRequestHandler, make_server)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log(self, type, message, *args):
+        pass
+
+
+class PooledServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def app(self, environ, start_response):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            self.release.wait(5)
+        finally:
+            with self.lock:
+                self.running -= 1
+        start_response('200 OK', [('Content-Length', '2')])
+        return [b'ok']
+
+    def start(self, **kwargs):
+        srv = PooledWSGIServer(
+            '127.0.0.1', 0, self.app, handler=QuietHandler, **kwargs)
+        thread = threading.Thread(target=srv.serve_forever)
+        thread.start()
+
+        def stop():
+            self.release.set()
+            srv.shutdown()
+            thread.join(5)
+            srv.server_close()
+
+        self.addCleanup(stop)
+        return srv
+
+    def request(self, srv):
+        sock = socket.create_connection(('127.0.0.1', srv.server_port))
+        sock.settimeout(5)
+        self.addCleanup(sock.close)
+        sock.sendall(b'GET / HTTP/1.0\r\nHost: x\r\n\r\n')
+        return sock
+
+    def response(self, sock):
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return data
+            data += chunk
+
+    def status(self, sock):
+        return int(self.response(sock).split(None, 2)[1])
+
+    def wait_stats(self, srv, key, value):
+        deadline = time.monotonic() + 5
+        while srv.stats()[key] != value:
+            self.assertLess(time.monotonic(), deadline, srv.stats())
+            time.sleep(0.01)
+
+    def test_bounded(self):
+        srv = self.start(threads=2, max_queue=10)
+        socks = [self.request(srv) for i in range(5)]
+        self.wait_stats(srv, 'queued', 3)
+        self.assertEqual(srv.stats()['active'], 2)
+        self.release.set()
+        for sock in socks:
+            self.assertEqual(self.status(sock), 200)
+        self.assertEqual(self.max_running, 2)
+        self.wait_stats(srv, 'completed', 5)
+
+    def test_rejected(self):
+        srv = self.start(threads=1, max_queue=1)
+        active = self.request(srv)
+        self.wait_stats(srv, 'active', 1)
+        queued = self.request(srv)
+        self.wait_stats(srv, 'queued', 1)
+
+        rejected = self.request(srv)
+        response = self.response(rejected)
+        self.assertTrue(response.startswith(b'HTTP/1.1 503'), response[:100])
+        self.assertIn(b'Retry-After: 1', response)
+        self.assertEqual(srv.stats()['rejected'], 1)
+
+        self.release.set()
+        self.assertEqual(self.status(active), 200)
+        self.assertEqual(self.status(queued), 200)
+
+    def test_stats(self):
+        srv = self.start(threads=3)
+        self.release.set()
+        self.response(self.request(srv))
+        self.wait_stats(srv, 'completed', 1)
+        stats = srv.stats()
+        self.assertEqual((stats['threads'], stats['max_queue']), (3, 12))
+        self.assertEqual((stats['queued'], stats['active']), (0, 0))
+        self.assertGreaterEqual(stats['max_service_time'], 0)
+
+    def test_invalid(self):
+        self.assertRaises(
+            ValueError, PooledWSGIServer, '127.0.0.1', 0, self.app, threads=0)
+
+    def test_make_server(self):
+        srv = make_server('127.0.0.1', 0, self.app, threaded=3)
+        srv.server_close()
+        self.assertIsInstance(srv, PooledWSGIServer)
+        self.assertEqual(srv.threads, 3)
+        srv = make_server('127.0.0.1', 0, self.app, threaded=True)
+        srv.server_close()
+        self.assertIsInstance(srv, ThreadedWSGIServer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import logging
+import os
+import socket
+import threading
+import time
+import unittest
+
+from werkzeug.serving import (
+    PreforkWSGIServer, WSGIRequestHandler, can_fork, make_server)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log(self, type, message, *args):
+        pass
+
+
+def pid_app(environ, start_response):
+    if environ['PATH_INFO'] == '/crash':
+        os._exit(3)
+    body = str(os.getpid()).encode()
+    start_response('200 OK', [('Content-Length', str(len(body)))])
+    return [body]
+
+
+@unittest.skipUnless(can_fork, "the platform doesn't support fork")
+class PreforkServerTestCase(unittest.TestCase):
+    def setUp(self):
+        # the workers inherit the level: don't log the expected failures
+        logger = logging.getLogger('werkzeug')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.CRITICAL)
+
+    def start(self, **kwargs):
+        srv = PreforkWSGIServer(
+            '127.0.0.1', 0, pid_app, handler=QuietHandler, **kwargs)
+        # not in the main thread: no signal handlers installed
+        thread = threading.Thread(target=srv.serve_forever)
+        thread.start()
+
+        def stop():
+            srv.shutdown()
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+
+        self.addCleanup(stop)
+        return srv
+
+    def get(self, srv, path='/'):
+        """Return the pid of the worker serving a request, None if failed."""
+        sock = socket.create_connection(('127.0.0.1', srv.server_port))
+        sock.settimeout(10)
+        with sock:
+            sock.sendall(f'GET {path} HTTP/1.0\r\n\r\n'.encode())
+            data = b''
+            try:
+                while True:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+            except ConnectionError:
+                pass
+        if not data:
+            return None
+        return int(data.split(b'\r\n\r\n', 1)[1])
+
+    def connectable(self, srv):
+        try:
+            socket.create_connection(('127.0.0.1', srv.server_port)).close()
+        except ConnectionRefusedError:
+            return False
+        return True
+
+    def wait_for(self, cond, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not cond():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+    def test_workers(self):
+        srv = self.start(workers=2)
+        pids = {self.get(srv) for i in range(10)}
+        self.assertNotIn(os.getpid(), pids)
+        self.assertLessEqual(pids, set(srv._children))
+        self.assertEqual(len(srv._children), 2)
+
+    def test_reuse_port(self):
+        srv = self.start(workers=2, reuse_port=True)
+        # the server socket doesn't accept connections: wait for a worker
+        self.wait_for(lambda: self.connectable(srv))
+        pids = {self.get(srv) for i in range(10)}
+        self.assertLessEqual(pids, set(srv._children))
+
+    def test_shutdown(self):
+        srv = self.start(workers=2)
+        self.get(srv)
+        pids = list(srv._children)
+        srv.shutdown()
+        self.assertEqual(srv._children, {})
+        for pid in pids:
+            self.assertRaises(ProcessLookupError, os.kill, pid, 0)
+
+    def test_max_requests(self):
+        srv = self.start(workers=1, max_requests=2)
+        first = self.get(srv)
+        self.assertEqual(self.get(srv), first)
+        # replaced by a new worker
+        self.wait_for(lambda: self.get(srv) != first)
+
+    def test_crash(self):
+        srv = self.start(workers=1)
+        first = self.get(srv)
+        self.assertIsNone(self.get(srv, '/crash'))
+        self.wait_for(lambda: set(srv._children) - {first})
+        self.assertNotIn(self.get(srv), (first, None))
+
+    def test_invalid(self):
+        self.assertRaises(
+            ValueError, PreforkWSGIServer, '127.0.0.1', 0, pid_app, workers=0)
+        self.assertRaises(
+            ValueError, PreforkWSGIServer, '127.0.0.1', 0, pid_app,
+            threaded=False, keep_alive_timeout=5)
+        self.assertRaises(
+            ValueError, make_server, '127.0.0.1', 0, pid_app, max_requests=1)
+
+    def test_make_server(self):
+        srv = make_server(
+            '127.0.0.1', 0, pid_app, processes=3, threaded=4, prefork=True)
+        srv.server_close()
+        self.assertIsInstance(srv, PreforkWSGIServer)
+        self.assertEqual((srv.workers, srv.threaded), (3, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
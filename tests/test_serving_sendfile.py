@@ -0,0 +1,132 @@
+import io
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+from werkzeug.wrappers import Request, Response
+from werkzeug.wsgi import FileWrapper
+
+DATA = bytes(range(256)) * 400
+
+
+class RecordingHandler(WSGIRequestHandler):
+    """A quiet handler recording the calls to sendfile()."""
+    calls = []
+
+    def log(self, type, message, *args):
+        pass
+
+    def sendfile(self, file, offset, count, chunked=False):
+        self.calls.append((offset, count, chunked))
+        super().sendfile(file, offset, count, chunked)
+
+
+class SendfileTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(DATA)
+        self.addCleanup(os.unlink, self.path)
+        RecordingHandler.calls = self.calls = []
+
+        srv = ThreadedWSGIServer(
+            '127.0.0.1', 0, self.app, RecordingHandler, keep_alive_timeout=5)
+        thread = threading.Thread(target=srv.serve_forever)
+        thread.start()
+        self.addCleanup(srv.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(srv.shutdown)
+
+        self.sock = socket.create_connection(('127.0.0.1', srv.server_port))
+        self.sock.settimeout(5)
+        self.rfile = self.sock.makefile('rb')
+        self.addCleanup(self.sock.close)
+        self.addCleanup(self.rfile.close)
+
+    def app(self, environ, start_response):
+        path = environ['PATH_INFO']
+        if path == '/environ':
+            self.environ = environ
+            start_response('204 No Content', [])
+            return []
+
+        f = open(self.path, 'rb')
+        if path == '/range':
+            # Response wraps the file in a _RangeWrapper
+            request = Request(environ)
+            response = Response(
+                environ['wsgi.file_wrapper'](f), direct_passthrough=True)
+            response.make_conditional(
+                request, accept_ranges=True, complete_length=len(DATA))
+            return response(environ, start_response)
+
+        headers = []
+        if path == '/offset':
+            f.seek(1000)
+            headers.append(('Content-Length', str(len(DATA) - 1000)))
+        elif path == '/memory':
+            f.close()
+            f = io.BytesIO(DATA)
+            headers.append(('Content-Length', str(len(DATA))))
+        elif path != '/chunked':
+            headers.append(('Content-Length', str(len(DATA))))
+        start_response('200 OK', headers)
+        return environ['wsgi.file_wrapper'](f)
+
+    def get(self, path, headers=''):
+        self.sock.sendall(
+            f'GET {path} HTTP/1.1\r\nHost: x\r\n{headers}\r\n'.encode())
+        status = int(self.rfile.readline().split()[1])
+        rheaders = {}
+        while True:
+            line = self.rfile.readline().strip()
+            if not line:
+                break
+            key, value = line.decode().split(':', 1)
+            rheaders[key.lower()] = value.strip()
+
+        if status == 204:
+            return status, b''
+        if 'content-length' in rheaders:
+            return status, self.rfile.read(int(rheaders['content-length']))
+
+        body = b''
+        while True:
+            size = int(self.rfile.readline(), 16)
+            body += self.rfile.read(size + 2)[:-2]
+            if not size:
+                return status, body
+
+    def test_file(self):
+        self.assertEqual(self.get('/'), (200, DATA))
+        self.assertEqual(self.calls, [(0, len(DATA), False)])
+
+    def test_offset(self):
+        self.assertEqual(self.get('/offset'), (200, DATA[1000:]))
+        self.assertEqual(self.calls, [(1000, len(DATA) - 1000, False)])
+
+    def test_chunked(self):
+        self.assertEqual(self.get('/chunked'), (200, DATA))
+        self.assertEqual(self.calls, [(0, len(DATA), True)])
+        # the connection is still usable
+        self.assertEqual(self.get('/'), (200, DATA))
+
+    def test_range(self):
+        status, body = self.get('/range', 'Range: bytes=100-1099\r\n')
+        self.assertEqual((status, body), (206, DATA[100:1100]))
+        self.assertEqual(self.calls, [(100, 1000, False)])
+
+    def test_not_regular(self):
+        self.assertEqual(self.get('/memory'), (200, DATA))
+        self.assertEqual(self.calls, [])
+
+    def test_file_wrapper(self):
+        self.get('/environ')
+        self.assertIs(self.environ['wsgi.file_wrapper'], FileWrapper)
+
+
+if __name__ == '__main__':
+    unittest.main()
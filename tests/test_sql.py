@@ -0,0 +1,80 @@
+import unittest
+
+from psycopg2 import sql
+
+from testutils import ConnectingTestCase
+
+
+class SqlFormatTestCase(unittest.TestCase):
+    def test_format(self):
+        self.assertEqual(
+            sql.SQL("select {0} from {t}, {0}").format(
+                sql.Identifier('a'), t=sql.Identifier('t')),
+            sql.Composed([
+                sql.SQL("select "), sql.Identifier('a'), sql.SQL(" from "),
+                sql.Identifier('t'), sql.SQL(", "), sql.Identifier('a')]))
+
+    def test_errors(self):
+        s = sql.SQL("select {0} {}")
+        self.assertRaises(ValueError, s.format, sql.SQL('a'), sql.SQL('b'))
+        self.assertRaises(ValueError, sql.SQL("{} {0}").format, sql.SQL('a'))
+        self.assertRaises(ValueError, sql.SQL("{0!r}").format, sql.SQL('a'))
+        self.assertRaises(ValueError, sql.SQL("{0:<3}").format, sql.SQL('a'))
+        self.assertRaises(IndexError, sql.SQL("{} {}").format, sql.SQL('a'))
+        self.assertRaises(KeyError, sql.SQL("{x}").format)
+
+    def test_hash(self):
+        self.assertEqual(hash(sql.Identifier('a')), hash(sql.Identifier('a')))
+        self.assertEqual(len({sql.SQL('a'), sql.SQL('a'), sql.SQL('b')}), 2)
+        self.assertNotEqual(sql.SQL('a'), sql.Identifier('a'))
+        self.assertEqual(
+            hash(sql.SQL('a') + sql.Identifier('b')),
+            hash(sql.Composed([sql.SQL('a'), sql.Identifier('b')])))
+
+
+class TemplateTestCase(ConnectingTestCase):
+    def test_compile(self):
+        s = sql.SQL("select {0} from {t} where {0} = %s")
+        tmpl = s.compile()
+        self.assertIsInstance(tmpl, sql.Template)
+        self.assertIs(tmpl.sql, s)
+        args = (sql.Identifier('a'),)
+        self.assertEqual(
+            tmpl.format(*args, t=sql.Identifier('t')),
+            s.format(*args, t=sql.Identifier('t')))
+        self.assertRaises(TypeError, sql.Template, "select 1")
+
+    def test_render(self):
+        tmpl = sql.SQL("select {}, {} from {t}").compile()
+        args = (sql.Identifier('a"b'), sql.Placeholder('x'))
+        kwargs = {'t': sql.Identifier('s', 't')}
+        rv = tmpl.render(self.conn, *args, **kwargs)
+        self.assertEqual(rv, 'select "a""b", %(x)s from "s"."t"')
+        self.assertEqual(
+            rv, tmpl.format(*args, **kwargs).as_string(self.conn))
+
+        # memoized
+        self.assertEqual(len(tmpl._rendered), 1)
+        self.assertIs(tmpl.render(self.conn.cursor(), *args, **kwargs), rv)
+
+    def test_render_literals(self):
+        tmpl = sql.SQL("select {}").compile()
+        for value in ["a'b", 10]:
+            self.assertEqual(
+                tmpl.render(self.conn, sql.Literal(value)),
+                'select ' + sql.Literal(value).as_string(self.conn))
+        self.assertEqual(
+            tmpl.render(self.conn, sql.Composed([sql.Literal(1)])),
+            "select 1")
+        # depend on the adapters: never memoized
+        self.assertEqual(tmpl._rendered, {})
+
+    def test_execute(self):
+        tmpl = sql.SQL("select {} from (select 1 as n) x").compile()
+        curs = self.conn.cursor()
+        curs.execute(tmpl.render(curs, sql.Identifier('n')))
+        self.assertEqual(curs.fetchone(), (1,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""Utilities for the psycopg2 tests.
+
+The tests needing a database connect using the connection string in the
+environment variable PSYCOPG2_TESTDB_DSN, or to the database
+"psycopg2_test" on the default server; they are skipped if the database
+is not available.
+"""
+
+import os
+import unittest
+
+import psycopg2
+
+dsn = os.environ.get('PSYCOPG2_TESTDB_DSN', 'dbname=psycopg2_test')
+
+
+class ConnectingTestCase(unittest.TestCase):
+    """A test case providing connections to the test database.
+
+    The connections obtained with `connect()` are closed at the end of the
+    test.
+    """
+    def setUp(self):
+        self._conns = []
+
+    def tearDown(self):
+        for conn in self._conns:
+            if not conn.closed:
+                conn.close()
+
+    def connect(self, **kwargs):
+        try:
+            conn = psycopg2.connect(dsn, **kwargs)
+        except psycopg2.OperationalError as e:
+            self.skipTest(f"test database not available: {e}")
+        self._conns.append(conn)
+        return conn
+
+    @property
+    def conn(self):
+        if not self._conns:
+            self.connect()
+        return self._conns[0]